@@ -3,7 +3,6 @@ from flask_cors import CORS
 import os
 import socketserver
 import threading
-import queue
 import json
 import time
 import random
@@ -16,11 +15,46 @@ from threading import Lock
 from config import (
     API_CONFIG,
     PROTOCOL_CONFIG,
-    SERVER_CONFIG
+    SERVER_CONFIG,
+    DEDUPE_CONFIG,
+    JOURNAL_CONFIG,
+    LOGGING_CONFIG,
+    IMAGE_PIPELINE_CONFIG,
+    TEMPLATE_STORE_CONFIG,
+    STYLE_FETCH_CONFIG,
+    DEPLOYMENT_CONFIG,
+    EVENT_BUFFER_CONFIG,
+    INGEST_PIPELINE_CONFIG,
+    INGEST_SOURCES_CONFIG,
+    LISTENER_SUPERVISOR_CONFIG,
+    DISPLAY_LANES_CONFIG,
+    PACING_CONFIG,
+    CHANNELS_CONFIG,
+    LOOKAHEAD_CONFIG
 )
-from bs4 import BeautifulSoup
-import tinycss2
-from urllib.parse import urljoin, urlparse
+from read_dedupe import ReadDedupeFilter
+from sequence_tracker import SequenceTracker
+from read_journal import ReadJournal, JournalReader
+from metrics import MetricsRegistry
+from log_pipeline import LogPipeline, get_logger
+from image_index import ImageIndex
+from image_pipeline import ImagePipeline, FORMAT_MIMETYPES, start_worker_pool
+from upload_store import UploadStore
+from participant_store import ParticipantStore
+from display_queue import DisplayQueue, LaneQueue, MirroredQueue
+from display_pacing import DisplayPacer
+from display_channels import ChannelRegistry
+from event_buffer import EventBuffer
+from ingest_pipeline import IngestPipeline
+from decoder_registry import DecoderRegistry
+from timing_parsers import build_registry
+from ingest_sources import UdpReceiver, LogTailer
+from listener_supervisor import ListenerSupervisor, TcpListener
+from template_repository import TemplateRepository, PatchError, RevisionConflict, TemplateError
+from template_compiler import bind as bind_template, runner_assets
+from style_scraper import StyleScraper
+from state_bus import StateBusServer, StateBusClient
+from urllib.parse import urlparse
 import logging
 from PIL import Image
 import atexit
@@ -29,31 +63,125 @@ import socket
 app = Flask(__name__, static_folder='static')
 CORS(app)
 
-logging.basicConfig(level=logging.INFO)
+# 'standalone' runs everything in this process. Multi-process mode runs one 'ingest'
+# process (TCP listener and all state) and any number of gunicorn 'worker' processes
+# that mirror its display state over the state bus and forward everything else to it.
+ROLE = os.environ.get('RACEDISPLAY_ROLE', DEPLOYMENT_CONFIG.get('role', 'standalone'))
+if ROLE not in ('standalone', 'ingest', 'worker'):
+    raise ValueError(f"Unknown RACEDISPLAY_ROLE {ROLE!r}: expected standalone, ingest or worker")
+
+# Image workers are forked here, before the first thread starts (see start_worker_pool)
+image_workers = None
+if IMAGE_PIPELINE_CONFIG.get('enabled', True) and ROLE != 'worker':
+    image_workers = start_worker_pool(IMAGE_PIPELINE_CONFIG.get('workers', 2),
+                                      IMAGE_PIPELINE_CONFIG.get('start_method', 'fork'))
+
+# All logging goes through a queue to a background writer so hot paths never block on stdout
+log_pipeline = LogPipeline(LOGGING_CONFIG)
+log_pipeline.start()
+atexit.register(log_pipeline.stop)
 logger = logging.getLogger(__name__)
+ingest_log = get_logger('ingest')
+queue_log = get_logger('queue')
+provider_log = get_logger('provider')
+
+# Hot-path timers and counters, exposed at /api/metrics
+metrics = MetricsRegistry('racedisplay')
 
 # Global variables
-roster_data = {}
-data_queue = queue.Queue()
+roster_store = ParticipantStore('roster')  # bib -> participant, copy-on-write
+def make_event_buffer():
+    return EventBuffer(
+        capacity=EVENT_BUFFER_CONFIG.get('capacity', 1000),
+        policy=EVENT_BUFFER_CONFIG.get('policy', 'coalesce'),
+        block_timeout=EVENT_BUFFER_CONFIG.get('block_timeout_seconds', 0.5)
+    )
+
+# Processed reads for the SSE streams: a bounded ring every /stream client reads from its own cursor
+event_buffer = make_event_buffer()
 current_event_id = None
 race_name = None
 current_runner = None  # Track the current runner for API endpoint
 DISPLAY_DURATION = 5000  # Default duration in milliseconds
 
 # Add queuing system variables
-runner_queue = []  # Queue to store multiple runners
 MAX_QUEUE_SIZE = 200  # Maximum number of runners in queue (increased from 50)
-queue_lock = Lock()  # Thread lock for queue operations
+
+def make_display_queue():
+    if DISPLAY_LANES_CONFIG.get('enabled'):
+        # Finish-line reads ahead of split and start reads during a surge
+        return LaneQueue(
+            MAX_QUEUE_SIZE,
+            DISPLAY_LANES_CONFIG.get('lanes', []),
+            default_lane=DISPLAY_LANES_CONFIG.get('default_lane', 'other'),
+            promote_after=DISPLAY_LANES_CONFIG.get('promote_after_seconds', 30.0)
+        )
+    return DisplayQueue(MAX_QUEUE_SIZE)  # Writers lock briefly; readers use a snapshot
+
+def make_display_pacer():
+    return DisplayPacer(
+        enabled=PACING_CONFIG.get('enabled', True),
+        min_duration=PACING_CONFIG.get('min_duration_seconds', 2.0),
+        drain_target=PACING_CONFIG.get('drain_target_seconds', 60),
+        max_batch_size=PACING_CONFIG.get('max_batch_size', 6),
+        rate_window=PACING_CONFIG.get('rate_window_seconds', 30),
+        exit_ratio=PACING_CONFIG.get('exit_ratio', 0.6),
+        calm_seconds=PACING_CONFIG.get('calm_seconds', 15)
+    )
+
+if ROLE == 'worker':
+    display_queue = MirroredQueue(MAX_QUEUE_SIZE)  # Loaded from the ingest process's snapshots
+else:
+    display_queue = make_display_queue()
+
+# Shortens display time and batches runners when the queue outgrows the displays
+display_pacer = make_display_pacer()
+
+# Named display channels (one screen per race, wave or mat), each with its own
+# filtered queue, pacing and stream. Served by the ingest process; workers forward.
+display_channels = ChannelRegistry(
+    lambda: (make_display_queue(), make_event_buffer(), make_display_pacer()),
+    state_path=os.path.join(app.root_path, CHANNELS_CONFIG.get('state_file', 'data/display_channels.json'))
+)
+if ROLE != 'worker':
+    display_channels.load(CHANNELS_CONFIG.get('channels', {}))
+
+# Suppress decoder bounce reads even after the runner has left the queue
+read_dedupe = ReadDedupeFilter(
+    window_seconds=DEDUPE_CONFIG.get('window_seconds', 30),
+    enabled=DEDUPE_CONFIG.get('enabled', True)
+)
+
+# Per-decoder, per-location sequence tracking for gap detection and replay
+sequence_tracker = SequenceTracker(
+    retry_seconds=PROTOCOL_CONFIG.get('REPLAY_RETRY_SECONDS', 10),
+    max_attempts=PROTOCOL_CONFIG.get('REPLAY_MAX_ATTEMPTS', 3),
+    reset_threshold=PROTOCOL_CONFIG.get('SEQUENCE_RESET_THRESHOLD', 100),
+    resync_window=PROTOCOL_CONFIG.get('SEQUENCE_RESYNC_WINDOW', 10)
+)
+
+metrics.gauge('runner_queue_depth', lambda: len(display_queue), 'Runners waiting in the display queue')
+metrics.gauge('display_batch_mode', lambda: int(display_pacer.mode == 'batch'), 'Displays are showing multi-runner frames')
+metrics.gauge('display_frame_duration_ms', lambda: display_pacer.current['duration_ms'] or DISPLAY_DURATION,
+              'Current display time per frame')
+if isinstance(display_queue, LaneQueue):
+    for _lane in display_queue.stats()['lanes']:
+        metrics.gauge('runner_queue_lane_depth', lambda name=_lane: display_queue.stats()['lanes'][name]['size'],
+                      'Runners waiting in one display lane', lane=_lane)
+metrics.gauge('sse_backlog', lambda: len(event_buffer), 'Events held in the SSE ring buffer')
+metrics.gauge('sse_events_dropped', lambda: event_buffer.dropped, 'SSE events overwritten before every stream read them')
+metrics.gauge('sse_events_coalesced', lambda: event_buffer.coalesced, 'Undelivered SSE events replaced by a newer read of the same bib')
+metrics.gauge('dedupe_hits', lambda: read_dedupe.hits, 'Reads suppressed by the duplicate filter')
+metrics.gauge('dedupe_misses', lambda: read_dedupe.misses, 'Reads accepted by the duplicate filter')
+metrics.gauge('sequence_gaps_detected', lambda: sequence_tracker.gaps_detected, 'Decoder sequence gaps seen')
+metrics.gauge('sequence_reads_recovered', lambda: sequence_tracker.reads_recovered, 'Missing reads recovered by replay')
+metrics.gauge('log_records_dropped', lambda: log_pipeline.handler.dropped, 'Log records dropped because the writer fell behind')
 
 # TCP/IP Settings
 HOST = '127.0.0.1'
 PORT = 61611
 BUFFER_SIZE = 1024
 
-# Add after global variables
-listener_lock = Lock()
-listeners_started = False
-
 # Add to global variables
 AUTH_SECRETS = {}  # Store connection-specific secrets
 
@@ -121,17 +249,146 @@ REFRESH_CONFIG = {
 TEMPLATE_DIR = os.path.join(app.root_path, 'saved_templates')
 UPLOAD_DIR = os.path.join(app.static_folder, 'uploads')
 DATA_DIR = os.path.join(app.root_path, 'data')
+THUMBNAIL_DIR = os.path.join(UPLOAD_DIR, 'thumbnails')
 os.makedirs(TEMPLATE_DIR, exist_ok=True)
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Parsed templates are served from memory until their file changes
+template_repo = TemplateRepository(
+    TEMPLATE_DIR,
+    revision_dir=(os.path.join(app.root_path, TEMPLATE_STORE_CONFIG['directory'])
+                  if TEMPLATE_STORE_CONFIG.get('versioning', True) else None),
+    max_revisions=TEMPLATE_STORE_CONFIG.get('max_revisions', 50)
+)
+metrics.gauge('template_cache_hits', lambda: template_repo.hits, 'Template requests served from memory')
+metrics.gauge('template_cache_loads', lambda: template_repo.loads, 'Template files read and parsed')
+
+VARIANT_DIR = os.path.join(UPLOAD_DIR, 'variants')
+OBJECT_DIR = os.path.join(UPLOAD_DIR, 'objects')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Uploads are stored once by content hash; display names are aliases onto them
+upload_store = UploadStore(UPLOAD_DIR, OBJECT_DIR, os.path.join(DATA_DIR, 'upload_aliases.json'))
+
+# Image dimensions/thumbnails cached on disk so the asset panel never opens image files
+image_index = ImageIndex(UPLOAD_DIR, THUMBNAIL_DIR, os.path.join(DATA_DIR, 'image_index.json'),
+                         store=upload_store)
+
+def template_canvas_sizes():
+    """Distinct canvas sizes of saved templates plus the configured display sizes"""
+    sizes = {tuple(size) for size in IMAGE_PIPELINE_CONFIG.get('display_sizes', [[1920, 1080]])}
+    for meta in template_repo.index():
+        try:
+            sizes.add((int(meta['canvasWidth']), int(meta['canvasHeight'])))
+        except (TypeError, ValueError):
+            continue
+    return sorted(sizes)
+
+# Thumbnails, display-size variants and WebP/AVIF copies are built off the request thread
+image_pipeline = None
+if IMAGE_PIPELINE_CONFIG.get('enabled', True) and ROLE != 'worker':
+    image_pipeline = ImagePipeline(
+        UPLOAD_DIR, THUMBNAIL_DIR, VARIANT_DIR,
+        workers=IMAGE_PIPELINE_CONFIG.get('workers', 2),
+        formats=IMAGE_PIPELINE_CONFIG.get('formats', ['avif', 'webp']),
+        quality=IMAGE_PIPELINE_CONFIG.get('quality', 80),
+        sizes=template_canvas_sizes,
+        on_complete=image_index.record_build,
+        start_method=IMAGE_PIPELINE_CONFIG.get('start_method', 'fork'),
+        executor=image_workers
+    )
+    image_index.builder = image_pipeline.submit
+
+# Write-ahead journal of raw decoder lines for post-race audit and replay
+JOURNAL_DIR = os.path.join(app.root_path, JOURNAL_CONFIG.get('directory', 'data/journal'))
+read_journal = None
+if JOURNAL_CONFIG.get('enabled', True) and ROLE != 'worker':
+    read_journal = ReadJournal(
+        JOURNAL_DIR,
+        segment_bytes=JOURNAL_CONFIG.get('segment_bytes', 64 * 1024 * 1024),
+        fsync_interval=JOURNAL_CONFIG.get('fsync_interval_seconds', 1.0),
+        fsync_batch=JOURNAL_CONFIG.get('fsync_batch', 256)
+    )
+    read_journal.start_flusher()
+    metrics.gauge('journal_records_written', lambda: read_journal.records_written, 'Raw lines written to the journal')
+
+# Track progress of journal replays; the lock makes "start unless running" one step
+journal_replay_lock = Lock()
+journal_replay_status = {
+    'running': False,
+    'records_read': 0,
+    'runners_matched': 0,
+    'started_at': None,
+    'finished_at': None,
+    'error': None
+}
+
 # Add mode tracking
 current_mode = None  # 'pre-race' or 'results'
-results_data = {}  # Store results data for results mode
+results_store = ParticipantStore('results')  # Results data for results mode, copy-on-write
+
+# Multi-process mode: display state published by the ingest process over a Unix socket
+STATE_BUS_PATH = os.path.join(app.root_path, DEPLOYMENT_CONFIG.get('bus_socket', 'data/state_bus.sock'))
+state_bus = None         # Ingest role
+state_bus_client = None  # Worker role
+
+def bus_state():
+    """Values workers mirror that change without a message of their own"""
+    return {'mode': current_mode, 'race_name': race_name, 'current_runner': current_runner,
+            'pacing': display_pacer.current}
+
+def bus_snapshot():
+    """Everything a newly connected worker needs"""
+    return dict(bus_state(), **queue_message())
+
+def queue_message():
+    """The latest queue snapshot for the workers, read without the queue's lock"""
+    runners, version = display_queue.published()
+    return {'version': version, 'runners': runners}
+
+def apply_bus_message(message):
+    """Worker role: mirror one message from the ingest process"""
+    global current_runner, current_mode, race_name
+    kind = message.get('type')
+    if kind == 'event':
+        current_runner = message['data']
+        event_buffer.publish(message['data'], key=message['data'].get('bib'))
+        return
+    if kind in ('snapshot', 'queue'):
+        display_queue.load(message['runners'], message['version'], force=kind == 'snapshot')
+    if kind in ('snapshot', 'state'):
+        current_mode = message.get('mode')
+        race_name = message.get('race_name')
+        current_runner = message.get('current_runner')
+        display_pacer.load(message.get('pacing'))
+
+def publish_read(processed_data):
+    """Hand a processed read to the SSE streams, here or in the HTTP workers"""
+    if state_bus is not None:
+        state_bus.publish('event', data=processed_data)
+    else:
+        event_buffer.publish(processed_data, key=processed_data.get('bib'))
+
+if ROLE == 'ingest':
+    state_bus = StateBusServer(
+        STATE_BUS_PATH, bus_snapshot,
+        heartbeat_fn=bus_state,
+        heartbeat_seconds=DEPLOYMENT_CONFIG.get('heartbeat_seconds', 1.0),
+        max_backlog=DEPLOYMENT_CONFIG.get('max_backlog', 1000)
+    )
+    state_bus.follow('queue', display_queue.changed, queue_message)
+    state_bus.start()
+    atexit.register(state_bus.stop)
+    metrics.gauge('state_bus_subscribers', lambda: state_bus.stats()['subscribers'], 'HTTP workers subscribed to the state bus')
+elif ROLE == 'worker':
+    state_bus_client = StateBusClient(STATE_BUS_PATH, apply_bus_message)
+    state_bus_client.start()
 
 def encode_password(password):
     """Encode password using SHA-1"""
     return hashlib.sha1(password.encode('utf-8')).hexdigest()
 
+@metrics.timed('provider_fetch_page_seconds', 'Provider API page fetch latency', provider='chronotrack', kind='roster')
 def fetch_roster_page(event_id, credentials, page=1):
     """Fetch a single page of roster data"""
     url = f"{API_CONFIG['BASE_URL']}/event/{event_id}/entry"
@@ -157,16 +414,16 @@ def fetch_roster_page(event_id, credentials, page=1):
         'elide_json': 'false'
     }
     
-    print(f"Requesting roster from: {url}")
-    print(f"Request parameters: {params}")
+    provider_log.debug("Requesting roster page %s from %s", page, url,
+                       extra={'params': {k: v for k, v in params.items() if k != 'user_pass'}})
     
     try:
         response = requests.get(url, params=params, timeout=10)
-        print(f"API Response status: {response.status_code}")
-        print(f"API Response headers: {dict(response.headers)}")
+        provider_log.debug("Roster API response %s", response.status_code,
+                           extra={'headers': dict(response.headers)})
         
         if response.status_code != 200:
-            print(f"API Error: {response.text}")
+            provider_log.error("Roster API error %s: %s", response.status_code, response.text[:500])
             return None, None
             
         response.raise_for_status()
@@ -174,41 +431,41 @@ def fetch_roster_page(event_id, credentials, page=1):
         
         # Validate response structure
         if not isinstance(data, dict):
-            print(f"Invalid response format: expected dict, got {type(data)}")
+            provider_log.error("Invalid roster response format: expected dict, got %s", type(data).__name__)
             return None, None
             
         if 'event_entry' not in data:
-            print(f"Missing 'event_entry' in response: {data}")
+            provider_log.error("Missing 'event_entry' in roster response", extra={'keys': list(data)})
             return None, None
             
         if not isinstance(data['event_entry'], list):
-            print(f"Invalid 'event_entry' format: expected list, got {type(data['event_entry'])}")
+            provider_log.error("Invalid 'event_entry' format: expected list, got %s",
+                               type(data['event_entry']).__name__)
             return None, None
             
         if len(data['event_entry']) > 0:
-            print(f"Successfully fetched {len(data['event_entry'])} entries")
-            # Log first entry for debugging
-            print(f"First entry sample: {data['event_entry'][0]}")
+            provider_log.info("Fetched %d roster entries from page %s", len(data['event_entry']), page)
+            provider_log.debug("First roster entry sample", extra={'entry': data['event_entry'][0]})
         else:
-            print(f"Response contained no entries. Response data: {data}")
+            provider_log.info("Roster page %s contained no entries", page)
             
         return data, response.headers
         
     except requests.exceptions.RequestException as e:
-        print(f"Request error: {e}")
+        provider_log.error("Roster request error: %s", e)
         return None, None
     except ValueError as e:
-        print(f"JSON parsing error: {e}")
-        print(f"Response content: {response.text[:500]}...")
+        provider_log.error("Roster JSON parsing error: %s", e, extra={'content': response.text[:500]})
         return None, None
-    except Exception as e:
-        print(f"Error fetching roster page {page}: {e}")
+    except Exception:
+        provider_log.exception("Error fetching roster page %s", page)
         return None, None
 
 def fetch_complete_roster(event_id, credentials):
     """Fetch all pages of roster data"""
-    global roster_data, race_name, login_progress
-    roster_data = {}
+    global race_name, login_progress
+    # Built privately and published once complete; lookups use the old roster until then
+    roster = {}
 
     # Reset progress tracking
     login_progress = {
@@ -236,7 +493,7 @@ def fetch_complete_roster(event_id, credentials):
             bib = entry.get('entry_id')
             
         if bib:
-            roster_data[bib] = {
+            roster[bib] = {
                 'name': entry.get('entry_name', ''),  # Full name
                 'first_name': entry.get('athlete_first_name', ''),
                 'last_name': entry.get('athlete_last_name', ''),
@@ -271,7 +528,7 @@ def fetch_complete_roster(event_id, credentials):
                     bib = entry.get('entry_id')
                     
                 if bib:
-                    roster_data[bib] = {
+                    roster[bib] = {
                         'name': entry.get('entry_name', ''),
                         'first_name': entry.get('athlete_first_name', ''),
                         'last_name': entry.get('athlete_last_name', ''),
@@ -292,10 +549,11 @@ def fetch_complete_roster(event_id, credentials):
                     }
                     login_progress['loaded_entries'] += 1
     
-    print(f"Total runners loaded: {len(roster_data)}")
-    if len(roster_data) != total_rows:
-        print(f"Warning: Expected {total_rows} entries but loaded {len(roster_data)}")
+    print(f"Total runners loaded: {len(roster)}")
+    if len(roster) != total_rows:
+        print(f"Warning: Expected {total_rows} entries but loaded {len(roster)}")
 
+    roster_store.replace(roster)
     login_progress['complete'] = True
 
     return True
@@ -371,6 +629,7 @@ def format_time_string(time_str):
         print(f"Warning: Could not parse time string '{time_str}': {e}")
         return time_str
 
+@metrics.timed('provider_fetch_page_seconds', 'Provider API page fetch latency', provider='chronotrack', kind='results')
 def fetch_results_page(event_id, credentials, page=1, last_modified=None):
     """Fetch a single page of results data with optional last_modified optimization"""
     url = f"{API_CONFIG['BASE_URL']}/event/{event_id}/results"
@@ -397,18 +656,18 @@ def fetch_results_page(event_id, credentials, page=1, last_modified=None):
     # Add last_modified parameter for incremental sync if provided
     if last_modified:
         params['last_modified'] = last_modified
-        print(f"🔄 Using incremental sync with last_modified: {last_modified}")
     
-    print(f"Requesting results page {page} from: {url}")
-    print(f"Request parameters: {params}")
+    sync_kind = 'incremental' if last_modified else 'full'
+    provider_log.debug("Requesting results page %s from %s", page, url,
+                       extra={'params': {k: v for k, v in params.items() if k != 'user_pass'}})
     
     try:
         response = requests.get(url, params=params, timeout=30)
-        print(f"Results API Response status: {response.status_code}")
-        print(f"Results API Response headers: {dict(response.headers)}")
+        provider_log.debug("Results API response %s", response.status_code,
+                           extra={'headers': dict(response.headers)})
         
         if response.status_code != 200:
-            print(f"Results API Error: {response.text}")
+            provider_log.error("Results API error %s: %s", response.status_code, response.text[:500])
             return None, None
             
         response.raise_for_status()
@@ -416,54 +675,51 @@ def fetch_results_page(event_id, credentials, page=1, last_modified=None):
         
         # Validate response structure
         if not isinstance(data, dict):
-            print(f"Invalid results response format: expected dict, got {type(data)}")
+            provider_log.error("Invalid results response format: expected dict, got %s", type(data).__name__)
             return None, None
             
         if 'event_results' not in data:
-            print(f"Missing 'event_results' in response: {data}")
+            provider_log.error("Missing 'event_results' in results response", extra={'keys': list(data)})
             return None, None
             
         if not isinstance(data['event_results'], list):
-            print(f"Invalid 'event_results' format: expected list, got {type(data['event_results'])}")
+            provider_log.error("Invalid 'event_results' format: expected list, got %s",
+                               type(data['event_results']).__name__)
             return None, None
             
         if len(data['event_results']) > 0:
-            if last_modified:
-                print(f"✅ Incremental sync: fetched {len(data['event_results'])} modified results from page {page}")
-            else:
-                print(f"📥 Full sync: fetched {len(data['event_results'])} results from page {page}")
-            # Log first result for debugging
-            print(f"First result sample: {data['event_results'][0]}")
+            provider_log.info("%s sync: fetched %d results from page %s",
+                              sync_kind.capitalize(), len(data['event_results']), page,
+                              extra={'last_modified': last_modified})
+            provider_log.debug("First result sample", extra={'result': data['event_results'][0]})
         else:
-            if last_modified:
-                print(f"✅ Incremental sync: no new/modified results on page {page}")
-            else:
-                print(f"Page {page} contained no results. Response data: {data}")
+            provider_log.info("%s sync: no results on page %s", sync_kind.capitalize(), page,
+                              extra={'last_modified': last_modified})
             
         return data, response.headers
         
     except requests.exceptions.RequestException as e:
-        print(f"Results request error: {e}")
+        provider_log.error("Results request error: %s", e)
         return None, None
     except ValueError as e:
-        print(f"Results JSON parsing error: {e}")
-        print(f"Response content: {response.text[:500]}...")
+        provider_log.error("Results JSON parsing error: %s", e, extra={'content': response.text[:500]})
         return None, None
-    except Exception as e:
-        print(f"Error fetching results page {page}: {e}")
+    except Exception:
+        provider_log.exception("Error fetching results page %s", page)
         return None, None
 
 def fetch_complete_results(event_id, credentials, incremental=False):
     """Fetch all pages of results data with optional incremental sync"""
-    global results_data, race_name, last_modified_timestamps, initial_sync_complete
+    global race_name, last_modified_timestamps, initial_sync_complete
     
     # Determine if this is an incremental or full sync
     last_modified = None
     if incremental and initial_sync_complete['results'] and last_modified_timestamps['results']:
         last_modified = last_modified_timestamps['results']
         print(f"🔄 Starting incremental results sync from: {last_modified}")
+        results = dict(results_store.snapshot())  # Changes are applied to a private copy
     else:
-        results_data = {}  # Clear existing data for full sync
+        results = {}  # Full sync builds a new map; lookups use the old one until it is published
         print(f"📥 Starting full results sync for event {event_id}")
     
     # Fetch first page to check if we have any results
@@ -504,7 +760,7 @@ def fetch_complete_results(event_id, credentials, incremental=False):
         bib = result.get('results_bib')
         if bib:
             # Map results data to our standard format with time formatting
-            results_data[bib] = {
+            results[bib] = {
                 'name': f"{result.get('results_first_name', '')} {result.get('results_last_name', '')}".strip(),
                 'first_name': result.get('results_first_name', ''),
                 'last_name': result.get('results_last_name', ''),
@@ -554,7 +810,7 @@ def fetch_complete_results(event_id, credentials, incremental=False):
                 for result in data['event_results']:
                     bib = result.get('results_bib')
                     if bib:
-                        results_data[bib] = {
+                        results[bib] = {
                             'name': f"{result.get('results_first_name', '')} {result.get('results_last_name', '')}".strip(),
                             'first_name': result.get('results_first_name', ''),
                             'last_name': result.get('results_last_name', ''),
@@ -606,7 +862,7 @@ def fetch_complete_results(event_id, credentials, incremental=False):
             for result in data['event_results']:
                 bib = result.get('results_bib')
                 if bib:
-                    results_data[bib] = {
+                    results[bib] = {
                         'name': f"{result.get('results_first_name', '')} {result.get('results_last_name', '')}".strip(),
                         'first_name': result.get('results_first_name', ''),
                         'last_name': result.get('results_last_name', ''),
@@ -644,16 +900,18 @@ def fetch_complete_results(event_id, credentials, incremental=False):
             
             page += 1
     
+    results_store.replace(results)
+    
     # Mark initial sync as complete
     initial_sync_complete['results'] = True
     
     if incremental:
         print(f"✅ Incremental sync complete: {processed_count} updated/new results")
-        print(f"📊 Total results in database: {len(results_data)}")
+        print(f"📊 Total results in database: {len(results)}")
     else:
-        print(f"📥 Full sync complete: {len(results_data)} total results loaded")
-        if total_rows > 0 and len(results_data) != total_rows:
-            print(f"⚠️  Warning: Expected {total_rows} results but loaded {len(results_data)}")
+        print(f"📥 Full sync complete: {len(results)} total results loaded")
+        if total_rows > 0 and len(results) != total_rows:
+            print(f"⚠️  Warning: Expected {total_rows} results but loaded {len(results)}")
     
     return True
 
@@ -673,58 +931,149 @@ def calculate_hmac(seed, password, method='sha1'):
         return hmac.new(password.encode(), seed.encode(), hashlib.md5).hexdigest()
     return None
 
+# Read formats accepted from decoders, picked per line by its format prefix
+timing_parser = build_registry(PROTOCOL_CONFIG.get('TIMING_FORMATS', ['CT01_33']))
+
+def process_decoder_line(read, source, submitted_at):
+    """Processing stage: look up, dedupe and queue one read handed off by a socket reader"""
+    global current_runner
+    metrics.observe('ingest_handoff_wait_seconds', time.perf_counter() - submitted_at)
+    processed_data = process_timing_data(read)
+    if processed_data:
+        current_runner = processed_data  # Update current runner for API endpoint
+        publish_read(processed_data)
+
+# Socket readers never wait on processing: they frame lines and hand them to these workers
+ingest_pipeline = IngestPipeline(
+    process_decoder_line,
+    workers=INGEST_PIPELINE_CONFIG.get('workers', 2),
+    queue_size=INGEST_PIPELINE_CONFIG.get('queue_size', 10000)
+)
+if ROLE != 'worker':
+    ingest_pipeline.start()
+metrics.gauge('ingest_handoff_dropped', lambda: ingest_pipeline.dropped, 'Reads dropped because the processing hand-off was full')
+metrics.gauge('ingest_reads_processed', lambda: sum(ingest_pipeline.processed), 'Reads through the processing stage')
+for _worker in range(ingest_pipeline.workers):
+    metrics.gauge('ingest_handoff_depth', lambda index=_worker: ingest_pipeline.depth(index),
+                  'Framed reads waiting for a processing worker', worker=str(_worker))
+
+def ingest_lines(source, lines):
+    """Feed lines from a UDP or log-file source into the same pipeline as TCP decoders.
+    Sequence numbers still drop duplicates, but gaps cannot be replayed: there is
+    no connection to send a rewind on."""
+    for line, read in zip(lines, timing_parser.parse_batch(lines)):
+        metrics.inc('decoder_lines_total')
+        if read_journal:
+            read_journal.append(line, source)
+        if read is None:
+            continue
+        if read['sequence'] and PROTOCOL_CONFIG.get('SEQUENCE_TRACKING', True):
+            accept, _ = sequence_tracker.observe(source, read['location'], read['sequence'])
+            if not accept:
+                continue
+        ingest_pipeline.submit(read, source)
+
+# Live decoder connections; idle decoders are pinged, silent ones disconnected
+decoder_registry = DecoderRegistry(
+    heartbeat_interval=PROTOCOL_CONFIG.get('HEARTBEAT_INTERVAL', 10),
+    heartbeat_timeout=PROTOCOL_CONFIG.get('HEARTBEAT_TIMEOUT', 45)
+)
+metrics.gauge('decoders_connected', lambda: len(decoder_registry), 'Decoder connections currently open')
+
 class TimingHandler(socketserver.StreamRequestHandler):
     def setup(self):
-        """Set up the connection with proper timeout"""
+        """Register the connection. Reads block without a timeout: the registry's
+        heartbeat monitor pings quiet decoders and disconnects silent ones."""
         super().setup()
-        # Set socket timeout to prevent indefinite blocking
-        self.request.settimeout(PROTOCOL_CONFIG.get('TIMEOUT', 30))
-        print(f"Connection setup with {PROTOCOL_CONFIG.get('TIMEOUT', 30)}s timeout")
+        self.request.settimeout(None)
+        self.write_lock = Lock()  # Heartbeat pings are written from the monitor thread
+        self.connection = decoder_registry.register(self.client_address, self.request,
+                                                    lambda: self.write_command('ping'))
+        decoder_registry.start()
+
+    def finish(self):
+        decoder_registry.unregister(self.connection)
+        super().finish()
 
     def write_command(self, *fields):
         """Write a command to the socket with proper formatting"""
         try:
             command = PROTOCOL_CONFIG['FIELD_SEPARATOR'].join(map(str, fields))
-            print(">>", command)
+            ingest_log.debug(">> %s", command)
             message = (command + PROTOCOL_CONFIG['LINE_TERMINATOR']).encode('utf-8')
-            self.wfile.write(message)
-            self.wfile.flush()  # Ensure data is sent immediately
+            with self.write_lock:
+                self.wfile.write(message)
+                self.wfile.flush()  # Ensure data is sent immediately
         except Exception as e:
-            print(f"Error writing command: {e}")
+            ingest_log.warning("Error writing command to %s: %s", self.client_address[0], e)
             raise
 
     def read_command(self):
-        """Read a command from the socket with timeout handling"""
+        """Read a command from the socket; None once the connection is closed"""
         try:
             line = self.rfile.readline()
             if not line:
                 return None
-            command = line.strip().decode('utf-8', errors='ignore')
-            if command:
-                print("<<", command)
+            with metrics.timer('read_command_seconds'):
+                metrics.inc('decoder_bytes_total', len(line))
+                self.connection.record_line(len(line))
+                command = line.strip().decode('utf-8', errors='ignore')
+                if command:
+                    metrics.inc('decoder_lines_total')
+                    ingest_log.debug("<< %s", command)
+                    if read_journal:
+                        read_journal.append(command, self.client_address[0])
             return command
-        except socket.timeout:
-            # Timeout is normal - client might be idle
-            print("Socket timeout - client idle, continuing to listen...")
-            return ""  # Return empty string to continue loop
         except ConnectionResetError:
-            print("Client connection reset")
+            ingest_log.info("Client %s connection reset", self.client_address[0])
             return None
         except Exception as e:
-            print(f"Error reading command: {e}")
+            ingest_log.warning("Error reading command from %s: %s", self.client_address[0], e)
             return None
 
+    def check_sequence(self, read):
+        """Track read sequence numbers and request replays for any gaps.
+        Returns False if the read is a replayed one we already have."""
+        if not PROTOCOL_CONFIG.get('SEQUENCE_TRACKING', True) or not read['sequence']:
+            return True
+        
+        location, sequence = read['location'], read['sequence']
+        accept, replay_ranges = sequence_tracker.observe(self.client_address[0], location, sequence)
+        
+        for first, last in replay_ranges:
+            ingest_log.warning("Sequence gap at %s: missing reads %s-%s, requesting replay", location, first, last,
+                               extra={'decoder': self.client_address[0]})
+            try:
+                self.write_command(PROTOCOL_CONFIG.get('REWIND_COMMAND', 'rewind'), location, first, last)
+            except Exception as e:
+                ingest_log.error("Failed to request replay for %s %s-%s: %s", location, first, last, e)
+        
+        if not accept:
+            ingest_log.debug("Already received sequence %s at %s, skipping", sequence, location)
+        return accept
+
+    def submit_read(self, read):
+        """Sequence-check a parsed read and hand it to the processing stage"""
+        if not self.check_sequence(read):
+            return
+        self.connection.record_read(read['location'], read['time'])
+        # Lookup and queueing happen on the processing stage, off this socket's thread
+        ingest_pipeline.submit(read, self.client_address)
+
     def handle(self):
-        print(f"-- Client connected from {self.client_address} --")
-        logger.info(f"TCP Client connected from {self.client_address}")
+        ingest_log.info("Client connected from %s:%s", *self.client_address)
         
         try:
             # Consume the greeting with timeout handling
             greeting = self.read_command()
             if greeting is None:
-                print("Failed to receive greeting, disconnecting")
+                ingest_log.warning("Failed to receive greeting from %s, disconnecting", self.client_address[0])
                 return
-            print(f"Received greeting: {greeting}")
+            ingest_log.info("Received greeting: %s", greeting, extra={'decoder': self.client_address[0]})
+            self.connection.greeting = greeting
+            sequence_tracker.new_session(self.client_address[0])
+            # Senders that skip the handshake (like `import socket.py`) open with a read
+            opening_read = timing_parser.parse(greeting)
 
             # Send our response with settings
             settings = (
@@ -749,41 +1098,30 @@ class TimingHandler(socketserver.StreamRequestHandler):
             
             # Start the data feed
             self.write_command("start")
-
-            # Process incoming data with improved connection handling
-            connection_active = True
-            idle_count = 0
-            max_idle_cycles = 10  # Allow up to 10 timeout cycles before disconnecting
             
-            while connection_active:
+            if opening_read is not None:
+                self.submit_read(opening_read)
+
+            # Process incoming data until the decoder disconnects or misses its heartbeats
+            while True:
                 line = self.read_command()
                 
                 if line is None:
-                    print("Client disconnected or error occurred")
+                    ingest_log.info("Client %s disconnected (%s)", self.client_address[0],
+                                    self.connection.close_reason or 'closed by decoder')
                     break
                 
-                if line == "":  # Timeout occurred
-                    idle_count += 1
-                    if idle_count >= max_idle_cycles:
-                        print(f"Client idle for {max_idle_cycles} timeout cycles, disconnecting")
-                        break
-                    continue  # Continue listening
-                
-                # Reset idle count when we receive data
-                idle_count = 0
-                
                 if not line:
                     continue  # Skip empty lines
                 
-                print(f"Processing command: {line}")
-                logger.info(f"TCP Processing command: {line}")
+                ingest_log.debug("Processing command: %s", line)
 
                 if line == 'ping':
                     self.write_command("ack", "ping")
                     continue
                 
                 if line == 'stop':
-                    print("Received stop command")
+                    ingest_log.info("Received stop command from %s", self.client_address[0])
                     break
 
                 # Handle initialization acknowledgments
@@ -791,131 +1129,73 @@ class TimingHandler(socketserver.StreamRequestHandler):
                     parts = line.split('~')
                     if len(parts) >= 2:
                         ack_type = parts[1]
-                        print(f"Received acknowledgment: {ack_type}")
-                        if ack_type in ['init', 'geteventinfo', 'getlocations', 'start']:
+                        ingest_log.debug("Received acknowledgment: %s", ack_type)
+                        if ack_type == 'geteventinfo':
+                            self.connection.event_info = parts[2:]
+                        elif ack_type == 'getlocations':
+                            self.connection.locations = parts[2:]
+                        if ack_type in ['init', 'geteventinfo', 'getlocations', 'start', 'ping']:
                             continue
 
-                # Process timing data
-                processed_data = process_timing_data(line)
-                if processed_data:
-                    global current_runner
-                    current_runner = processed_data  # Update current runner for API endpoint
-                    data_queue.put(processed_data)
+                read = timing_parser.parse(line)
+                if read is None:
+                    ingest_log.debug("Ignoring unrecognised line from %s: %s", self.client_address[0], line)
+                    continue
+                self.submit_read(read)
 
-        except socket.timeout:
-            print(f"Connection timeout after {PROTOCOL_CONFIG.get('TIMEOUT', 30)}s")
         except ConnectionResetError:
-            print("Client forcibly closed the connection")
-        except Exception as e:
-            print(f"Error handling client connection: {e}")
-            import traceback
-            traceback.print_exc()
+            ingest_log.info("Client %s forcibly closed the connection", self.client_address[0])
+        except Exception:
+            ingest_log.exception("Error handling client connection from %s", self.client_address[0])
         finally:
-            print(f"-- Client {self.client_address} disconnected --")
+            ingest_log.info("Client %s:%s disconnected", *self.client_address)
+
+# Every ingest listener is owned by the supervisor: started, stopped and
+# rebound independently through /api/listeners, and restarted with backoff if
+# its thread dies or it cannot bind
+listener_supervisor = ListenerSupervisor(
+    check_interval=LISTENER_SUPERVISOR_CONFIG.get('check_interval_seconds', 1.0),
+    backoff_initial=LISTENER_SUPERVISOR_CONFIG.get('backoff_initial_seconds', 1.0),
+    backoff_max=LISTENER_SUPERVISOR_CONFIG.get('backoff_max_seconds', 60.0),
+    stable_seconds=LISTENER_SUPERVISOR_CONFIG.get('stable_seconds', 30.0)
+)
 
-def monitor_data_feed():
-    """Start the TCP server with automatic restart capability"""
-    max_retries = 5
-    retry_count = 0
-    retry_delay = 5  # seconds
-    
-    while retry_count < max_retries:
-        try:
-            print(f"Starting TCP server on {PROTOCOL_CONFIG['HOST']}:{PROTOCOL_CONFIG['PORT']} (attempt {retry_count + 1})")
-            
-            server = socketserver.ThreadingTCPServer(
-                (PROTOCOL_CONFIG['HOST'], PROTOCOL_CONFIG['PORT']), 
-                TimingHandler
-            )
-            
-            # Configure server for better reliability
-            server.allow_reuse_address = True
-            server.socket.setsockopt(socketserver.socket.SOL_SOCKET, socketserver.socket.SO_REUSEADDR, 1)
-            
-            # Set server timeout to prevent hanging
-            server.timeout = 1.0  # Check for shutdown every second
-            
-            print(f"✅ TCP Server listening on port {PROTOCOL_CONFIG['PORT']}")
-            print("🎯 Ready for ChronoTrack Live connections...")
-            
-            # Reset retry count on successful start
-            retry_count = 0
-            
-            # Serve with graceful shutdown handling
-            while True:
-                try:
-                    server.handle_request()
-                except KeyboardInterrupt:
-                    print("\n🛑 TCP Server shutdown requested")
-                    break
-                except Exception as e:
-                    print(f"⚠️ Error handling request: {e}")
-                    continue
-                    
-        except OSError as e:
-            if "Address already in use" in str(e):
-                print(f"❌ Port {PROTOCOL_CONFIG['PORT']} is in use")
-                retry_count += 1
-                if retry_count < max_retries:
-                    print(f"⏳ Waiting {retry_delay}s before retry...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                else:
-                    print(f"💥 Failed to start TCP server after {max_retries} attempts")
-                    raise
-            else:
-                print(f"❌ TCP Server error: {e}")
-                retry_count += 1
-                if retry_count < max_retries:
-                    print(f"⏳ Restarting in {retry_delay}s...")
-                    time.sleep(retry_delay)
-                else:
-                    raise
-        except Exception as e:
-            print(f"💥 Unexpected TCP server error: {e}")
-            import traceback
-            traceback.print_exc()
-            retry_count += 1
-            if retry_count < max_retries:
-                print(f"🔄 Attempting restart in {retry_delay}s...")
-                time.sleep(retry_delay)
-            else:
-                print(f"💥 TCP Server failed after {max_retries} attempts")
-                raise
-        finally:
-            try:
-                if 'server' in locals():
-                    server.server_close()
-                    print("🧹 TCP Server cleaned up")
-            except:
-                pass
+def make_tcp_listener(config):
+    return TcpListener(config['host'], config['port'], TimingHandler, registry=decoder_registry)
+
+def make_udp_listener(config):
+    return UdpReceiver(config.get('host', '0.0.0.0'), config.get('port', 61612), ingest_lines,
+                       batch_size=config.get('batch_size', 64))
+
+def make_file_tail_listener(config):
+    return LogTailer(
+        os.path.join(app.root_path, config.get('pattern', 'data/decoder_logs/*.txt')),
+        ingest_lines,
+        state_path=os.path.join(app.root_path, config.get('state_file', 'data/tail_offsets.json')),
+        start_at=config.get('start_at', 'end'),
+        poll_interval=config.get('poll_interval_seconds', 0.5)
+    )
+
+listener_supervisor.register('tcp', make_tcp_listener,
+                             {'host': PROTOCOL_CONFIG['HOST'], 'port': PROTOCOL_CONFIG['PORT']})
+listener_supervisor.register('udp', make_udp_listener, INGEST_SOURCES_CONFIG.get('udp', {}))
+# Never two tailers on the same files: a rebind stops the old one first
+listener_supervisor.register('file_tail', make_file_tail_listener, INGEST_SOURCES_CONFIG.get('file_tail', {}),
+                             overlap=False)
+for _listener in listener_supervisor.names():
+    metrics.gauge('listener_restarts', lambda name=_listener: listener_supervisor.stats()[name]['restarts'],
+                  'Times the supervisor restarted a listener after a crash or failed bind', listener=_listener)
 
 def start_listeners():
-    """Start TCP listener"""
-    global listeners_started
-    
-    with listener_lock:
-        if listeners_started:
-            print("Listener already running")
-            return True
-            
-        try:
-            # Start TCP listener
-            tcp_thread = threading.Thread(target=monitor_data_feed)
-            tcp_thread.daemon = False  # Make it a non-daemon thread
-            tcp_thread.start()
-            print("TCP server thread started")
-            
-            listeners_started = True
-            return True
-            
-        except Exception as e:
-            print(f"Failed to start listener: {e}")
-            return False
+    """Start the TCP listener and any enabled UDP/file sources that are not already running.
+    Returns False if one could not bind; the supervisor keeps retrying it."""
+    names = ['tcp'] + [name for name in ('udp', 'file_tail')
+                       if INGEST_SOURCES_CONFIG.get(name, {}).get('enabled')]
+    return listener_supervisor.start_all(names)
 
 def background_refresh_results():
     """Background thread to refresh results data every 60 seconds using incremental sync"""
-    global results_refresh_active, current_event_id, current_credentials, results_data, race_name
+    global results_refresh_active, current_event_id, current_credentials, race_name
     
     print("🔄 Background results refresh thread started (incremental mode)")
     
@@ -933,9 +1213,9 @@ def background_refresh_results():
             print("🔄 Running incremental results refresh...")
             
             # Fetch updated results using incremental sync
-            old_count = len(results_data)
+            old_count = len(results_store)
             if fetch_complete_results(current_event_id, current_credentials, incremental=True):
-                new_count = len(results_data)
+                new_count = len(results_store)
                 
                 # Log changes
                 if new_count > old_count:
@@ -988,41 +1268,70 @@ def stop_results_refresh():
             results_refresh_thread = None
             print("✅ Background results refresh stopped")
 
+@metrics.timed('enqueue_runner_seconds', 'Display queue insert latency, including lock wait')
+def enqueue_runner(processed_data):
+    """Smart queue logic: immediate display if queue empty, otherwise add to queue"""
+    global current_runner
+    
+    # Channels keep their own queues (and duplicate checks) next to the global one
+    if display_channels:
+        display_channels.route(processed_data)
+    
+    # Duplicate check, append and size limit happen under the queue's own lock
+    added, removed = display_queue.push(processed_data)
+    if not added:
+        queue_log.debug("Runner %s (bib %s) already in queue, skipping", processed_data['name'], processed_data['bib'])
+        return False
+    
+    display_pacer.record_arrival()
+    
+    if len(display_queue) == 1 and display_queue.head() is processed_data:
+        # Queue was empty, so this runner is displayed immediately
+        current_runner = processed_data
+        queue_log.debug("Immediate display: %s (bib %s) - queue was empty",
+                        processed_data['name'], processed_data['bib'])
+    else:
+        queue_log.debug("Added runner to queue: %s (bib %s)", processed_data['name'], processed_data['bib'],
+                        extra={'queue_size': len(display_queue)})
+    
+    if removed is not None:
+        metrics.inc('queue_evictions_total')
+        queue_log.warning("Queue full, removed runner: %s (bib %s)", removed['name'], removed['bib'])
+        # Update current_runner if we removed the first one
+        if removed is current_runner:
+            current_runner = display_queue.head()
+    return True
+
+@metrics.timed('process_timing_data_seconds', 'Parse, lookup and queue time per timing line')
 def process_timing_data(line):
-    """Process timing data in CT01_33 format:
-    format_id~sequence~location~bib~time~gator~tagcode~lap
-    Example: CT01_33~1~start~9478~14:02:15.31~0~0F2A38~1
+    """Process one read: a raw line in any accepted format, or a read already parsed
+    from one by timing_parser. For example:
+    CT01_33~1~start~9478~14:02:15.31~0~0F2A38~1
+    CT01_13,1,MINI10438,1894,20:26:41.07,1,1085B1,2
     """
-    global current_mode, roster_data, results_data
+    global current_mode
     
-    print(f"Processing line: {line}")
     try:
-        parts = line.split(PROTOCOL_CONFIG['FIELD_SEPARATOR'])
-        print(f"Split parts: {parts}")
-        
-        if len(parts) >= 8 and parts[0] == PROTOCOL_CONFIG['FORMAT_ID']:
-            data = {
-                'format': parts[0],
-                'sequence': parts[1],
-                'location': parts[2],
-                'bib': parts[3],
-                'time': parts[4],
-                'gator': parts[5],
-                'tagcode': parts[6],
-                'lap': parts[7]
-            }
-            print(f"Parsed data: {data}")
+        data = line if isinstance(line, dict) else timing_parser.parse(line)
+        
+        if data is not None:
+            ingest_log.debug("Parsed read", extra={'read': data})
             
             if data['bib'] == 'guntime':
-                print("Skipping guntime event")
+                ingest_log.debug("Skipping guntime event at %s", data['location'])
+                return None
+            
+            if read_dedupe.is_duplicate(data['bib'], data['location'], data['lap']):
+                ingest_log.debug("Duplicate read for bib %s at %s (lap %s), skipping",
+                                 data['bib'], data['location'], data['lap'])
                 return None
             
             # Determine which data source to use based on current mode
-            data_source = results_data if current_mode == 'results' else roster_data
+            # Lock-free: a snapshot is never modified once published
+            data_source = (results_store if current_mode == 'results' else roster_store).snapshot()
             data_source_name = 'results' if current_mode == 'results' else 'roster'
                 
             if data['bib'] in data_source:
-                print(f"Found bib {data['bib']} in {data_source_name}")
                 runner_data = data_source[data['bib']]
                 
                 # Create processed data with mode-specific fields
@@ -1063,46 +1372,22 @@ def process_timing_data(line):
                         'finish_timestamp': runner_data.get('finish_timestamp', '')
                     })
                 
-                print(f"Runner found: {processed_data}")
+                ingest_log.debug("Runner found for bib %s in %s", data['bib'], data_source_name,
+                                 extra={'runner': processed_data})
                 
-                # Smart queue logic: immediate display if queue empty, otherwise add to queue
-                global current_runner
-                with queue_lock:
-                    # Check if this runner is already in the queue
-                    if not any(runner['bib'] == processed_data['bib'] for runner in runner_queue):
-                        
-                        # If queue is empty, set as current runner for immediate display
-                        if len(runner_queue) == 0:
-                            current_runner = processed_data
-                            runner_queue.append(processed_data)
-                            print(f"🚀 IMMEDIATE DISPLAY: {processed_data['name']} (bib: {processed_data['bib']}) - Queue was empty")
-                            print(f"Queue size: {len(runner_queue)}")
-                        else:
-                            # Queue has runners, add to end for normal queueing
-                            runner_queue.append(processed_data)
-                            print(f"Added runner to queue: {processed_data['name']} (bib: {processed_data['bib']})")
-                            print(f"Queue size: {len(runner_queue)}")
-                        
-                        # Limit queue size
-                        if len(runner_queue) > MAX_QUEUE_SIZE:
-                            removed = runner_queue.pop(0)  # Remove oldest runner
-                            print(f"Queue full, removed runner: {removed['name']} (bib: {removed['bib']})")
-                            # Update current_runner if we removed the first one
-                            current_runner = runner_queue[0] if runner_queue else None
-                    else:
-                        print(f"Runner {processed_data['name']} (bib: {processed_data['bib']}) already in queue, skipping")
+                enqueue_runner(processed_data)
                 
                 return processed_data
             else:
-                print(f"Bib {data['bib']} not found in {data_source_name}. Available bibs: {list(data_source.keys())[:5]}...")
+                ingest_log.debug("Bib %s not found in %s", data['bib'], data_source_name,
+                                 extra={'known_bibs': len(data_source)})
                 
                 # Auto-create participant for unknown bibs in pre-race mode
                 if current_mode == 'pre-race' and data['bib'] != 'guntime':
-                    print(f"Auto-creating participant for bib {data['bib']}")
                     
                     # Generate realistic participant data
                     participant_info = generate_realistic_participant(data['bib'])
-                    data_source[data['bib']] = participant_info
+                    roster_store.update({data['bib']: participant_info})
                     
                     # Create processed data for the new participant
                     processed_data = {
@@ -1126,26 +1411,59 @@ def process_timing_data(line):
                         'bib': data['bib']
                     }
                     
-                    print(f"Auto-created participant: {processed_data['name']} (bib: {data['bib']}) - {processed_data['age']}yr {processed_data['gender']} from {processed_data['city']}")
+                    ingest_log.debug("Auto-created participant %s for bib %s", processed_data['name'], data['bib'])
                     
                     # Add to queue
-                    with queue_lock:
-                        if not any(runner['bib'] == processed_data['bib'] for runner in runner_queue):
-                            if len(runner_queue) == 0:
-                                current_runner = processed_data
-                                runner_queue.append(processed_data)
-                                print(f"🚀 IMMEDIATE DISPLAY: {processed_data['name']} (bib: {processed_data['bib']}) - Auto-created")
-                            else:
-                                runner_queue.append(processed_data)
-                                print(f"Added auto-created runner to queue: {processed_data['name']} (bib: {processed_data['bib']})")
+                    enqueue_runner(processed_data)
                     
                     return processed_data
                 
-    except Exception as e:
-        print(f"Error processing timing data: {e}")
-        print(f"Line causing error: {line}")
+    except Exception:
+        ingest_log.exception("Error processing timing data", extra={'line': line})
     return None
 
+def replay_journal_batch(lines):
+    """Parse a run of journaled lines together and process the reads among them"""
+    journal_replay_status['records_read'] += len(lines)
+    for read in timing_parser.parse_batch(lines):
+        if read is not None and process_timing_data(read):
+            journal_replay_status['runners_matched'] += 1
+
+def replay_journal(since=None, until=None, source=None):
+    """Push journaled raw lines back through process_timing_data at full speed"""
+    global journal_replay_status
+    
+    journal_replay_status.update({
+        'running': True,
+        'records_read': 0,
+        'runners_matched': 0,
+        'started_at': datetime.now().isoformat(),
+        'finished_at': None,
+        'error': None
+    })
+    
+    try:
+        if read_journal:
+            read_journal.flush()  # Make sure the active segment is on disk
+        
+        reader = JournalReader(JOURNAL_DIR)
+        batch = []
+        for _, _, line in reader.records(since=since, until=until, source=source):
+            batch.append(line)
+            if len(batch) >= 500:
+                replay_journal_batch(batch)
+                batch = []
+        replay_journal_batch(batch)
+        
+        print(f"📼 Journal replay complete: {journal_replay_status['records_read']} lines, "
+              f"{journal_replay_status['runners_matched']} runners matched")
+    except Exception as e:
+        print(f"Error replaying journal: {e}")
+        journal_replay_status['error'] = str(e)
+    finally:
+        journal_replay_status['running'] = False
+        journal_replay_status['finished_at'] = datetime.now().isoformat()
+
 # Default messages if file is missing
 DEFAULT_MESSAGES = [
     "Great job!",
@@ -1422,7 +1740,8 @@ def fetch_runsignup_participants(race_id, event_id, api_key, api_secret, last_mo
             params['page'] = page
             print(f"📄 Fetching RunSignUp participants page {page}")
             
-            response = requests.get(url, params=params, timeout=30)
+            with metrics.timer('provider_fetch_page_seconds', provider='runsignup', kind='participants'):
+                response = requests.get(url, params=params, timeout=30)
             
             print(f"📡 API Request: {response.url}")
             print(f"📡 Response Status: {response.status_code}")
@@ -1521,7 +1840,7 @@ def stop_background_refresh():
 
 def background_refresh_worker():
     """Background worker thread for roster updates"""
-    global last_roster_sync, roster_data
+    global last_roster_sync
     
     while refresh_active and current_provider == 'runsignup':
         try:
@@ -1557,7 +1876,7 @@ def background_refresh_worker():
                 # Update roster data with new/changed participants
                 updates_count = 0
                 
-                with roster_refresh_lock:
+                with roster_store.batch() as roster:
                     for participant in participants:
                         try:
                             bib = participant.get('bib_num') or str(participant.get('registration_id', ''))
@@ -1566,7 +1885,7 @@ def background_refresh_worker():
                                 user_data = participant.get('user', {})
                                 address = user_data.get('address', {})
                                 
-                                roster_data[bib] = {
+                                roster[bib] = {
                                     'name': f"{user_data.get('first_name', '')} {user_data.get('last_name', '')}".strip(),
                                     'first_name': user_data.get('first_name', ''),
                                     'last_name': user_data.get('last_name', ''),
@@ -1763,109 +2082,192 @@ def get_login_progress():
     """Return current roster loading progress"""
     return jsonify(login_progress)
 
+def current_pacing(depth, pacer):
+    """Display pacing for the current queue depth; HTTP workers use the ingest process's plan"""
+    if ROLE == 'worker':
+        return pacer.current
+    return pacer.plan(depth, DISPLAY_DURATION)
+
+def batch_frame(snapshot, pacing):
+    """The runners for one display frame: the head, or the first batch_size in batch mode"""
+    if pacing['mode'] == 'batch':
+        return list(snapshot[:pacing['batch_size']])
+    return list(snapshot[:1])
+
+def current_runner_payload(queue, pacer):
+    """The head of a display queue, its batch frame and pacing"""
+    snapshot = queue.snapshot()
+    pacing = current_pacing(len(snapshot), pacer)
+    return {
+        'runner': snapshot[0] if snapshot else None,
+        'runners': batch_frame(snapshot, pacing),
+        'queue_size': len(snapshot),
+        'max_queue_size': MAX_QUEUE_SIZE,
+        'mode': current_mode,
+        'pacing': pacing
+    }
+
+def runner_displayed_payload(queue, pacer, bibs, count):
+    """Remove the runners a display has finished showing: by bib, or the first
+    count from the head for clients that do not send bibs. None if nothing was removed."""
+    if bibs:
+        displayed_runners = queue.remove(bibs)
+    else:
+        displayed_runners = []
+        for _ in range(count):
+            runner = queue.pop()
+            if runner is None:
+                break
+            displayed_runners.append(runner)
+    if not displayed_runners:
+        return None
+    if len(displayed_runners) > 1:
+        pacer.batch_frames += 1
+    
+    remaining = queue.snapshot()
+    pacing = current_pacing(len(remaining), pacer)
+    queue_log.debug("Displayed %d runner(s), %d remaining", len(displayed_runners), len(remaining),
+                    extra={'queue_size': len(remaining)})
+    return {
+        'success': True,
+        'displayed_runner': displayed_runners[0],
+        'displayed_runners': displayed_runners,
+        'next_runner': remaining[0] if remaining else None,
+        'next_runners': batch_frame(remaining, pacing),
+        'queue_size': len(remaining),
+        'pacing': pacing
+    }
+
+def upcoming_response(queue):
+    """The next ?n= runners of a queue, versioned so an unchanged queue answers 304,
+    with ?template=<name>'s asset URLs (and each upcoming runner's bound images) to prefetch"""
+    n = min(max(request.args.get('n', LOOKAHEAD_CONFIG.get('default_runners', 3), type=int), 1),
+            LOOKAHEAD_CONFIG.get('max_runners', 20))
+    template_name = request.args.get('template')
+    cached = None
+    if template_name:
+        cached = template_repo.get(template_name)
+        if cached is None:
+            return jsonify({'error': 'Template not found'}), 404
+    # Everything here follows from the queue version, so the ETag can stand for it;
+    # pacing changes over time and comes with /current-runner instead
+    snapshot, version = queue.published()
+    runners = list(snapshot[:n])
+    response = jsonify({
+        'version': version,
+        'queue_size': len(snapshot),
+        'runners': runners,
+        'template': template_name,
+        'assets': runner_assets(cached.plan()['assets'], runners) if cached else None
+    })
+    response.set_etag(f"q{version}-{n}-{cached.etag if cached else ''}")
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def displayed_request(pacer):
+    """The {"bibs": [...]} or {"count": n} of a runner-displayed request, within the batch size limit"""
+    data = request.get_json(silent=True) or {}
+    bibs = data.get('bibs') or []
+    if not isinstance(bibs, list):
+        raise ValueError('bibs must be a list')
+    bibs = [str(bib) for bib in bibs[:pacer.max_batch_size]]
+    return bibs, max(1, min(int(data.get('count', 1)), pacer.max_batch_size))
+
 @app.route('/api/current-runner')
 def get_current_runner():
-    """Return current runner data for the display"""
-    global current_runner, current_mode, results_data
+    """Return current runner data for the display, with pacing: how long to show
+    it and, during a surge, the batch of runners to show together"""
+    global current_runner
     
     # Both modes use the same queue system for real-time data
-    with queue_lock:
-        if runner_queue:
-            current_runner = runner_queue[0]
-            return jsonify({
-                'runner': current_runner,
-                'queue_size': len(runner_queue),
-                'max_queue_size': MAX_QUEUE_SIZE,
-                'mode': current_mode
-            })
-        else:
-            return jsonify({
-                'runner': None,
-                'queue_size': 0,
-                'max_queue_size': MAX_QUEUE_SIZE,
-                'mode': current_mode
-            })
+    payload = current_runner_payload(display_queue, display_pacer)
+    if payload['runner'] is not None:
+        current_runner = payload['runner']
+    return jsonify(payload)
 
 @app.route('/api/runner-displayed', methods=['POST'])
 def mark_runner_displayed():
-    """Mark the current runner as displayed and remove from queue"""
+    """Mark the runners a display showed ({"bibs": [...]}, one or a whole batch
+    frame) as displayed and remove them from the queue. {"count": n} removes
+    the first n instead, for older displays."""
     global current_runner
     
-    with queue_lock:
-        if runner_queue:
-            # Remove the first runner from the queue (FIFO)
-            displayed_runner = runner_queue.pop(0)
-            print(f"Runner displayed and removed from queue: {displayed_runner['name']} (bib: {displayed_runner['bib']})")
-            print(f"Remaining queue size: {len(runner_queue)}")
-            
-            # Update current_runner to the next runner in queue (if any)
-            current_runner = runner_queue[0] if runner_queue else None
-            
-            # Debug: Print the next few runners in queue
-            if runner_queue:
-                print(f"Next runners in queue:")
-                for i, next_runner in enumerate(runner_queue[:3]):  # Show next 3 runners
-                    print(f"  {i+1}. {next_runner['name']} (bib: {next_runner['bib']})")
-            else:
-                print("Queue is now empty")
-            
-            return jsonify({
-                'success': True,
-                'displayed_runner': displayed_runner,
-                'next_runner': current_runner,
-                'queue_size': len(runner_queue)
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'No runners in queue'
-            })
+    try:
+        bibs, count = displayed_request(display_pacer)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'bibs must be a list and count a number'}), 400
+    
+    payload = runner_displayed_payload(display_queue, display_pacer, bibs, count)
+    if payload is None:
+        return jsonify({
+            'success': False,
+            'error': 'No runners in queue'
+        })
+    
+    # Update current_runner to the next runner in queue (if any)
+    current_runner = payload['next_runner']
+    return jsonify(payload)
+
+@app.route('/api/upcoming')
+def get_upcoming():
+    """Look-ahead for displays: the runners coming up next, to pre-bind and prefetch"""
+    return upcoming_response(display_queue)
 
 @app.route('/api/queue-status')
 def get_queue_status():
     """Get current queue status"""
-    with queue_lock:
-        return jsonify({
-            'queue_size': len(runner_queue),
-            'max_queue_size': MAX_QUEUE_SIZE,
-            'current_runner': current_runner,
-            'queue_contents': [
-                {
-                    'name': runner['name'],
-                    'bib': runner['bib'],
-                    'timestamp': runner['timestamp']
-                } for runner in runner_queue
-            ]
-        })
+    snapshot = display_queue.snapshot()
+    return jsonify({
+        'queue_size': len(snapshot),
+        'max_queue_size': MAX_QUEUE_SIZE,
+        'current_runner': current_runner,
+        'queue_contents': [
+            {
+                'name': runner['name'],
+                'bib': runner['bib'],
+                'timestamp': runner['timestamp'],
+                'location': runner.get('location')
+            } for runner in snapshot
+        ]
+    })
 
 @app.route('/api/queue-clear', methods=['POST'])
 def clear_queue():
     """Clear the runner queue"""
     global current_runner
     
-    with queue_lock:
-        cleared_count = len(runner_queue)
-        runner_queue.clear()
-        current_runner = None
-        
-        print(f"Queue cleared, removed {cleared_count} runners")
-        
-        return jsonify({
-            'success': True,
-            'cleared_count': cleared_count
-        })
+    cleared_count = display_queue.clear()
+    current_runner = None
+    display_channels.clear()
+    
+    print(f"Queue cleared, removed {cleared_count} runners")
+    
+    return jsonify({
+        'success': True,
+        'cleared_count': cleared_count
+    })
 
-@app.route('/stream')
-def stream():
+def event_stream(buffer):
+    """SSE response reading one event buffer from a new subscription"""
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+    replay = min(max(request.args.get('replay', 0, type=int), 0), EVENT_BUFFER_CONFIG.get('max_replay', 200))
+    subscription = buffer.subscribe(after=int(last_id) if last_id and last_id.isdigit() else None,
+                                    replay=replay)
+    
     def generate():
-        while True:
-            try:
-                # Try to get data from the queue, timeout after 1 second
-                data = data_queue.get(timeout=1)
-                yield f"data: {json.dumps(data)}\n\n"
-            except queue.Empty:
-                # Send keepalive message if no data
-                yield f"data: {json.dumps({'keepalive': True})}\n\n"
+        try:
+            while True:
+                events = buffer.read(subscription, timeout=1)
+                if not events:
+                    # Send keepalive message if no data
+                    yield f"data: {json.dumps({'keepalive': True})}\n\n"
+                    continue
+                with metrics.timer('sse_publish_seconds'):
+                    payload = ''.join(f"id: {seq}\ndata: {json.dumps(data)}\n\n" for seq, data in events)
+                metrics.inc('sse_events_total', len(events))
+                yield payload
+        finally:
+            buffer.unsubscribe(subscription)
     
     response = Response(generate(), mimetype='text/event-stream')
     response.headers['Cache-Control'] = 'no-cache'
@@ -1873,6 +2275,104 @@ def stream():
     response.headers['Access-Control-Allow-Origin'] = '*'
     return response
 
+@app.route('/stream')
+def stream():
+    """Server-sent events for every processed read. Each event carries its ring
+    sequence number as the SSE id, so a reconnecting EventSource resumes after the
+    last event it saw (Last-Event-ID); ?replay=N starts with the last N events."""
+    return event_stream(event_buffer)
+
+# ---------------------------------------------------------------------------
+# Display channels: /api/channels/<name>/... mirror the global display endpoints
+# for the runners that pass the channel's filter
+# ---------------------------------------------------------------------------
+
+def channel_or_404(name):
+    channel = display_channels.get(name)
+    if channel is None:
+        return None, (jsonify({'success': False, 'error': f'Unknown display channel: {name}'}), 404)
+    return channel, None
+
+@app.route('/api/channels')
+def list_channels():
+    """Display channels with their filters, queue and stream stats"""
+    return jsonify(display_channels.stats())
+
+@app.route('/api/channels/<name>', methods=['GET', 'PUT', 'DELETE'])
+def manage_channel(name):
+    """PUT {"filters": {"race_name": "Half Marathon", "location": ["finish"]}} creates a
+    channel or changes its filter (fields: race_name, reg_choice, location, wave, division)"""
+    if request.method == 'PUT':
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Expected a JSON object'}), 400
+        try:
+            channel = display_channels.define(name, data.get('filters', {}))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        queue_log.info("Display channel %s set to %s", name, channel.filters)
+        return jsonify({'success': True, 'channel': name, **channel.stats()})
+    if request.method == 'DELETE':
+        if not display_channels.delete(name):
+            return jsonify({'success': False, 'error': f'Unknown display channel: {name}'}), 404
+        queue_log.info("Display channel %s deleted", name)
+        return jsonify({'success': True})
+    channel, error = channel_or_404(name)
+    if error:
+        return error
+    return jsonify({'channel': name, **channel.stats()})
+
+@app.route('/api/channels/<name>/current-runner')
+def get_channel_current_runner(name):
+    channel, error = channel_or_404(name)
+    if error:
+        return error
+    payload = current_runner_payload(channel.queue, channel.pacer)
+    if payload['runner'] is not None:
+        channel.current_runner = payload['runner']
+    return jsonify(dict(payload, channel=name))
+
+@app.route('/api/channels/<name>/runner-displayed', methods=['POST'])
+def mark_channel_runner_displayed(name):
+    channel, error = channel_or_404(name)
+    if error:
+        return error
+    try:
+        bibs, count = displayed_request(channel.pacer)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'bibs must be a list and count a number'}), 400
+    payload = runner_displayed_payload(channel.queue, channel.pacer, bibs, count)
+    if payload is None:
+        return jsonify({'success': False, 'error': 'No runners in queue'})
+    channel.current_runner = payload['next_runner']
+    return jsonify(dict(payload, channel=name))
+
+@app.route('/api/channels/<name>/upcoming')
+def get_channel_upcoming(name):
+    channel, error = channel_or_404(name)
+    if error:
+        return error
+    return upcoming_response(channel.queue)
+
+@app.route('/api/channels/<name>/stream')
+def channel_stream(name):
+    """Server-sent events for the reads that pass one channel's filter"""
+    channel, error = channel_or_404(name)
+    if error:
+        return error
+    return event_stream(channel.events)
+
+# Brand style scraping for /api/fetch-styles: parallel stylesheet fetches, cached per URL
+style_scraper = StyleScraper(
+    deadline_seconds=STYLE_FETCH_CONFIG['deadline_seconds'],
+    page_timeout_seconds=STYLE_FETCH_CONFIG['page_timeout_seconds'],
+    workers=STYLE_FETCH_CONFIG['workers'],
+    max_stylesheets=STYLE_FETCH_CONFIG['max_stylesheets'],
+    cache_ttl_seconds=STYLE_FETCH_CONFIG['cache_ttl_seconds'],
+    cache_entries=STYLE_FETCH_CONFIG['cache_entries']
+)
+metrics.gauge('style_cache_hits', lambda: style_scraper.pages.hits, 'fetch-styles requests answered from cache')
+
 def is_valid_url(url):
     """Validate URL format and security"""
     try:
@@ -1882,104 +2382,18 @@ def is_valid_url(url):
         logger.error("Failed to parse URL '%s': %s", url, e)
         return False
 
-def extract_colors_from_css(css_text):
-    """Extract color values from CSS"""
-    colors = set()
-    rules = tinycss2.parse_stylesheet(css_text)
-    
-    # Common CSS color names and their hex values
-    css_colors = {
-        'black': '#000000', 'white': '#ffffff', 'red': '#ff0000',
-        'green': '#00ff00', 'blue': '#0000ff', 'yellow': '#ffff00',
-        'purple': '#800080', 'gray': '#808080', 'orange': '#ffa500'
-    }
-    
-    for rule in rules:
-        if rule.type == 'qualified-rule':
-            for token in rule.content:
-                if token.type == 'hash':
-                    # Handle hex colors
-                    colors.add(f'#{token.value}')
-                elif token.type == 'function' and token.name in ['rgb', 'rgba']:
-                    # Handle rgb/rgba colors
-                    colors.add(token.serialize())
-                elif token.type == 'ident' and token.value.lower() in css_colors:
-                    # Handle named colors
-                    colors.add(css_colors[token.value.lower()])
-    
-    return list(colors)
-
-def extract_fonts_from_css(css_text):
-    """Extract font families from CSS"""
-    fonts = set()
-    rules = tinycss2.parse_stylesheet(css_text)
-    
-    for rule in rules:
-        if rule.type == 'qualified-rule':
-            for token in rule.content:
-                if token.type == 'function' and token.name == 'font-family':
-                    fonts.add(token.serialize())
-    
-    return list(fonts)
-
 @app.route('/api/fetch-styles', methods=['POST'])
 def fetch_styles():
-    url = request.json.get('url')
+    """Colors and fonts used by a web page, most used first (cached per URL)"""
+    url = (request.get_json(silent=True) or {}).get('url')
     
     if not url or not is_valid_url(url):
         return jsonify({'error': 'Invalid URL'}), 400
     
     try:
-        # Fetch the webpage
-        headers = {'User-Agent': 'Mozilla/5.0 (compatible; RaceDisplay/1.0)'}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract styles
-        styles = {
-            'colors': set(),
-            'fonts': set(),
-            'backgrounds': set()
-        }
-        
-        # Process external stylesheets
-        for link in soup.find_all('link', rel='stylesheet'):
-            href = link.get('href')
-            if href:
-                css_url = urljoin(url, href)
-                try:
-                    css_response = requests.get(css_url, headers=headers, timeout=5)
-                    if css_response.ok:
-                        styles['colors'].update(extract_colors_from_css(css_response.text))
-                        styles['fonts'].update(extract_fonts_from_css(css_response.text))
-                except requests.RequestException as e:
-                    logger.warning("Failed to fetch CSS %s: %s", css_url, e)
-                    continue
-        
-        # Process inline styles
-        for style in soup.find_all('style'):
-            styles['colors'].update(extract_colors_from_css(style.string or ''))
-            styles['fonts'].update(extract_fonts_from_css(style.string or ''))
-        
-        # Extract main background
-        body = soup.find('body')
-        if body:
-            bg_color = body.get('style', '').split('background-color:')[-1].split(';')[0].strip()
-            if bg_color:
-                styles['backgrounds'].add(bg_color)
-        
-        # Convert sets to lists for JSON serialization
-        styles = {k: list(v) for k, v in styles.items()}
-        
-        # Add some metadata
-        styles['title'] = soup.title.string if soup.title else ''
-        styles['url'] = url
-        
-        return jsonify(styles)
-        
+        return jsonify(style_scraper.fetch(url))
     except Exception as e:
+        logger.warning("Failed to fetch styles from %s: %s", url, e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/messages', methods=['GET', 'POST'])
@@ -2047,11 +2461,11 @@ def upload_image():
     for f in files:
         logger.info("Processing file: %s", f.filename)
         fname = ''.join(c for c in f.filename if c.isalnum() or c in ('_', '-', '.'))
-        path = os.path.join(UPLOAD_DIR, fname)
         try:
-            f.save(path)
-            urls.append(f'/static/uploads/{fname}')
-            logger.info("Successfully saved file to: %s", path)
+            stored = upload_store.put(f, fname)
+            image_index.add(fname)
+            urls.append(upload_store.object_url(stored))
+            logger.info("Stored %s as object %s", fname, stored['digest'])
         except Exception as e:
             logger.error("Failed to save file: %s", str(e))
             return jsonify({'error': f'Failed to save file: {str(e)}'}), 500
@@ -2063,67 +2477,8 @@ def get_user_images():
     """Return list of user's uploaded images with metadata and thumbnails"""
     logger.info("Fetching user images")
     
-    # Create thumbnails directory if it doesn't exist
-    THUMBNAIL_DIR = os.path.join(UPLOAD_DIR, 'thumbnails')
-    os.makedirs(THUMBNAIL_DIR, exist_ok=True)
-    
-    images = []
-    image_extensions = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp')
-    
     try:
-        for filename in os.listdir(UPLOAD_DIR):
-            if not (filename.lower().endswith(image_extensions) and not filename.startswith('.')):
-                continue
-
-            file_path = os.path.join(UPLOAD_DIR, filename)
-            if os.path.isdir(file_path):
-                continue
-
-            try:
-                # Generate a clean display name
-                display_name = os.path.splitext(filename)[0].replace('_', ' ').replace('-', ' ')
-                display_name = ' '.join(word.capitalize() for word in display_name.split())
-
-                # Create thumbnail path
-                thumbnail_filename = f"thumb_{filename.rsplit('.', 1)[0]}.jpeg"
-                thumbnail_path = os.path.join(THUMBNAIL_DIR, thumbnail_filename)
-
-                # Generate thumbnail if it doesn't exist
-                if not os.path.exists(thumbnail_path):
-                    with Image.open(file_path) as img:
-                        if img.mode in ('RGBA', 'LA', 'P'):
-                            img = img.convert('RGB')
-                        img.thumbnail((80, 80), Image.Resampling.LANCZOS)
-                        img.save(thumbnail_path, 'JPEG', quality=85)
-                        logger.info(f"Generated thumbnail for {filename}")
-
-                # Get image dimensions
-                with Image.open(file_path) as img:
-                    width, height = img.size
-                    dimensions = {'width': width, 'height': height}
-
-                # Get file size
-                file_size = os.path.getsize(file_path)
-
-                image_data = {
-                    'id': f"image-{filename}",
-                    'filename': filename,
-                    'displayName': display_name,
-                    'url': f'/static/uploads/{filename}',
-                    'thumbnail': f'/static/uploads/thumbnails/{thumbnail_filename}',
-                    'dimensions': dimensions,
-                    'fileSize': file_size,
-                    'uploadDate': datetime.fromtimestamp(os.path.getctime(file_path)).isoformat()
-                }
-                images.append(image_data)
-
-            except Exception as e:
-                logger.error(f"Skipping problematic image {filename}: {e}")
-                continue # Skip this image and move to the next one
-        
-        # Sort images by upload date (newest first)
-        images.sort(key=lambda x: x['uploadDate'], reverse=True)
-        
+        images = image_index.list_images(force=request.args.get('refresh') == '1')
         logger.info(f"Found {len(images)} user images")
         return jsonify({'images': images})
         
@@ -2131,6 +2486,72 @@ def get_user_images():
         logger.error(f"Error fetching user images: {e}")
         return jsonify({'error': f'Failed to fetch images: {str(e)}'}), 500
 
+@app.route('/static/uploads/<path:filename>')
+def serve_upload(filename):
+    """Serve uploads. Content-addressed objects and variants are cached forever;
+    display names revalidate against the content hash ETag. Images are swapped
+    for a smaller AVIF/WebP display variant when the browser accepts one
+    (?w=&h= pick a size, ?original=1 skips it)."""
+    parts = filename.split('/')
+    directory, name, key, etag = UPLOAD_DIR, filename, None, None
+    immutable = (len(parts) == 2 and parts[0] == 'objects') or (len(parts) == 3 and parts[0] == 'variants')
+    
+    if immutable and parts[0] == 'objects':
+        directory, name = OBJECT_DIR, parts[1]
+        key = etag = os.path.splitext(parts[1])[0]
+    elif immutable:
+        # variants/<key>/<file>: already a display variant, served as-is
+        directory, name = os.path.join(VARIANT_DIR, parts[1]), parts[2]
+        etag = f'{parts[1]}-{parts[2]}'
+    elif len(parts) == 1:
+        stored = upload_store.resolve(filename)
+        etag = stored['digest'] if stored else None
+        key = etag or image_index.key_for(filename)
+    
+    variant = None
+    if key and image_pipeline and request.args.get('original') != '1':
+        try:
+            image_index.refresh()
+            formats = [fmt for fmt in image_pipeline.formats
+                       if request.accept_mimetypes[FORMAT_MIMETYPES[fmt]] > 0]
+            variant = image_index.best_variant(
+                key, formats,
+                width=request.args.get('w', type=int),
+                height=request.args.get('h', type=int)
+            )
+        except OSError:
+            variant = None
+    
+    mimetype = None
+    if variant:
+        directory, name = os.path.join(VARIANT_DIR, key), variant['file']
+        mimetype = FORMAT_MIMETYPES[variant['format']]
+        etag = f"{key}-{variant['file']}"
+    
+    response = send_from_directory(
+        directory, name,
+        mimetype=mimetype,
+        etag=etag or True,
+        max_age=IMMUTABLE_MAX_AGE if immutable else None
+    )
+    if immutable:
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    if key and image_pipeline:
+        response.headers['Vary'] = 'Accept'
+    return response
+
+@app.route('/api/image-pipeline')
+def get_image_pipeline_status():
+    """Get upload processing and image index stats"""
+    return jsonify({
+        'enabled': image_pipeline is not None,
+        'pipeline': image_pipeline.stats() if image_pipeline else None,
+        'index': image_index.stats(),
+        'store': upload_store.stats()
+    })
+
 @app.route('/api/templates', methods=['GET', 'POST'])
 def manage_templates():
     """Save a template or list available templates"""
@@ -2159,105 +2580,201 @@ def manage_templates():
                 'version': '2.0'  # Mark as new format
             }
             
-            safe = ''.join(c for c in name if c.isalnum() or c in ('_', '-')).rstrip()
-            template_path = os.path.join(TEMPLATE_DIR, f'{safe}.json')
-            old_html_path = os.path.join(TEMPLATE_DIR, f'{safe}.html')
-            
-            # Save the new JSON format
-            with open(template_path, 'w', encoding='utf-8') as fp:
-                json.dump(template_data, fp, indent=2)
-            
-            # Remove old HTML file if it exists to prevent duplicates
-            if os.path.exists(old_html_path):
-                try:
-                    os.remove(old_html_path)
+            # Save the new JSON format, removing any old HTML file to prevent duplicates
+            try:
+                revision, removed_html = template_repo.save(name, template_data)
+                if removed_html:
                     logger.info(f"Removed old HTML template {name} after saving new JSON format")
-                except Exception as e:
-                    logger.warning(f"Failed to remove old HTML template {name}: {str(e)}")
+            except TemplateError as e:
+                return jsonify({'error': str(e)}), 400
+            except OSError as e:
+                logger.error(f"Failed to save template {name}: {str(e)}")
+                return jsonify({'error': 'Failed to save template'}), 500
             
-            return jsonify({'success': True})
+            return jsonify({'success': True, 'revision': revision})
         
         # Handle legacy format (single html)
         html = data.get('html')
         if not name or not html:
             return jsonify({'error': 'Missing name or html'}), 400
         
-        safe = ''.join(c for c in name if c.isalnum() or c in ('_', '-')).rstrip()
-        with open(os.path.join(TEMPLATE_DIR, f'{safe}.html'), 'w', encoding='utf-8') as fp:
-            fp.write(html)
+        try:
+            template_repo.save_html(name, html)
+        except TemplateError as e:
+            return jsonify({'error': str(e)}), 400
         return jsonify({'success': True})
 
-    # GET method - list templates
-    templates = []
-    template_names = set()  # Track unique template names
-    
-    for f in os.listdir(TEMPLATE_DIR):
-        if f.endswith('.html') or f.endswith('.json'):
-            template_name = f[:-5] if f.endswith('.html') else f[:-5]
-            
-            # If we haven't seen this template name yet, add it
-            if template_name not in template_names:
-                template_names.add(template_name)
-                templates.append(template_name)
-    
-    return jsonify(templates)
+    # GET method - list templates (?details=1 adds canvas size, version and update time)
+    if request.args.get('details') == '1':
+        return jsonify(template_repo.index())
+    return jsonify(template_repo.names())
 
 
 @app.route('/api/templates/<name>', methods=['GET', 'DELETE'])
 def get_template(name):
     """Retrieve or delete a saved template"""
-    safe = ''.join(c for c in name if c.isalnum() or c in ('_', '-')).rstrip()
-    
-    # Try new format first (.json)
-    json_path = os.path.join(TEMPLATE_DIR, f'{safe}.json')
-    html_path = os.path.join(TEMPLATE_DIR, f'{safe}.html')
-    
     if request.method == 'DELETE':
-        # Delete both formats if they exist
-        deleted = False
-        if os.path.exists(json_path):
-            try:
-                os.remove(json_path)
-                deleted = True
-            except Exception as e:
-                logger.error(f"Failed to delete template {name}: {str(e)}")
-                return jsonify({'error': 'Failed to delete template'}), 500
-        
-        if os.path.exists(html_path):
-            try:
-                os.remove(html_path)
-                deleted = True
-            except Exception as e:
-                logger.error(f"Failed to delete template {name}: {str(e)}")
-                return jsonify({'error': 'Failed to delete template'}), 500
+        try:
+            deleted = template_repo.delete(name)
+        except Exception as e:
+            logger.error(f"Failed to delete template {name}: {str(e)}")
+            return jsonify({'error': 'Failed to delete template'}), 500
         
         if not deleted:
             return jsonify({'error': 'Template not found'}), 404
         
         return jsonify({'success': True})
     
-    # GET method
-    if os.path.exists(json_path):
-        # New format
-        try:
-            with open(json_path, 'r', encoding='utf-8') as fp:
-                template_data = json.load(fp)
-            return jsonify(template_data)
-        except Exception as e:
-            logger.error(f"Failed to load template {name}: {str(e)}")
-            return jsonify({'error': 'Failed to load template'}), 500
+    # GET method - served from the in-memory cache, 304 if the display already has it
+    try:
+        cached = template_repo.get(name)
+    except Exception as e:
+        logger.error(f"Failed to load template {name}: {str(e)}")
+        return jsonify({'error': 'Failed to load template'}), 500
+    
+    if cached is None:
+        return jsonify({'error': 'Template not found'}), 404
+    
+    response = Response(cached.body, mimetype='application/json')
+    response.set_etag(cached.etag)
+    response.cache_control.no_cache = True
+    if cached.revision:
+        response.headers['X-Template-Revision'] = cached.revision
+    return response.make_conditional(request)
+
+@app.route('/api/templates/<name>', methods=['PATCH'])
+def patch_template(name):
+    """Save only what changed: a JSON merge patch of the template.
+    
+    Body: {"base": <revision the editor loaded>, "changes": {"activeState": {...}, ...}}.
+    Null removes a key, and a string field can be sent as {"$splice": [[offset, delete, text]]}.
+    Returns 409 with the current revision if base is stale.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        result = template_repo.patch(name, data.get('changes'), base=data.get('base'),
+                                     patch_bytes=request.content_length or 0)
+    except RevisionConflict as e:
+        return jsonify({'error': str(e), 'revision': e.current}), 409
+    except (PatchError, TemplateError) as e:
+        return jsonify({'error': str(e)}), 400
+    except OSError as e:
+        logger.error(f"Failed to patch template {name}: {str(e)}")
+        return jsonify({'error': 'Failed to save template'}), 500
+    except ValueError as e:
+        # The stored template itself is unreadable (corrupt JSON)
+        logger.error(f"Failed to load template {name} for patching: {str(e)}")
+        return jsonify({'error': 'Stored template is not valid JSON; save it in full or roll it back'}), 500
+    
+    if result is None:
+        return jsonify({'error': 'Template not found'}), 404
+    
+    return jsonify({'success': True, 'revision': result[0]})
+
+@app.route('/api/templates/<name>/revisions')
+def list_template_revisions(name):
+    """Kept versions of a template, newest first"""
+    return jsonify(template_repo.revisions(name))
+
+@app.route('/api/templates/<name>/revisions/<revision>')
+def get_template_revision(name, revision):
+    """A template as it was at one revision"""
+    data = template_repo.get_revision(name, revision)
+    if data is None:
+        return jsonify({'error': 'Revision not found'}), 404
+    return jsonify(data)
+
+@app.route('/api/templates/<name>/rollback', methods=['POST'])
+def rollback_template(name):
+    """Make an earlier revision current again (works for deleted templates too)"""
+    data = request.get_json(silent=True) or {}
+    revision = data.get('revision')
+    if not revision:
+        return jsonify({'error': 'Missing revision'}), 400
     
-    elif os.path.exists(html_path):
-        # Legacy format
-        try:
-            with open(html_path, 'r', encoding='utf-8') as fp:
-                html = fp.read()
-            return jsonify({'html': html})
-        except Exception as e:
-            logger.error(f"Failed to load template {name}: {str(e)}")
-            return jsonify({'error': 'Failed to load template'}), 500
+    try:
+        restored = template_repo.rollback(name, revision)
+    except TemplateError as e:
+        return jsonify({'error': str(e)}), 400
+    except OSError as e:
+        logger.error(f"Failed to roll back template {name}: {str(e)}")
+        return jsonify({'error': 'Failed to roll back template'}), 500
+    
+    if restored is None:
+        return jsonify({'error': 'Revision not found'}), 404
+    
+    logger.info(f"Rolled back template {name} to revision {restored}")
+    return jsonify({'success': True, 'revision': restored})
+
+@app.route('/api/templates/<name>/compiled')
+def get_compiled_template(name):
+    """Render plan for a template: minified CSS plus static segments around placeholder slots"""
+    try:
+        cached = template_repo.get(name)
+        body = cached.plan_body() if cached else None
+    except Exception as e:
+        logger.error(f"Failed to compile template {name}: {str(e)}")
+        return jsonify({'error': 'Failed to compile template'}), 500
+    
+    if cached is None:
+        return jsonify({'error': 'Template not found'}), 404
+    
+    response = Response(body, mimetype='application/json')
+    response.set_etag(f'{cached.etag}-plan')
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/templates/<name>/assets')
+def get_template_assets(name):
+    """Asset manifest: URLs the template always loads, and the runner fields bound into image srcs"""
+    cached = template_repo.get(name)
+    if cached is None:
+        return jsonify({'error': 'Template not found'}), 404
+    response = jsonify(dict(cached.plan()['assets'], template=name))
+    response.set_etag(f'{cached.etag}-assets')
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/templates/<name>/render', methods=['POST'])
+@metrics.timed('template_render_seconds', 'Server-side placeholder binding time per render')
+def render_template_state(name):
+    """Bind a runner into a compiled template and return the finished HTML and CSS.
+    
+    Body (all optional): runner (defaults to the runner at the head of the queue),
+    state ('active'/'resting', chosen from whether there is a runner) and message_index.
+    """
+    data = request.get_json(silent=True) or {}
+    cached = template_repo.get(name)
+    if cached is None:
+        return jsonify({'error': 'Template not found'}), 404
+    
+    if 'runner' in data:
+        runner = data['runner']
+    else:
+        runner = display_queue.head()
+    if runner is not None and not isinstance(runner, dict):
+        return jsonify({'error': 'runner must be an object'}), 400
+    
+    states = cached.plan()['states']
+    state = data.get('state') or ('active' if runner else 'resting')
+    if state not in states:
+        state = 'default' if 'default' in states else None
+    if state is None:
+        return jsonify({'error': f"Template has no {data.get('state') or 'matching'} state"}), 400
     
-    return jsonify({'error': 'Template not found'}), 404
+    try:
+        message_index = int(data.get('message_index', 0))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'message_index must be an integer'}), 400
+    
+    plan = states[state]
+    return jsonify({
+        'state': state,
+        'html': bind_template(plan, runner, message_index),
+        'css': plan['css'],
+        'canvasWidth': plan['canvasWidth'],
+        'canvasHeight': plan['canvasHeight']
+    })
 
 @app.route('/api/templates/cleanup', methods=['POST'])
 def cleanup_templates():
@@ -2314,6 +2831,10 @@ def manage_display_settings():
     if request.method == 'POST':
         try:
             data = request.get_json()
+            if 'adaptive' in data:
+                display_pacer.enabled = bool(data['adaptive'])
+                if 'duration' not in data:
+                    return jsonify({'success': True, 'adaptive': display_pacer.enabled})
             if 'duration' in data:
                 
                 duration = int(data['duration'])
@@ -2327,26 +2848,120 @@ def manage_display_settings():
     
     # GET method
     return jsonify({
-        'duration': DISPLAY_DURATION // 1000  # Convert to seconds
+        'duration': DISPLAY_DURATION // 1000,  # Convert to seconds
+        'pacing': display_pacer.stats()
     })
 
 @app.route('/api/queue-debug')
 def get_queue_debug():
     """Debug endpoint to get detailed queue information"""
-    with queue_lock:
-        return jsonify({
-            'queue_size': len(runner_queue),
-            'max_queue_size': MAX_QUEUE_SIZE,
-            'current_runner': current_runner,
-            'queue_contents': [
-                {
-                    'name': runner['name'],
-                    'bib': runner['bib'],
-                    'timestamp': runner['timestamp']
-                } for runner in runner_queue
-            ],
-            'all_bibs': [runner['bib'] for runner in runner_queue]
-        })
+    snapshot = display_queue.snapshot()
+    return jsonify({
+        'queue_size': len(snapshot),
+        'max_queue_size': MAX_QUEUE_SIZE,
+        'current_runner': current_runner,
+        'queue_contents': [
+            {
+                'name': runner['name'],
+                'bib': runner['bib'],
+                'timestamp': runner['timestamp']
+            } for runner in snapshot
+        ],
+        'all_bibs': [runner['bib'] for runner in snapshot],
+        'queue_stats': display_queue.stats(),
+        'pacing': display_pacer.stats(),
+        'participants': {'roster': roster_store.stats(), 'results': results_store.stats()},
+        'events': event_buffer.stats(),
+        'deployment': {
+            'role': ROLE,
+            'state_bus': (state_bus or state_bus_client).stats() if (state_bus or state_bus_client) else None
+        }
+    })
+
+@app.route('/api/dedupe', methods=['GET', 'POST'])
+def manage_dedupe():
+    """Get duplicate read filter stats or update its settings"""
+    if request.method == 'POST':
+        try:
+            data = request.get_json() or {}
+            window_seconds = data.get('window_seconds')
+            if window_seconds is not None and float(window_seconds) < 0:
+                return jsonify({'error': 'window_seconds must be 0 or greater'}), 400
+            read_dedupe.configure(window_seconds=window_seconds, enabled=data.get('enabled'))
+            if data.get('reset'):
+                read_dedupe.reset()
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+    
+    return jsonify(read_dedupe.stats())
+
+@app.route('/api/metrics')
+def get_metrics():
+    """Expose hot-path timers and counters in Prometheus text format (or JSON with ?format=json)"""
+    if request.args.get('format') == 'json':
+        return jsonify(metrics.snapshot())
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/logging', methods=['GET', 'POST'])
+def manage_logging():
+    """Get logging pipeline stats or change subsystem levels, sampling and verbose mode"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        try:
+            log_pipeline.configure(
+                levels=data.get('levels'),
+                sample_every=data.get('sample_every'),
+                verbose=data.get('verbose')
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+    
+    return jsonify(log_pipeline.stats())
+
+@app.route('/api/journal')
+def get_journal_status():
+    """Get raw read journal status and the last replay's progress"""
+    return jsonify({
+        'enabled': read_journal is not None,
+        'journal': read_journal.stats() if read_journal else None,
+        'replay': journal_replay_status
+    })
+
+@app.route('/api/journal/replay', methods=['POST'])
+def start_journal_replay():
+    """Replay journaled reads (optionally a time range or single source) in the background"""
+    data = request.get_json(silent=True) or {}
+    try:
+        since = float(data['since']) if data.get('since') is not None else None
+        until = float(data['until']) if data.get('until') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'since/until must be epoch seconds'}), 400
+    
+    with journal_replay_lock:
+        if journal_replay_status['running']:
+            return jsonify({'success': False, 'error': 'A replay is already running'}), 409
+        journal_replay_status['running'] = True
+    
+    replay_thread = threading.Thread(
+        target=replay_journal,
+        kwargs={'since': since, 'until': until, 'source': data.get('source')},
+        daemon=True
+    )
+    replay_thread.start()
+    
+    return jsonify({'success': True, 'status': 'Replay started'})
+
+@app.route('/api/sequence-status', methods=['GET', 'POST'])
+def get_sequence_status():
+    """Get decoder sequence tracking state, or reset it after decoders restart"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        if data.get('reset'):
+            sequence_tracker.reset()
+    
+    status = sequence_tracker.stats()
+    status['enabled'] = PROTOCOL_CONFIG.get('SEQUENCE_TRACKING', True)
+    return jsonify(status)
 
 # Add new endpoint for mode selection
 @app.route('/api/select-mode', methods=['POST'])
@@ -2388,7 +3003,7 @@ def select_mode():
             # Fetch roster data
             if fetch_complete_roster(current_event_id, credentials):
                 # Successful roster download
-                roster_loaded = len(roster_data)
+                roster_loaded = len(roster_store)
                 status_message = 'Ready to receive timing data'
             else:
                 # Failed roster download - use auto-creation mode
@@ -2443,7 +3058,7 @@ def select_mode():
                     'mode': 'results',
                     'status': 'Results data loaded - Ready for timing data with optimized auto-refresh',
                     'race_name': race_name,
-                    'results_loaded': len(results_data),
+                    'results_loaded': len(results_store),
                     'middleware_connected': True,
                     'display_active': True,
                     'background_refresh': True,
@@ -2467,13 +3082,13 @@ def select_mode():
 @app.route('/api/mode-status')
 def get_mode_status():
     """Get current mode and data status"""
-    global current_mode, roster_data, results_data, race_name, results_refresh_active
+    global current_mode, race_name, results_refresh_active
     
     if current_mode == 'pre-race':
         return jsonify({
             'mode': 'pre-race',
             'race_name': race_name,
-            'data_count': len(roster_data),
+            'data_count': len(roster_store),
             'data_type': 'roster',
             'background_refresh': False
         })
@@ -2481,7 +3096,7 @@ def get_mode_status():
         return jsonify({
             'mode': 'results',
             'race_name': race_name,
-            'data_count': len(results_data),
+            'data_count': len(results_store),
             'data_type': 'results',
             'background_refresh': results_refresh_active,
             'refresh_interval': 60
@@ -2560,7 +3175,7 @@ def manage_background_refresh():
 @app.route('/api/start-test-listener', methods=['POST'])
 def start_test_listener():
     """Start TCP listener for testing without requiring ChronoTrack login"""
-    global current_mode, race_name, roster_data
+    global current_mode, race_name
     
     try:
         # Set test mode
@@ -2569,8 +3184,9 @@ def start_test_listener():
         
         # Add some test roster data so we can test timing data processing
         test_bibs = ['1234', '5678', '9999', '1111', '2222']
+        test_roster = {}
         for bib in test_bibs:
-            roster_data[bib] = {
+            test_roster[bib] = {
                 'name': f'Test Runner {bib}',
                 'first_name': f'Test{bib}',
                 'last_name': f'Runner{bib}',
@@ -2589,6 +3205,7 @@ def start_test_listener():
                 'entry_id': bib,
                 'athlete_id': bib
             }
+        roster_store.update(test_roster)
         
         # Start the TCP listener
         if start_listeners():
@@ -2597,7 +3214,7 @@ def start_test_listener():
                 'mode': 'test',
                 'status': 'Test TCP listener started',
                 'race_name': race_name,
-                'test_runners': len(roster_data),
+                'test_runners': len(roster_store),
                 'tcp_port': PROTOCOL_CONFIG['PORT'],
                 'message': 'Send CT01_33 format timing data to test'
             })
@@ -2859,7 +3476,7 @@ def fetch_events():
 @app.route('/api/select-event', methods=['POST'])
 def select_event():
     """Select one or multiple events and load participant data with race_id fix"""
-    global current_event_id, race_name, roster_data, current_provider, provider_credentials, last_roster_sync
+    global current_event_id, race_name, current_provider, provider_credentials, last_roster_sync
     
     try:
         data = request.get_json()
@@ -2913,8 +3530,8 @@ def select_event():
                     'error': 'Missing RunSignUp API credentials'
                 })
             
-            # Clear existing roster data and populate with RunSignUp data
-            roster_data = {}
+            # Build the new roster privately; lookups use the old one until it is published
+            roster = {}
             total_participants = 0
             total_processed = 0
             total_errors = 0
@@ -2962,9 +3579,9 @@ def select_event():
                         
                         if lookup_key:
                             # Check if participant already exists (in case of overlap between events)
-                            if lookup_key in roster_data:
+                            if lookup_key in roster:
                                 # Add event info to existing participant
-                                existing_participant = roster_data[lookup_key]
+                                existing_participant = roster[lookup_key]
                                 if 'events' not in existing_participant:
                                     existing_participant['events'] = [existing_participant.get('event_name', 'Unknown')]
                                 existing_participant['events'].append(event_name)
@@ -2992,7 +3609,7 @@ def select_event():
                                     'events': [event_name] if len(events_to_process) > 1 else None  # Track multiple events
                                 }
                                 
-                                roster_data[lookup_key] = participant_data
+                                roster[lookup_key] = participant_data
                             
                             processed_count += 1
                         
@@ -3005,10 +3622,12 @@ def select_event():
                 total_errors += normalization_errors
                 print(f"✅ Event {event_name}: {processed_count} processed, {normalization_errors} errors")
             
+            roster_store.replace(roster)
+            
             print(f"\n🎉 Total Summary:")
             print(f"   • Events processed: {len(events_to_process)}")
             print(f"   • Total participants fetched: {total_participants}")
-            print(f"   • Unique participants in roster: {len(roster_data)}")
+            print(f"   • Unique participants in roster: {len(roster)}")
             print(f"   • Successfully processed: {total_processed}")
             print(f"   • Errors: {total_errors}")
             
@@ -3030,8 +3649,8 @@ def select_event():
                 'selected_events': selected_events if len(selected_events) > 1 else None,
                 'events_processed': len(events_to_process),
                 'total_participants_fetched': total_participants,
-                'unique_participants_loaded': len(roster_data),
-                'participants_loaded': len(roster_data),  # Keep for backward compatibility
+                'unique_participants_loaded': len(roster),
+                'participants_loaded': len(roster),  # Keep for backward compatibility
                 'race_name': race_name,
                 'processed_count': total_processed,
                 'errors': total_errors,
@@ -3082,14 +3701,14 @@ def select_event():
 @app.route('/api/refresh/status')
 def get_refresh_status():
     """Get current background refresh status"""
-    global current_provider, refresh_active, last_roster_sync, roster_data, race_name
+    global current_provider, refresh_active, last_roster_sync, race_name
     return jsonify({
         'enabled': REFRESH_CONFIG['enabled'],
         'active': refresh_active,
         'provider': current_provider,
         'interval_seconds': REFRESH_CONFIG['interval_seconds'],
         'last_sync': last_roster_sync,
-        'participants_count': len(roster_data),
+        'participants_count': len(roster_store),
         'race_name': race_name
     })
 
@@ -3124,7 +3743,7 @@ def stop_refresh_endpoint():
 @app.route('/api/refresh/trigger', methods=['POST'])
 def trigger_manual_refresh():
     """Trigger a manual roster refresh"""
-    global current_provider, current_event_id, provider_credentials, last_roster_sync, roster_data, race_name
+    global current_provider, current_event_id, provider_credentials, last_roster_sync, race_name
     try:
         if current_provider != 'runsignup':
             return jsonify({
@@ -3156,7 +3775,7 @@ def trigger_manual_refresh():
         
         updates_count = 0
         if participants:
-            with roster_refresh_lock:
+            with roster_store.batch() as roster:
                 for participant in participants:
                     try:
                         bib = participant.get('bib_num') or str(participant.get('registration_id', ''))
@@ -3165,7 +3784,7 @@ def trigger_manual_refresh():
                             user_data = participant.get('user', {})
                             address = user_data.get('address', {})
                             
-                            roster_data[bib] = {
+                            roster[bib] = {
                                 'name': f"{user_data.get('first_name', '')} {user_data.get('last_name', '')}".strip(),
                                 'first_name': user_data.get('first_name', ''),
                                 'last_name': user_data.get('last_name', ''),
@@ -3191,7 +3810,7 @@ def trigger_manual_refresh():
         return jsonify({
             'success': True,
             'updates_count': updates_count,
-            'total_participants': len(roster_data),
+            'total_participants': len(roster_store),
             'last_sync': last_roster_sync
         })
         
@@ -3245,42 +3864,85 @@ def manage_refresh_config():
 @app.route('/api/tcp-status')
 def get_tcp_status():
     """Get TCP listener status and health information"""
+    port_listening = decoder_registry.listening
+    tcp = listener_supervisor.stats()['tcp']
+    return jsonify({
+        'success': True,
+        'tcp_listener': {
+            'host': tcp['config']['host'],
+            'port': tcp['config']['port'],
+            'listening': port_listening,
+            'state': tcp['state'],
+            'restarts': tcp['restarts'],
+            'last_error': tcp['last_error'],
+            'decoders_connected': len(decoder_registry),
+            'heartbeat_interval': decoder_registry.heartbeat_interval,
+            'heartbeat_timeout': decoder_registry.heartbeat_timeout
+        },
+        'listeners_started': tcp['wanted'],
+        'ingest': ingest_pipeline.stats(),
+        'current_mode': current_mode,
+        'queue_size': len(display_queue),
+        'status': 'active' if port_listening else 'inactive'
+    })
+
+@app.route('/api/decoders')
+def get_decoders():
+    """Connected decoders: peer, greeting, locations, reads/sec, last read, clock lag, bytes"""
+    return jsonify(decoder_registry.stats())
+
+@app.route('/api/ingest-sources')
+def get_ingest_sources():
+    """UDP and log-file read sources and their counters"""
+    sources = {}
+    for name in ('udp', 'file_tail'):
+        source = listener_supervisor.instance(name)
+        if source is not None:
+            sources[name] = source.stats()
+    return jsonify(sources)
+
+@app.route('/api/listeners')
+def get_listeners():
+    """Supervised ingest listeners: state, config, restarts and last error"""
+    return jsonify(listener_supervisor.stats())
+
+@app.route('/api/listeners/<name>/<action>', methods=['POST'])
+def control_listener(name, action):
+    """Start, stop or rebind one listener without touching the others.
+
+    rebind takes the config keys to change, e.g. {"host": "0.0.0.0", "port": 61620};
+    the new socket is listening before the old one closes. stop leaves
+    connected decoders connected unless {"drop_connections": true}.
+    """
+    if name not in listener_supervisor.names():
+        return jsonify({'success': False, 'error': f'Unknown listener: {name}'}), 404
+    data = request.get_json(silent=True) or {}
     try:
-        # Check if port is listening
-        import socket
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(1)
-        result = sock.connect_ex((PROTOCOL_CONFIG['HOST'], PROTOCOL_CONFIG['PORT']))
-        sock.close()
-        
-        port_listening = result == 0
-        
-        return jsonify({
-            'success': True,
-            'tcp_listener': {
-                'host': PROTOCOL_CONFIG['HOST'],
-                'port': PROTOCOL_CONFIG['PORT'],
-                'listening': port_listening,
-                'timeout': PROTOCOL_CONFIG.get('TIMEOUT', 30)
-            },
-            'listeners_started': listeners_started,
-            'current_mode': current_mode,
-            'queue_size': len(runner_queue) if 'runner_queue' in globals() else 0,
-            'status': 'active' if port_listening else 'inactive'
-        })
-        
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e),
-            'tcp_listener': {
-                'host': PROTOCOL_CONFIG['HOST'],
-                'port': PROTOCOL_CONFIG['PORT'],
-                'listening': False,
-                'timeout': PROTOCOL_CONFIG.get('TIMEOUT', 30)
-            },
-            'status': 'error'
-        })
+        if action == 'start':
+            started = listener_supervisor.start(name)
+        elif action == 'stop':
+            listener_supervisor.stop(name)
+            started = False
+            if name == 'tcp' and data.get('drop_connections'):
+                for connection in decoder_registry.connections():
+                    connection.close('listener stopped')
+        elif action == 'rebind':
+            changes = {key: value for key, value in data.items() if key != 'enabled'}
+            if not changes:
+                return jsonify({'success': False, 'error': 'No config changes given'}), 400
+            if 'port' in changes:
+                changes['port'] = int(changes['port'])
+            started = listener_supervisor.rebind(name, **changes)
+            if name == 'tcp':
+                config = listener_supervisor.config('tcp')
+                PROTOCOL_CONFIG['HOST'], PROTOCOL_CONFIG['PORT'] = config['host'], config['port']
+        else:
+            return jsonify({'success': False, 'error': f'Unknown action: {action}'}), 404
+    except (OSError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e),
+                        'listener': listener_supervisor.stats()[name]}), 409
+    ingest_log.info("Listener %s: %s requested via API", name, action)
+    return jsonify({'success': True, 'started': started, 'listener': listener_supervisor.stats()[name]})
 
 # ---------------------------------------------------------------------------
 # React Frontend Routes - These must come AFTER all API routes
@@ -3310,6 +3972,50 @@ def serve_react(path):
     # Otherwise, serve index.html for client-side routing
     return send_from_directory(dist_dir, 'index.html')
 
+# Worker role: display reads are answered from the mirrored state and the shared
+# template files; everything else (logins, queue changes, uploads, settings) is
+# forwarded to the ingest process, which owns that state.
+WORKER_LOCAL_ENDPOINTS = {
+    'get_current_runner', 'get_upcoming', 'get_queue_status', 'get_queue_debug', 'stream',
+    'get_compiled_template', 'get_template_assets', 'render_template_state',
+    'static', 'old_index', 'serve_react_index', 'serve_react'
+}
+WORKER_LOCAL_READS = {'manage_templates', 'get_template', 'list_template_revisions', 'get_template_revision'}
+HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+                      'te', 'trailer', 'transfer-encoding', 'upgrade', 'host'}
+ingest_session = requests.Session()
+
+def forward_to_ingest():
+    """Relay the current request to the ingest process and stream back its response"""
+    url = f"http://{DEPLOYMENT_CONFIG['control_host']}:{DEPLOYMENT_CONFIG['control_port']}{request.path}"
+    try:
+        upstream = ingest_session.request(
+            request.method, url,
+            params=request.query_string,
+            headers={k: v for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS},
+            data=request.get_data(),
+            stream=True,
+            allow_redirects=False,
+            timeout=DEPLOYMENT_CONFIG.get('forward_timeout_seconds', 60)
+        )
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Ingest process unavailable for {request.method} {request.path}: {e}")
+        return jsonify({'error': 'Ingest process unavailable'}), 503
+    headers = [(k, v) for k, v in upstream.raw.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS]
+    response = Response(upstream.raw.stream(64 * 1024, decode_content=False),
+                        status=upstream.status_code, headers=headers)
+    response.call_on_close(upstream.close)
+    return response
+
+if ROLE == 'worker':
+    @app.before_request
+    def route_worker_request():
+        if request.endpoint in WORKER_LOCAL_ENDPOINTS:
+            return None
+        if request.endpoint in WORKER_LOCAL_READS and request.method in ('GET', 'HEAD'):
+            return None
+        return forward_to_ingest()
+
 if __name__ == '__main__':
     import atexit
     
@@ -3319,14 +4025,24 @@ if __name__ == '__main__':
         print("🧹 Cleaning up background threads...")
         stop_results_refresh()
         stop_background_refresh()
+        listener_supervisor.stop_all()
+        if read_journal:
+            read_journal.close()
+        if image_pipeline:
+            image_pipeline.shutdown()
         
     atexit.register(cleanup)
     
+    # The ingest process serves the API on the control port; gunicorn workers face the displays
+    host, port = SERVER_CONFIG['HOST'], SERVER_CONFIG['PORT']
+    if ROLE == 'ingest':
+        host, port = DEPLOYMENT_CONFIG['control_host'], DEPLOYMENT_CONFIG['control_port']
+    
     try:
         app.run(
             debug=SERVER_CONFIG['DEBUG'],
-            host=SERVER_CONFIG['HOST'],
-            port=SERVER_CONFIG['PORT'],
+            host=host,
+            port=port,
             use_reloader=False,
             threaded=True
         )
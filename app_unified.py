@@ -3,7 +3,6 @@ from flask_cors import CORS
 import os
 import socketserver
 import threading
-import queue
 import json
 import time
 import random
@@ -18,7 +17,9 @@ from config import (
     API_CONFIG,
     PROTOCOL_CONFIG,
     SERVER_CONFIG,
-    TIMING_CONFIG
+    TIMING_CONFIG,
+    STYLE_FETCH_CONFIG,
+    EVENT_BUFFER_CONFIG
 )
 
 # Add missing database config (disabled by default)
@@ -31,11 +32,15 @@ RAW_TAG_DATABASE_CONFIG = {
 }
 import psycopg2
 import psycopg2.extras
-from bs4 import BeautifulSoup
-import tinycss2
-from urllib.parse import urljoin, urlparse
+from metrics import MetricsRegistry
+from style_scraper import StyleScraper
+from event_buffer import EventBuffer
+from urllib.parse import urlparse
 import logging
 
+# Hot-path timers and counters, exposed at /api/metrics
+metrics = MetricsRegistry('racedisplay')
+
 
 # Timing Database Class
 class TimingDatabase:
@@ -132,6 +137,7 @@ class TimingDatabase:
             print(f"❌ Error getting/creating location: {e}")
             return None
     
+    @metrics.timed('store_timing_read_seconds', 'Postgres insert latency per timing read')
     def store_timing_read(self, parsed_data):
         """Store timing read in database"""
         if not self.current_session_id:
@@ -235,7 +241,12 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Global variables  
-data_queue = queue.Queue()
+# Processed reads for the SSE streams: a bounded ring every /stream client reads from its own cursor
+event_buffer = EventBuffer(
+    capacity=EVENT_BUFFER_CONFIG.get('capacity', 1000),
+    policy=EVENT_BUFFER_CONFIG.get('policy', 'coalesce'),
+    block_timeout=EVENT_BUFFER_CONFIG.get('block_timeout_seconds', 0.5)
+)
 
 # TCP/IP Settings
 HOST = '127.0.0.1'
@@ -642,7 +653,7 @@ class TimingHandler(socketserver.StreamRequestHandler):
             # Process timing data
             processed_data = process_timing_data(line)
             if processed_data:
-                data_queue.put(processed_data)
+                event_buffer.publish(processed_data, key=processed_data.get('bib'))
 
         print("-- Client disconnected --")
 
@@ -1604,6 +1615,11 @@ def login():
     
     return jsonify(response)
 
+@app.route('/api/metrics')
+def get_metrics():
+    """Expose hot-path timers and counters in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/login-progress')
 def get_login_progress():
     """Return current roster loading progress"""
@@ -1611,15 +1627,22 @@ def get_login_progress():
 
 @app.route('/stream')
 def stream():
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+    replay = min(max(request.args.get('replay', 0, type=int), 0), EVENT_BUFFER_CONFIG.get('max_replay', 200))
+    subscription = event_buffer.subscribe(after=int(last_id) if last_id and last_id.isdigit() else None,
+                                          replay=replay)
+    
     def generate():
-        while True:
-            try:
-                # Try to get data from the queue, timeout after 1 second
-                data = data_queue.get(timeout=1)
-                yield f"data: {json.dumps(data)}\n\n"
-            except queue.Empty:
-                # Send keepalive message if no data
-                yield f"data: {json.dumps({'keepalive': True})}\n\n"
+        try:
+            while True:
+                events = event_buffer.read(subscription, timeout=1)
+                if not events:
+                    # Send keepalive message if no data
+                    yield f"data: {json.dumps({'keepalive': True})}\n\n"
+                    continue
+                yield ''.join(f"id: {seq}\ndata: {json.dumps(data)}\n\n" for seq, data in events)
+        finally:
+            event_buffer.unsubscribe(subscription)
     
     response = Response(generate(), mimetype='text/event-stream')
     response.headers['Cache-Control'] = 'no-cache'
@@ -1627,6 +1650,17 @@ def stream():
     response.headers['Access-Control-Allow-Origin'] = '*'
     return response
 
+# Brand style scraping for /api/fetch-styles: parallel stylesheet fetches, cached per URL
+style_scraper = StyleScraper(
+    deadline_seconds=STYLE_FETCH_CONFIG['deadline_seconds'],
+    page_timeout_seconds=STYLE_FETCH_CONFIG['page_timeout_seconds'],
+    workers=STYLE_FETCH_CONFIG['workers'],
+    max_stylesheets=STYLE_FETCH_CONFIG['max_stylesheets'],
+    cache_ttl_seconds=STYLE_FETCH_CONFIG['cache_ttl_seconds'],
+    cache_entries=STYLE_FETCH_CONFIG['cache_entries']
+)
+metrics.gauge('style_cache_hits', lambda: style_scraper.pages.hits, 'fetch-styles requests answered from cache')
+
 def is_valid_url(url):
     """Validate URL format and security"""
     try:
@@ -1636,104 +1670,18 @@ def is_valid_url(url):
         logger.error("Failed to parse URL '%s': %s", url, e)
         return False
 
-def extract_colors_from_css(css_text):
-    """Extract color values from CSS"""
-    colors = set()
-    rules = tinycss2.parse_stylesheet(css_text)
-    
-    # Common CSS color names and their hex values
-    css_colors = {
-        'black': '#000000', 'white': '#ffffff', 'red': '#ff0000',
-        'green': '#00ff00', 'blue': '#0000ff', 'yellow': '#ffff00',
-        'purple': '#800080', 'gray': '#808080', 'orange': '#ffa500'
-    }
-    
-    for rule in rules:
-        if rule.type == 'qualified-rule':
-            for token in rule.content:
-                if token.type == 'hash':
-                    # Handle hex colors
-                    colors.add(f'#{token.value}')
-                elif token.type == 'function' and token.name in ['rgb', 'rgba']:
-                    # Handle rgb/rgba colors
-                    colors.add(token.serialize())
-                elif token.type == 'ident' and token.value.lower() in css_colors:
-                    # Handle named colors
-                    colors.add(css_colors[token.value.lower()])
-    
-    return list(colors)
-
-def extract_fonts_from_css(css_text):
-    """Extract font families from CSS"""
-    fonts = set()
-    rules = tinycss2.parse_stylesheet(css_text)
-    
-    for rule in rules:
-        if rule.type == 'qualified-rule':
-            for token in rule.content:
-                if token.type == 'function' and token.name == 'font-family':
-                    fonts.add(token.serialize())
-    
-    return list(fonts)
-
 @app.route('/api/fetch-styles', methods=['POST'])
 def fetch_styles():
-    url = request.json.get('url')
+    """Colors and fonts used by a web page, most used first (cached per URL)"""
+    url = (request.get_json(silent=True) or {}).get('url')
     
     if not url or not is_valid_url(url):
         return jsonify({'error': 'Invalid URL'}), 400
     
     try:
-        # Fetch the webpage
-        headers = {'User-Agent': 'Mozilla/5.0 (compatible; RaceDisplay/1.0)'}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract styles
-        styles = {
-            'colors': set(),
-            'fonts': set(),
-            'backgrounds': set()
-        }
-        
-        # Process external stylesheets
-        for link in soup.find_all('link', rel='stylesheet'):
-            href = link.get('href')
-            if href:
-                css_url = urljoin(url, href)
-                try:
-                    css_response = requests.get(css_url, headers=headers, timeout=5)
-                    if css_response.ok:
-                        styles['colors'].update(extract_colors_from_css(css_response.text))
-                        styles['fonts'].update(extract_fonts_from_css(css_response.text))
-                except requests.RequestException as e:
-                    logger.warning("Failed to fetch CSS %s: %s", css_url, e)
-                    continue
-        
-        # Process inline styles
-        for style in soup.find_all('style'):
-            styles['colors'].update(extract_colors_from_css(style.string or ''))
-            styles['fonts'].update(extract_fonts_from_css(style.string or ''))
-        
-        # Extract main background
-        body = soup.find('body')
-        if body:
-            bg_color = body.get('style', '').split('background-color:')[-1].split(';')[0].strip()
-            if bg_color:
-                styles['backgrounds'].add(bg_color)
-        
-        # Convert sets to lists for JSON serialization
-        styles = {k: list(v) for k, v in styles.items()}
-        
-        # Add some metadata
-        styles['title'] = soup.title.string if soup.title else ''
-        styles['url'] = url
-        
-        return jsonify(styles)
-        
+        return jsonify(style_scraper.fetch(url))
     except Exception as e:
+        logger.warning("Failed to fetch styles from %s: %s", url, e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -1802,12 +1750,16 @@ def get_user_images():
 def get_current_runner():
     """Get current runner for display"""
     try:
-        # Return the most recent timing data if available
-        if not data_queue.empty():
-            data = data_queue.get()
+        # Return the most recent timing data if available (the SSE ring's latest event)
+        subscription = event_buffer.subscribe(replay=1)
+        try:
+            events = event_buffer.read(subscription, timeout=0, limit=1)
+        finally:
+            event_buffer.unsubscribe(subscription)
+        if events:
             return jsonify({
                 'success': True,
-                'runner': data
+                'runner': events[0][1]
             })
         else:
             return jsonify({
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""End-to-end ingest benchmark for the Race Display timing path.
+
+Simulates N ChronoTrack decoders that perform the full socket handshake and
+then stream CT01_33 reads at a configurable rate, with optional finish-line
+bursts. By default the app's TimingHandler is started in-process on an
+ephemeral port so that both latencies can be measured exactly:
+
+  read-to-queue  decoder send -> runner lands in the display queue
+  read-to-sse    decoder send -> event delivered on the /stream endpoint
+
+Results are written as JSON so runs can be compared across builds.
+
+Examples:
+  python benchmarks/ingest_bench.py --decoders 4 --rate 50 --duration 20
+  python benchmarks/ingest_bench.py --burst-at 5 --burst-rate 400 --burst-seconds 10
+  python benchmarks/ingest_bench.py --find-max --rate 50 --duration 10
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import logging
+import os
+import platform
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from display_queue import DisplayQueue  # noqa: E402
+
+
+def log(message):
+    """Progress output that survives the server's stdout being silenced"""
+    print(message, file=sys.__stderr__, flush=True)
+
+
+def percentiles(samples_ms):
+    """Summarize a list of latencies in milliseconds"""
+    if not samples_ms:
+        return {'count': 0}
+    ordered = sorted(samples_ms)
+    count = len(ordered)
+
+    def pick(fraction):
+        return round(ordered[min(count - 1, int(fraction * count))], 3)
+
+    return {
+        'count': count,
+        'min': round(ordered[0], 3),
+        'p50': pick(0.50),
+        'p90': pick(0.90),
+        'p99': pick(0.99),
+        'p999': pick(0.999),
+        'max': round(ordered[-1], 3),
+        'mean': round(sum(ordered) / count, 3)
+    }
+
+
+class Recorder:
+    """Collects send/queue/SSE timestamps keyed by bib"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sent = {}
+        self.queued = {}
+        self.streamed = {}
+
+    def mark(self, table, bib):
+        now = time.perf_counter()
+        with self.lock:
+            table.setdefault(bib, now)
+
+    def latencies(self, table, bibs=None):
+        with self.lock:
+            keys = bibs if bibs is not None else list(self.sent)
+            return [
+                (table[bib] - self.sent[bib]) * 1000.0
+                for bib in keys if bib in table and bib in self.sent
+            ]
+
+
+class RecordingQueue(DisplayQueue):
+    """Display queue that timestamps every insertion"""
+
+    def __init__(self, recorder, max_size):
+        super().__init__(max_size)
+        self._recorder = recorder
+
+    def push(self, runner):
+        added, evicted = super().push(runner)
+        if added:
+            self._recorder.mark(self._recorder.queued, runner.get('bib'))
+        return added, evicted
+
+
+class SimulatedDecoder(threading.Thread):
+    """One decoder connection: handshake, then paced reads"""
+
+    # Sequence counters survive reconnects between stages, like a real decoder's
+    _sequences = {}
+
+    def __init__(self, index, target, locations, schedule, bibs, recorder, stop_event):
+        super().__init__(name=f'decoder-{index}', daemon=True)
+        self.index = index
+        self.target = target
+        self.locations = locations
+        self.schedule = schedule
+        self.bibs = bibs
+        self.recorder = recorder
+        self.stop_event = stop_event
+        self.sequences = self._sequences.setdefault(index, {location: 0 for location in locations})
+        self.reads_sent = 0
+        self.replay_requests = 0
+        self.error = None
+        self.sock = None
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.target[0].startswith('127.'):
+            # Give each decoder its own loopback address so per-host sequence
+            # tracking on the server sees them as separate decoders.
+            try:
+                sock.bind((f'127.0.{self.index // 250}.{self.index % 250 + 2}', 0))
+            except OSError:
+                self.locations = [f'{location}-{self.index}' for location in self.locations]
+                for location in self.locations:
+                    self.sequences.setdefault(location, 0)
+        sock.connect(self.target)
+        return sock
+
+    def _send_line(self, text):
+        self.sock.sendall((text + '\r\n').encode('utf-8'))
+
+    def _handshake(self, reader):
+        """Greeting, settings and the geteventinfo/getlocations/start exchange"""
+        self._send_line(f'BenchDecoder{self.index}~Version 3.0~stream-mode=push')
+        settings_count = None
+        while True:
+            line = reader.readline()
+            if not line:
+                raise ConnectionError('Server closed during handshake')
+            line = line.decode('utf-8', errors='ignore').strip()
+            fields = line.split('~')
+            if settings_count is None and len(fields) == 3 and fields[2].isdigit():
+                settings_count = int(fields[2])
+                for _ in range(settings_count):
+                    reader.readline()
+                self._send_line('ack~init')
+            elif line == 'geteventinfo':
+                self._send_line('ack~geteventinfo~Benchmark Event~1~bench')
+            elif line == 'getlocations':
+                self._send_line('ack~getlocations~' + '~'.join(self.locations))
+            elif line == 'start':
+                self._send_line('ack~start')
+                return
+
+    def _drain(self, reader):
+        """Answer server commands (ping acks, rewind requests) while streaming"""
+        try:
+            for raw in iter(reader.readline, b''):
+                command = raw.decode('utf-8', errors='ignore').strip()
+                if command.startswith('rewind'):
+                    self.replay_requests += 1
+                elif command == 'ping':
+                    self._send_line('ack~ping')
+        except OSError:
+            pass
+
+    def _read_line(self, location, bib):
+        self.sequences[location] += 1
+        now = datetime.now()
+        clock = now.strftime('%H:%M:%S.') + f'{now.microsecond // 10000:02d}'
+        return f'CT01_33~{self.sequences[location]}~{location}~{bib}~{clock}~0~{self.index:02X}{bib:06X}~1'
+
+    def run(self):
+        try:
+            self.sock = self._connect()
+            reader = self.sock.makefile('rb')
+            self._handshake(reader)
+            threading.Thread(target=self._drain, args=(reader,), daemon=True).start()
+
+            started = time.perf_counter()
+            next_send = started
+            location_cycle = itertools.cycle(self.locations)
+            while not self.stop_event.is_set():
+                elapsed = time.perf_counter() - started
+                rate = self.schedule(elapsed)
+                if rate is None:
+                    break
+                now = time.perf_counter()
+                if now < next_send:
+                    time.sleep(min(next_send - now, 0.01))
+                    continue
+                # Catch up in one write if we fell behind the schedule
+                due = max(1, min(64, int((now - next_send) * rate) + 1))
+                lines = []
+                for _ in range(due):
+                    bib = next(self.bibs)
+                    lines.append(self._read_line(next(location_cycle), bib))
+                    self.recorder.mark(self.recorder.sent, str(bib))
+                self.sock.sendall(('\r\n'.join(lines) + '\r\n').encode('utf-8'))
+                self.reads_sent += due
+                next_send += due / rate
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            if self.sock:
+                try:
+                    self.sock.close()
+                except OSError:
+                    pass
+
+
+def make_schedule(args, rate, duration):
+    """Return rate_at(elapsed) for one decoder, None once the run is over"""
+    def rate_at(elapsed):
+        if elapsed >= duration:
+            return None
+        if args.burst_rate and args.burst_at <= elapsed < args.burst_at + args.burst_seconds:
+            return args.burst_rate
+        return rate
+    return rate_at
+
+
+def start_stream_consumer(app_module, recorder, stop_event):
+    """Consume the app's /stream endpoint and timestamp each runner event"""
+    client = app_module.app.test_client()
+
+    def consume():
+        response = client.get('/stream', buffered=False)
+        for chunk in response.response:
+            if stop_event.is_set():
+                break
+            text = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+            for line in text.splitlines():
+                if not line.startswith('data: '):
+                    continue
+                try:
+                    event = json.loads(line[6:])
+                except ValueError:
+                    continue
+                if isinstance(event, dict) and event.get('bib'):
+                    recorder.mark(recorder.streamed, str(event['bib']))
+        response.close()
+
+    thread = threading.Thread(target=consume, name='sse-consumer', daemon=True)
+    thread.start()
+    return thread
+
+
+def start_in_process_server(app_module, recorder, roster_size):
+    """Load a synthetic roster and serve TimingHandler on an ephemeral port"""
+    app_module.current_mode = 'pre-race'
+    app_module.roster_store.replace({
+        str(bib): {
+            'name': f'Bench Runner {bib}', 'first_name': 'Bench', 'last_name': f'Runner{bib}',
+            'age': '30', 'gender': 'F', 'city': 'Davenport', 'state': 'IA', 'country': 'USA',
+            'division': 'F30-39', 'race_name': 'Benchmark', 'reg_choice': '7 Mile',
+            'wave': 'Wave 1', 'team_name': '', 'entry_status': 'active', 'entry_type': 'bench',
+            'entry_id': str(bib), 'athlete_id': str(bib)
+        }
+        for bib in range(1, roster_size + 1)
+    })
+    app_module.display_queue = RecordingQueue(recorder, app_module.MAX_QUEUE_SIZE)
+
+    class BenchServer(socketserver.ThreadingTCPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+
+    server = BenchServer(('127.0.0.1', 0), app_module.TimingHandler)
+    threading.Thread(target=server.serve_forever, name='bench-tcp', daemon=True).start()
+    return server
+
+
+def run_stage(args, app_module, recorder, target, rate, duration, bibs):
+    """Run one load stage and return its measurements"""
+    stop_event = threading.Event()
+    decoders = [
+        SimulatedDecoder(i, target, args.locations, make_schedule(args, rate, duration),
+                         bibs, recorder, stop_event)
+        for i in range(args.decoders)
+    ]
+    with recorder.lock:
+        already_sent = set(recorder.sent)
+
+    started = time.perf_counter()
+    for decoder in decoders:
+        decoder.start()
+    for decoder in decoders:
+        decoder.join(duration + 30)
+
+    # Let the pipeline drain before measuring
+    deadline = time.perf_counter() + args.drain_seconds
+    while time.perf_counter() < deadline:
+        with recorder.lock:
+            stage_bibs = [bib for bib in recorder.sent if bib not in already_sent]
+            done = all(bib in recorder.queued for bib in stage_bibs)
+        if done:
+            break
+        time.sleep(0.05)
+    stop_event.set()
+
+    with recorder.lock:
+        stage_bibs = [bib for bib in recorder.sent if bib not in already_sent]
+        queued_times = [recorder.queued[bib] for bib in stage_bibs if bib in recorder.queued]
+
+    sent = sum(decoder.reads_sent for decoder in decoders)
+    wall = time.perf_counter() - started
+    delivered = len(queued_times)
+    processing_window = (max(queued_times) - started) if queued_times else wall
+    result = {
+        'decoders': args.decoders,
+        'rate_per_decoder': rate,
+        'offered_reads_per_sec': round(sent / duration, 2) if duration else 0,
+        'reads_sent': sent,
+        'reads_queued': delivered,
+        'reads_streamed': len([bib for bib in stage_bibs if bib in recorder.streamed]),
+        'achieved_reads_per_sec': round(delivered / processing_window, 2) if processing_window else 0,
+        'wall_seconds': round(wall, 3),
+        'replay_requests': sum(decoder.replay_requests for decoder in decoders),
+        'decoder_errors': [decoder.error for decoder in decoders if decoder.error],
+        'read_to_queue_ms': percentiles(recorder.latencies(recorder.queued, stage_bibs)),
+        'read_to_sse_ms': percentiles(recorder.latencies(recorder.streamed, stage_bibs)),
+        'ingest_stages': app_module.ingest_pipeline.stats()
+    }
+    return result
+
+
+def stage_sustained(result, args):
+    """A stage is sustained if nearly everything arrived within the latency budget"""
+    if not result['reads_sent']:
+        return False
+    delivered_ratio = result['reads_queued'] / result['reads_sent']
+    p99 = result['read_to_queue_ms'].get('p99')
+    return delivered_ratio >= 0.99 and p99 is not None and p99 <= args.latency_budget_ms
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.contextmanager
+def silenced_server(app_module, enabled):
+    """Send the server's print/log output to /dev/null while measuring"""
+    if not enabled:
+        yield
+        return
+    devnull = open(os.devnull, 'w')
+    handlers = [h for h in logging.root.handlers if isinstance(h, logging.StreamHandler)]
+    pipeline = getattr(app_module, 'log_pipeline', None)
+    if pipeline is not None:
+        handlers.append(pipeline.stream_handler)
+    streams = [h.stream for h in handlers]
+    try:
+        for handler in handlers:
+            handler.setStream(devnull)
+        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            yield
+    finally:
+        for handler, stream in zip(handlers, streams):
+            handler.setStream(stream)
+        devnull.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Race Display ingest benchmark')
+    parser.add_argument('--decoders', type=int, default=4, help='Concurrent simulated decoders')
+    parser.add_argument('--rate', type=float, default=25.0, help='Reads/sec per decoder')
+    parser.add_argument('--duration', type=float, default=15.0, help='Seconds of load per stage')
+    parser.add_argument('--locations', default='start,split,finish',
+                        help='Comma-separated locations each decoder reports')
+    parser.add_argument('--burst-at', type=float, default=0.0, help='Seconds into the run to start a burst')
+    parser.add_argument('--burst-rate', type=float, default=0.0, help='Reads/sec per decoder during the burst')
+    parser.add_argument('--burst-seconds', type=float, default=0.0, help='Burst length in seconds')
+    parser.add_argument('--roster-size', type=int, default=0,
+                        help='Synthetic roster size (defaults to enough bibs for the run)')
+    parser.add_argument('--drain-seconds', type=float, default=10.0,
+                        help='Max time to wait for in-flight reads after sending stops')
+    parser.add_argument('--find-max', action='store_true',
+                        help='Double the rate each stage until throughput is no longer sustained')
+    parser.add_argument('--max-stages', type=int, default=8)
+    parser.add_argument('--latency-budget-ms', type=float, default=250.0,
+                        help='p99 read-to-queue budget for a stage to count as sustained')
+    parser.add_argument('--output', help='Results file (default bench_results/ingest-<timestamp>.json)')
+    parser.add_argument('--verbose-server', action='store_true',
+                        help="Leave the server's own console output on (it is part of the cost)")
+    args = parser.parse_args(argv)
+    args.locations = [location.strip() for location in args.locations.split(',') if location.strip()]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    import app as app_module
+
+    recorder = Recorder()
+    peak_rate = max(args.rate, args.burst_rate) * (2 ** (args.max_stages - 1) if args.find_max else 1)
+    stages = args.max_stages if args.find_max else 1
+    roster_size = args.roster_size or int(peak_rate * args.decoders * args.duration * stages * 1.2) + 1000
+    bibs = itertools.count(1)
+
+    results = {
+        'benchmark': 'ingest',
+        'timestamp': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'stages': []
+    }
+
+    with silenced_server(app_module, not args.verbose_server):
+        server = start_in_process_server(app_module, recorder, roster_size)
+        stop_stream = threading.Event()
+        start_stream_consumer(app_module, recorder, stop_stream)
+        target = server.server_address
+        log(f'Benchmark server on {target[0]}:{target[1]} with {roster_size} roster entries')
+
+        rate = args.rate
+        for stage in range(stages):
+            log(f'Stage {stage + 1}: {args.decoders} decoders x {rate:g} reads/s for {args.duration:g}s')
+            result = run_stage(args, app_module, recorder, target, rate, args.duration, bibs)
+            results['stages'].append(result)
+            log(f"  sent={result['reads_sent']} queued={result['reads_queued']} "
+                f"achieved={result['achieved_reads_per_sec']}/s "
+                f"queue p99={result['read_to_queue_ms'].get('p99')}ms "
+                f"sse p99={result['read_to_sse_ms'].get('p99')}ms")
+            if not args.find_max:
+                break
+            if not stage_sustained(result, args):
+                break
+            rate *= 2
+
+        stop_stream.set()
+        server.shutdown()
+        server.server_close()
+
+    sustained = [stage for stage in results['stages'] if stage_sustained(stage, args)]
+    results['max_sustained_reads_per_sec'] = max(
+        (stage['achieved_reads_per_sec'] for stage in sustained), default=0
+    )
+
+    output = args.output or os.path.join(
+        REPO_ROOT, 'bench_results', f"ingest-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as fp:
+        json.dump(results, fp, indent=2)
+    log(f"Max sustained throughput: {results['max_sustained_reads_per_sec']} reads/s")
+    log(f'Results written to {output}')
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -17,10 +17,170 @@ PROTOCOL_CONFIG = {
     'TCP_HOST': '127.0.0.1',
     'TCP_PORT': 61611,
     'BUFFER_SIZE': 1024,
-    'TIMEOUT': 30,
+    'HEARTBEAT_INTERVAL': 10,   # Ping a decoder that has sent nothing for this many seconds
+    'HEARTBEAT_TIMEOUT': 45,    # ...and disconnect it after this long with no reply
     'FIELD_SEPARATOR': '~',     # ChronoTrack field separator
     'LINE_TERMINATOR': '\r\n',  # ChronoTrack line terminator
-    'FORMAT_ID': 'CT01_33'      # ChronoTrack timing format ID
+    'FORMAT_ID': 'CT01_33',     # ChronoTrack timing format ID
+    'TIMING_FORMATS': ['CT01_33', 'CT01_13', 'csv', 'tsv'],  # Accepted read formats (timing_parsers.py)
+    'SEQUENCE_TRACKING': True,  # Detect gaps in per-location read sequence numbers
+    'REWIND_COMMAND': 'rewind', # Sent as rewind~location~first~last to replay missing reads
+    'REPLAY_RETRY_SECONDS': 10, # Re-request a gap that is still open after this long
+    'REPLAY_MAX_ATTEMPTS': 3,   # Give up on a gap after this many requests
+    'SEQUENCE_RESET_THRESHOLD': 100, # A read this far below the highest seen means the decoder reset its counter
+    'SEQUENCE_RESYNC_WINDOW': 10     # After a reconnect: reads this close to the highest are re-sent duplicates,
+                                     # and a read numbered this close to 1 is a restarted counter
+}
+
+# Duplicate/bounce read suppression
+DEDUPE_CONFIG = {
+    'enabled': True,
+    'window_seconds': 30  # Ignore repeat reads of the same bib/location/lap within this window
+}
+
+# Raw timing line journal (write-ahead log of everything the decoders send)
+JOURNAL_CONFIG = {
+    'enabled': True,
+    'directory': 'data/journal',
+    'segment_bytes': 64 * 1024 * 1024,  # Start a new segment file after this size
+    'fsync_interval_seconds': 1.0,      # Sync batched writes at least this often
+    'fsync_batch': 256                  # ...or after this many records
+}
+
+# Logging: everything goes through a background writer thread
+LOGGING_CONFIG = {
+    'level': 'INFO',
+    'format': 'text',     # 'text' or 'json' (one JSON object per line)
+    'stream': 'stdout',
+    'queue_size': 10000,  # Records beyond this are dropped rather than blocking ingest
+    'verbose': False,     # Drop every subsystem to DEBUG
+    'subsystems': {
+        'ingest': 'INFO',    # Decoder connections and per-read parsing
+        'queue': 'INFO',     # Display queue inserts/evictions
+        'provider': 'INFO',  # ChronoTrack/RunSignUp API calls
+        'state_bus': 'INFO', # Ingest -> HTTP worker state publishing (multi-process mode)
+    },
+    'sample_every': {
+        'ingest': 100,  # Per-read DEBUG messages: keep 1 in N
+        'queue': 20
+    }
+}
+
+# Upload processing: thumbnails and display-size variants built on a process pool
+IMAGE_PIPELINE_CONFIG = {
+    'enabled': True,
+    'workers': 2,
+    'formats': ['avif', 'webp'],     # Preference order; formats Pillow can't encode are skipped
+    'quality': 80,
+    'display_sizes': [[1920, 1080]], # Always built, in addition to every saved template's canvas size
+    'start_method': 'fork'
+}
+
+# Saved template versioning (every save is kept under data/template_revisions)
+TEMPLATE_STORE_CONFIG = {
+    'versioning': True,
+    'directory': 'data/template_revisions',
+    'max_revisions': 50  # Per template; older revisions are pruned
+}
+
+# /api/fetch-styles: brand colors and fonts scraped from a web page
+STYLE_FETCH_CONFIG = {
+    'deadline_seconds': 8,       # Total time for the page and all of its stylesheets
+    'page_timeout_seconds': 5,
+    'workers': 6,                # Stylesheets fetched in parallel
+    'max_stylesheets': 20,
+    'cache_ttl_seconds': 600,
+    'cache_entries': 64
+}
+
+# Decoder reads: socket reader threads hand framed lines to processing workers
+INGEST_PIPELINE_CONFIG = {
+    'workers': 2,          # Each decoder connection is always processed by the same worker, in order
+    'queue_size': 10000    # Reads per worker; beyond this reads are dropped (they stay in the journal)
+}
+
+# Extra read sources next to the TCP decoder listener; both feed the same pipeline
+INGEST_SOURCES_CONFIG = {
+    'udp': {
+        'enabled': False,
+        'host': '0.0.0.0',
+        'port': 61612,
+        'batch_size': 64               # Datagrams drained per wakeup
+    },
+    'file_tail': {
+        'enabled': False,
+        'pattern': 'data/decoder_logs/*.txt',  # Decoder log files to follow (rotation-aware)
+        'start_at': 'end',             # Files already there at first start: 'end' (new lines only) or 'start'
+        'poll_interval_seconds': 0.5,  # Fallback when inotify is unavailable
+        'state_file': 'data/tail_offsets.json'
+    }
+}
+
+# Restarts for ingest listeners (TCP, UDP, file tail) that crash or cannot bind
+LISTENER_SUPERVISOR_CONFIG = {
+    'check_interval_seconds': 1.0,
+    'backoff_initial_seconds': 1.0,  # First retry delay; doubles on each further failure
+    'backoff_max_seconds': 60.0,
+    'stable_seconds': 30.0           # Up this long and the backoff resets
+}
+
+# Runner queue lanes: reads are shown by timing location priority instead of plain arrival order
+DISPLAY_LANES_CONFIG = {
+    'enabled': True,
+    'lanes': [
+        # locations are case-insensitive shell-style patterns; the first matching lane wins
+        {'name': 'finish', 'locations': ['finish*', 'fin*'], 'priority': 3, 'weight': 1},
+        {'name': 'split', 'locations': ['split*', 'mile*', 'km*', 'half*', 'turn*'], 'priority': 2, 'weight': 1},
+        {'name': 'start', 'locations': ['start*'], 'priority': 1, 'weight': 1, 'cap': 50}
+    ],
+    'default_lane': 'other',        # Unmatched locations; created with priority 0 if not listed above
+    'promote_after_seconds': 30.0   # A runner waiting this long is shown ahead of every lane
+}
+
+# Display pacing: shorter durations, then multi-runner frames, when runners arrive faster than they are shown
+PACING_CONFIG = {
+    'enabled': True,
+    'min_duration_seconds': 2.0,  # Never show a runner (or a batch frame) for less than this
+    'drain_target_seconds': 60,   # Aim to work off the current backlog within this long
+    'max_batch_size': 6,          # Runners per frame in batch mode
+    'rate_window_seconds': 30,    # Arrival rate is averaged over this window
+    'exit_ratio': 0.6,            # Back to single runners below this share of single-runner capacity...
+    'calm_seconds': 15            # ...sustained for this long
+}
+
+# Named display channels: one screen per race, wave or mat from the same server.
+# Also managed at runtime with PUT/DELETE /api/channels/<name>; those are saved to state_file.
+CHANNELS_CONFIG = {
+    'state_file': 'data/display_channels.json',
+    'channels': {
+        # 'half-finish': {'race_name': ['Half Marathon'], 'location': ['finish']},
+    }
+}
+
+# /api/upcoming: how far ahead displays may look to pre-bind frames and prefetch images
+LOOKAHEAD_CONFIG = {
+    'default_runners': 3,
+    'max_runners': 20
+}
+
+# Processed reads waiting for /stream (SSE) clients, bounded whether or not anyone is connected
+EVENT_BUFFER_CONFIG = {
+    'capacity': 1000,
+    'policy': 'coalesce',         # When full: 'drop_oldest', 'coalesce' (latest read per bib) or 'block'
+    'block_timeout_seconds': 0.5, # 'block' only: how long a publisher waits for slow streams
+    'max_replay': 200             # Events a new stream may ask for with ?replay=N
+}
+
+# Multi-process deployment: one ingest process owns the TCP listener and all
+# state; gunicorn HTTP workers mirror it over a Unix socket (see gunicorn.conf.py)
+DEPLOYMENT_CONFIG = {
+    'role': 'standalone',              # 'standalone', 'ingest' or 'worker'; RACEDISPLAY_ROLE overrides
+    'bus_socket': 'data/state_bus.sock',
+    'heartbeat_seconds': 1.0,          # Mode/race name/current runner resent this often
+    'max_backlog': 1000,               # Messages a slow worker may fall behind before it is resynced
+    'control_host': '127.0.0.1',       # Where the ingest process serves the API workers forward to
+    'control_port': 8001,
+    'forward_timeout_seconds': 60
 }
 
 # Server Configuration
@@ -0,0 +1,209 @@
+# decoder_registry.py - Connected timing decoders with health and throughput stats
+import itertools
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from log_pipeline import get_logger
+
+ingest_log = get_logger('ingest')
+
+RATE_WINDOW_SECONDS = 10
+_connection_ids = itertools.count(1)
+
+
+def read_lag_seconds(read_time, now=None):
+    """Seconds between a read's own timestamp and the wall clock, or None if unparseable.
+
+    Decoders send either an ISO timestamp (time-format=iso) or a bare
+    HH:MM:SS.ff time of day, which is taken as today in local time (or
+    yesterday, for a read from just before midnight).
+    """
+    now = now or datetime.now()
+    try:
+        if 'T' in read_time or '-' in read_time:
+            stamp = datetime.fromisoformat(read_time.replace('Z', '+00:00'))
+            if stamp.tzinfo is not None:
+                stamp = stamp.astimezone().replace(tzinfo=None)
+        else:
+            clock = datetime.strptime(read_time, '%H:%M:%S.%f' if '.' in read_time else '%H:%M:%S')
+            stamp = datetime.combine(now.date(), clock.time())
+            if stamp - now > timedelta(hours=12):
+                stamp -= timedelta(days=1)
+    except ValueError:
+        return None
+    return (now - stamp).total_seconds()
+
+
+class DecoderConnection:
+    """One connected decoder. Only its socket reader thread records into it;
+    the heartbeat monitor and status requests just read the counters."""
+
+    def __init__(self, peer, sock, send_ping):
+        self.id = next(_connection_ids)
+        self.peer = f'{peer[0]}:{peer[1]}'
+        self.connected_at = time.time()
+        self.disconnected_at = None
+        self.close_reason = None
+        self.greeting = None
+        self.event_info = None
+        self.locations = []
+        self.lines = 0
+        self.reads = 0
+        self.bytes = 0
+        self.last_read_at = None
+        self.last_read_time = None
+        self.lag_seconds = None
+        self.pings_sent = 0
+        self.last_line = time.monotonic()
+        self.ping_sent = None
+        self._sock = sock
+        self._send_ping = send_ping
+        self._buckets = [[0, 0] for _ in range(RATE_WINDOW_SECONDS)]  # [second, reads]
+
+    def record_line(self, nbytes):
+        """Anything from the decoder (reads, acks, pings) counts as a heartbeat"""
+        self.lines += 1
+        self.bytes += nbytes
+        self.last_line = time.monotonic()
+        self.ping_sent = None
+
+    def record_read(self, location, read_time):
+        self.reads += 1
+        self.last_read_at = time.time()
+        self.last_read_time = read_time
+        self.lag_seconds = read_lag_seconds(read_time)
+        if location not in self.locations:
+            self.locations.append(location)
+        second = int(self.last_line)
+        bucket = self._buckets[second % RATE_WINDOW_SECONDS]
+        if bucket[0] != second:
+            bucket[0], bucket[1] = second, 0
+        bucket[1] += 1
+
+    def reads_per_second(self):
+        now = int(time.monotonic())
+        recent = sum(count for second, count in self._buckets if now - second < RATE_WINDOW_SECONDS)
+        window = min(RATE_WINDOW_SECONDS, max(1, time.time() - self.connected_at))
+        return round(recent / window, 2)
+
+    def idle_seconds(self):
+        return time.monotonic() - self.last_line
+
+    def ping(self):
+        self.ping_sent = time.monotonic()
+        self.pings_sent += 1
+        self._send_ping()
+
+    def close(self, reason):
+        """Shut the socket down so the reader thread's blocking read returns"""
+        self.close_reason = reason
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'peer': self.peer,
+            'greeting': self.greeting,
+            'event_info': self.event_info,
+            'locations': list(self.locations),
+            'connected_at': self.connected_at,
+            'disconnected_at': self.disconnected_at,
+            'close_reason': self.close_reason,
+            'lines': self.lines,
+            'reads': self.reads,
+            'bytes_received': self.bytes,
+            'reads_per_second': self.reads_per_second(),
+            'last_read_at': self.last_read_at,
+            'last_read_time': self.last_read_time,
+            'lag_seconds': None if self.lag_seconds is None else round(self.lag_seconds, 3),
+            'idle_seconds': round(self.idle_seconds(), 1),
+            'pings_sent': self.pings_sent
+        }
+
+
+class DecoderRegistry:
+    """Every live decoder connection, plus the most recent disconnects.
+
+    Decoder sockets block on reads with no timeout. A monitor thread sends an
+    application-level ping to any decoder that has been quiet for
+    heartbeat_interval seconds, and disconnects one that has sent nothing at
+    all (not even the ping ack) for heartbeat_timeout seconds.
+    """
+
+    def __init__(self, heartbeat_interval=10, heartbeat_timeout=45, history=20):
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self._connections = {}
+        self._recent = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._monitor = None
+        self.listening = False   # Set by the TCP server loop
+        self.listen_address = None
+        self.total_connections = 0
+        self.heartbeat_disconnects = 0
+
+    def start(self):
+        with self._lock:
+            if self._monitor is None:
+                self._monitor = threading.Thread(target=self._heartbeat_loop, name='decoder-heartbeat', daemon=True)
+                self._monitor.start()
+
+    def register(self, peer, sock, send_ping):
+        connection = DecoderConnection(peer, sock, send_ping)
+        with self._lock:
+            self._connections[connection.id] = connection
+            self.total_connections += 1
+        return connection
+
+    def unregister(self, connection):
+        connection.disconnected_at = time.time()
+        with self._lock:
+            self._connections.pop(connection.id, None)
+            self._recent.appendleft(connection)
+
+    def connections(self):
+        with self._lock:
+            return list(self._connections.values())
+
+    def __len__(self):
+        return len(self._connections)
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(min(1.0, self.heartbeat_interval))
+            for connection in self.connections():
+                idle = connection.idle_seconds()
+                if idle >= self.heartbeat_timeout:
+                    ingest_log.info("Decoder %s silent for %.0fs, disconnecting", connection.peer, idle)
+                    self.heartbeat_disconnects += 1
+                    connection.close('heartbeat timeout')
+                elif idle >= self.heartbeat_interval and (
+                        connection.ping_sent is None
+                        or time.monotonic() - connection.ping_sent >= self.heartbeat_interval):
+                    try:
+                        connection.ping()
+                    except Exception as e:
+                        connection.close(f'ping failed: {e}')
+
+    def stats(self):
+        connections = self.connections()
+        with self._lock:
+            recent = list(self._recent)
+        return {
+            'listening': self.listening,
+            'listen_address': self.listen_address,
+            'connected': len(connections),
+            'total_connections': self.total_connections,
+            'heartbeat_disconnects': self.heartbeat_disconnects,
+            'heartbeat_interval': self.heartbeat_interval,
+            'heartbeat_timeout': self.heartbeat_timeout,
+            'reads_per_second': round(sum(c.reads_per_second() for c in connections), 2),
+            'decoders': [c.as_dict() for c in connections],
+            'recent_disconnects': [c.as_dict() for c in recent]
+        }
@@ -0,0 +1,191 @@
+# display_channels.py - Named display channels: filtered runner queues and streams per screen
+import json
+import os
+import re
+import threading
+
+from log_pipeline import get_logger
+from template_repository import write_atomic
+
+queue_log = get_logger('queue')
+
+CHANNEL_FIELDS = ('race_name', 'reg_choice', 'location', 'wave', 'division')
+CHANNEL_NAME = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def _normalise(value):
+    return str(value or '').strip().lower()
+
+
+def compile_filter(filters):
+    """Turn {'race_name': 'Half Marathon', 'location': ['finish', 'split2']} into a
+    predicate over runner dicts.
+
+    Every listed field must match one of its values (case-insensitive); an
+    empty filter matches every runner. The values are frozen into sets here,
+    so checking a read is one set lookup per filtered field.
+    """
+    if not isinstance(filters or {}, dict):
+        raise ValueError(f'filters must be an object of field: values, not {type(filters).__name__}')
+    clauses = []
+    for field, wanted in (filters or {}).items():
+        if field not in CHANNEL_FIELDS:
+            raise ValueError(f"Cannot filter on {field!r}: expected one of {', '.join(CHANNEL_FIELDS)}")
+        if isinstance(wanted, str):
+            values = [wanted]
+        elif isinstance(wanted, (list, tuple)) or not wanted:
+            values = list(wanted or ())
+        else:
+            raise ValueError(f'Values for {field!r} must be a string or a list of strings')
+        if not values:
+            raise ValueError(f'No values given for {field!r}')
+        clauses.append((field, frozenset(_normalise(value) for value in values)))
+    clauses = tuple(clauses)
+
+    if not clauses:
+        return lambda runner: True
+    if len(clauses) == 1:
+        (field, values), = clauses
+        return lambda runner: _normalise(runner.get(field)) in values
+    return lambda runner: all(_normalise(runner.get(field)) in values for field, values in clauses)
+
+
+class DisplayChannel:
+    """One named screen: the runners that pass its filter, with their own
+    display queue, pacing and SSE event buffer"""
+
+    def __init__(self, name, filters, queue, events, pacer):
+        self.name = name
+        self.filters = dict(filters or {})
+        self.matches = compile_filter(self.filters)
+        self.queue = queue
+        self.events = events
+        self.pacer = pacer
+        self.current_runner = None
+        self.matched = 0
+
+    def deliver(self, runner):
+        self.matched += 1
+        added, _ = self.queue.push(runner)
+        if added:
+            self.pacer.record_arrival()
+        self.events.publish(runner, key=runner.get('bib'))
+
+    def stats(self):
+        return {
+            'filters': self.filters,
+            'matched': self.matched,
+            'queue': self.queue.stats(),
+            'events': {key: value for key, value in self.events.stats().items() if key != 'subscribers'},
+            'streams': len(self.events.stats()['subscribers']),
+            'pacing': self.pacer.current
+        }
+
+
+class ChannelRegistry:
+    """All display channels, routed to from the ingest path.
+
+    make_parts() builds a fresh (queue, event buffer, pacer) for a new
+    channel. Routing iterates an immutable tuple of channels, so defining or
+    deleting a channel never blocks ingest. Redefining a channel swaps its
+    filter but keeps its queue and connected streams.
+
+    Channels from config are defined on every start. Only changes made
+    through the API are saved to state_path: channels defined or redefined
+    there, and config channels that were deleted, so a deletion sticks
+    across restarts.
+    """
+
+    def __init__(self, make_parts, state_path=None):
+        self.make_parts = make_parts
+        self.state_path = state_path
+        self._channels = {}
+        self._routing = ()
+        self._defaults = {}    # name -> filters from config
+        self._saved = {}       # name -> filters defined through the API
+        self._deleted = set()  # Config channels deleted through the API
+        self._lock = threading.Lock()
+        self.routed = 0
+
+    def load(self, defaults=None):
+        """Define the channels from config, then apply what was saved through the API"""
+        self._defaults = dict(defaults or {})
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as fp:
+                    state = json.load(fp)
+                self._saved = dict(state.get('channels', {}))
+                self._deleted = set(state.get('deleted', ())) & set(self._defaults)
+            except (OSError, ValueError, AttributeError, TypeError):
+                queue_log.warning("Ignoring unreadable display channels in %s", self.state_path)
+        definitions = {name: filters for name, filters in self._defaults.items() if name not in self._deleted}
+        definitions.update(self._saved)
+        for name, filters in definitions.items():
+            try:
+                self.define(name, filters, save=False)
+            except ValueError as e:
+                queue_log.warning("Skipping display channel %s: %s", name, e)
+
+    def define(self, name, filters, save=True):
+        """Create a channel, or change an existing channel's filter; raises ValueError"""
+        if not CHANNEL_NAME.match(name or ''):
+            raise ValueError('Channel names are 1-64 letters, digits, "-" or "_"')
+        predicate = compile_filter(filters)  # Validate before touching anything
+        with self._lock:
+            channel = self._channels.get(name)
+            if channel is None:
+                channel = DisplayChannel(name, filters, *self.make_parts())
+                self._channels[name] = channel
+            else:
+                channel.filters, channel.matches = dict(filters or {}), predicate
+            self._routing = tuple(self._channels.values())
+            if save:
+                self._saved[name] = dict(filters or {})
+                self._deleted.discard(name)
+                self._save()
+        return channel
+
+    def delete(self, name):
+        with self._lock:
+            channel = self._channels.pop(name, None)
+            self._routing = tuple(self._channels.values())
+            if channel is not None:
+                self._saved.pop(name, None)
+                if name in self._defaults:
+                    self._deleted.add(name)
+                self._save()
+        return channel is not None
+
+    def _save(self):
+        """Caller holds the lock"""
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        write_atomic(self.state_path, json.dumps(
+            {'channels': self._saved, 'deleted': sorted(self._deleted)}, indent=2))
+
+    def get(self, name):
+        return self._channels.get(name)
+
+    def route(self, runner):
+        """Deliver a processed read to every channel whose filter it passes"""
+        delivered = 0
+        for channel in self._routing:
+            if channel.matches(runner):
+                channel.deliver(runner)
+                delivered += 1
+        if delivered:
+            self.routed += 1
+        return delivered
+
+    def clear(self):
+        """Empty every channel's queue"""
+        for channel in self._routing:
+            channel.queue.clear()
+            channel.current_runner = None
+
+    def __len__(self):
+        return len(self._routing)
+
+    def stats(self):
+        return {channel.name: channel.stats() for channel in self._routing}
@@ -0,0 +1,128 @@
+# display_pacing.py - Adapts display time per runner to queue depth and arrival rate
+import math
+import time
+from threading import Lock
+
+
+class DisplayPacer:
+    """Decides how long each runner is shown, and when to show several at once.
+
+    The displays need to clear runners at the rate they arrive plus enough
+    to work off the backlog within drain_target seconds:
+
+        needed = arrival rate + queue depth / drain_target   (runners/s)
+
+    While the configured duration keeps up, nothing changes. Past that the
+    duration per runner is shortened, down to min_duration. If even that is
+    too slow the pacer switches to batch frames of several runners, sized so
+    a frame of the normal duration clears `needed` runners per second (at
+    most max_batch_size, then shortening the frame too). It goes back to
+    single runners once `needed` has stayed below exit_ratio of the
+    single-runner capacity for calm_seconds, so a surge that ebbs and flows
+    does not flip the displays back and forth.
+
+    Arrivals are counted in one-second buckets over rate_window seconds.
+    """
+
+    def __init__(self, enabled=True, min_duration=2.0, drain_target=60.0, max_batch_size=6,
+                 rate_window=30, exit_ratio=0.6, calm_seconds=15.0):
+        self.enabled = enabled
+        self.min_duration = min_duration
+        self.drain_target = drain_target
+        self.max_batch_size = max(2, max_batch_size)
+        self.rate_window = rate_window
+        self.exit_ratio = exit_ratio
+        self.calm_seconds = calm_seconds
+        self._buckets = [[0, 0] for _ in range(rate_window)]  # [second, arrivals]
+        self._lock = Lock()
+        self._calm_since = None
+        self.mode = 'single'
+        self.current = {'mode': 'single', 'duration_ms': None, 'batch_size': 1}
+        self.arrivals = 0
+        self.switches = 0
+        self.batch_frames = 0
+
+    def record_arrival(self, now=None):
+        """Count one runner joining the display queue"""
+        now = time.monotonic() if now is None else now
+        second = int(now)
+        with self._lock:
+            bucket = self._buckets[second % self.rate_window]
+            if bucket[0] != second:
+                bucket[0], bucket[1] = second, 0
+            bucket[1] += 1
+            self.arrivals += 1
+
+    def arrival_rate(self, now=None):
+        """Runners per second over the rate window"""
+        now = time.monotonic() if now is None else now
+        second = int(now)
+        with self._lock:
+            recent = sum(count for start, count in self._buckets if second - start < self.rate_window)
+        # Always the full window: right after start-up a handful of reads is not a surge
+        return recent / self.rate_window
+
+    def plan(self, depth, base_duration_ms, now=None):
+        """The pacing displays should use now: {'mode', 'duration_ms', 'batch_size', ...}.
+        duration_ms is how long one frame (one runner, or one batch) stays up."""
+        now = time.monotonic() if now is None else now
+        rate = self.arrival_rate(now)
+        base = base_duration_ms / 1000.0
+        needed = rate + depth / self.drain_target if self.drain_target > 0 else rate
+        min_duration = min(self.min_duration, base)
+
+        with self._lock:
+            if not self.enabled or needed <= 0:
+                mode, duration, batch_size = 'single', base, 1
+                self._calm_since = None
+            else:
+                single_capacity = 1.0 / min_duration
+                if self.mode == 'single' and needed > single_capacity:
+                    mode = 'batch'
+                elif self.mode == 'batch' and needed < single_capacity * self.exit_ratio:
+                    if self._calm_since is None:
+                        self._calm_since = now
+                    mode = 'single' if now - self._calm_since >= self.calm_seconds else 'batch'
+                else:
+                    mode = self.mode
+                    if needed >= single_capacity * self.exit_ratio:
+                        self._calm_since = None
+
+                if mode == 'single':
+                    duration, batch_size = max(min_duration, min(base, 1.0 / needed)), 1
+                else:
+                    batch_size = min(self.max_batch_size, max(2, math.ceil(needed * base)))
+                    duration = max(min_duration, min(base, batch_size / needed))
+
+            if mode != self.mode:
+                self.mode = mode
+                self.switches += 1
+                self._calm_since = None
+            self.current = {
+                'mode': mode,
+                'duration_ms': int(duration * 1000),
+                'batch_size': batch_size,
+                'arrival_rate': round(rate, 2),
+                'needed_rate': round(needed, 2),
+                'queue_depth': depth
+            }
+            return self.current
+
+    def load(self, current):
+        """HTTP worker role: take the plan computed by the ingest process"""
+        if current:
+            self.current = current
+            self.mode = current.get('mode', 'single')
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'mode': self.mode,
+            'current': self.current,
+            'arrivals': self.arrivals,
+            'switches': self.switches,
+            'batch_frames': self.batch_frames,
+            'min_duration_seconds': self.min_duration,
+            'drain_target_seconds': self.drain_target,
+            'max_batch_size': self.max_batch_size
+        }
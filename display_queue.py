@@ -0,0 +1,503 @@
+# display_queue.py - Runners waiting to be shown (FIFO or location-priority lanes), with lock-free readers
+import heapq
+import math
+import time
+from collections import deque
+from fnmatch import fnmatchcase
+from threading import Event, Lock
+
+
+class DisplayQueue:
+    """Runners waiting for the display, oldest first, one entry per bib.
+
+    Only writers (ingest threads inserting, the display marking runners as
+    shown, a clear) take the lock, and each holds it for O(1) work plus
+    publishing a new tuple snapshot of at most max_size references. Readers
+    (display polls, status and debug endpoints) use that snapshot without
+    locking, so an HTTP request can never hold up an ingest thread.
+
+    Each change sets the `changed` event. Anything that forwards the queue
+    elsewhere (the state bus) waits on it from its own thread and calls
+    published() for the latest (snapshot, version) pair, so none of its work
+    runs under the lock.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = deque()
+        self._bibs = set()
+        self._lock = Lock()
+        self._snapshot = ()
+        self.version = 0
+        self.pushed = 0
+        self.duplicates = 0
+        self.evicted = 0
+        self.popped = 0
+        self.changed = Event()
+        self._published = ((), 0)  # (snapshot, version), swapped as one reference
+
+    def _publish(self):
+        """Caller holds the lock"""
+        self._snapshot = tuple(self._items)
+        self.version += 1
+        self._published = (self._snapshot, self.version)
+        self.changed.set()
+
+    def push(self, runner):
+        """Append a runner unless its bib is already waiting.
+        Returns (added, evicted runner or None)."""
+        with self._lock:
+            if runner['bib'] in self._bibs:
+                self.duplicates += 1
+                return False, None
+            self._items.append(runner)
+            self._bibs.add(runner['bib'])
+            self.pushed += 1
+            evicted = None
+            if len(self._items) > self.max_size:
+                evicted = self._items.popleft()  # Drop the oldest runner
+                self._bibs.discard(evicted['bib'])
+                self.evicted += 1
+            self._publish()
+            return True, evicted
+
+    def pop(self):
+        """Remove and return the runner at the head, or None if empty"""
+        with self._lock:
+            if not self._items:
+                return None
+            runner = self._items.popleft()
+            self._bibs.discard(runner['bib'])
+            self.popped += 1
+            self._publish()
+            return runner
+
+    def remove(self, bibs):
+        """Remove the runners with these bibs, e.g. the ones a display has just
+        shown; returns the runners removed, in queue order"""
+        with self._lock:
+            wanted = set(bibs) & self._bibs
+            if not wanted:
+                return []
+            removed = []
+            while wanted and self._items[0]['bib'] in wanted:  # Usually they are the head
+                runner = self._items.popleft()
+                wanted.discard(runner['bib'])
+                removed.append(runner)
+            if wanted:
+                kept = deque()
+                for runner in self._items:
+                    (removed if runner['bib'] in wanted else kept).append(runner)
+                self._items = kept
+            for runner in removed:
+                self._bibs.discard(runner['bib'])
+            self.popped += len(removed)
+            self._publish()
+            return removed
+
+    def clear(self):
+        """Empty the queue; returns how many runners were dropped"""
+        with self._lock:
+            count = len(self._items)
+            self._items.clear()
+            self._bibs.clear()
+            self._publish()
+            return count
+
+    # Lock-free readers ------------------------------------------------------
+
+    def snapshot(self):
+        """The waiting runners as an immutable tuple, head first"""
+        return self._snapshot
+
+    def published(self):
+        """(snapshot, version) from the same change"""
+        return self._published
+
+    def head(self):
+        snapshot = self._snapshot
+        return snapshot[0] if snapshot else None
+
+    def __len__(self):
+        return len(self._snapshot)
+
+    def __bool__(self):
+        return bool(self._snapshot)
+
+    def stats(self):
+        return {
+            'size': len(self),
+            'max_size': self.max_size,
+            'version': self.version,
+            'pushed': self.pushed,
+            'duplicates': self.duplicates,
+            'evicted': self.evicted,
+            'popped': self.popped
+        }
+
+
+class Lane:
+    """One location-priority lane of a LaneQueue"""
+
+    __slots__ = ('index', 'name', 'patterns', 'priority', 'weight', 'cap', 'items', 'view', 'pass_value',
+                 'pushed', 'served', 'evicted', 'promoted')
+
+    def __init__(self, name, locations=(), priority=0, weight=1, cap=None, index=0):
+        if weight <= 0:
+            raise ValueError(f'Lane {name!r}: weight must be positive')
+        self.index = index
+        self.name = name
+        self.patterns = tuple(pattern.lower() for pattern in locations)
+        self.priority = priority
+        self.weight = weight
+        self.cap = cap
+        self.items = deque()   # (enqueued_at, runner), oldest first
+        self.view = ()         # Immutable copy of items for lock-free readers
+        self.pass_value = 0.0  # Stride-scheduling position; advances by 1/weight per runner served
+        self.pushed = 0
+        self.served = 0
+        self.evicted = 0
+        self.promoted = 0
+
+    def matches(self, location):
+        return any(fnmatchcase(location, pattern) for pattern in self.patterns)
+
+    def stats(self):
+        return {
+            'size': len(self.items),
+            'cap': self.cap,
+            'priority': self.priority,
+            'weight': self.weight,
+            'locations': list(self.patterns),
+            'pushed': self.pushed,
+            'served': self.served,
+            'evicted': self.evicted,
+            'promoted': self.promoted
+        }
+
+
+def _schedule(lanes, promote_before):
+    """Every runner of (items, priority, weight, pass_value) lanes, in the order
+    a LaneQueue will hand them out, and the enqueue time of the oldest runner
+    not yet overdue (None if there is none): the order holds until that
+    runner is promoted too"""
+    cursors = [0] * len(lanes)
+    order = []
+
+    # Overdue runners first, oldest first across lanes
+    overdue = [(items[0][0], index) for index, (items, _, _, _) in enumerate(lanes)
+               if items and items[0][0] <= promote_before]
+    heapq.heapify(overdue)
+    while overdue:
+        _, index = heapq.heappop(overdue)
+        items, cursor = lanes[index][0], cursors[index]
+        order.append(items[cursor][1])
+        cursors[index] = cursor = cursor + 1
+        if cursor < len(items) and items[cursor][0] <= promote_before:
+            heapq.heappush(overdue, (items[cursor][0], index))
+
+    next_due = min((items[cursors[index]][0] for index, (items, _, _, _) in enumerate(lanes)
+                    if cursors[index] < len(items)), default=None)
+
+    # Then by lane priority, and by weight between lanes of equal priority
+    ready = [(-priority, pass_value, index)
+             for index, (items, priority, _, pass_value) in enumerate(lanes) if cursors[index] < len(items)]
+    heapq.heapify(ready)
+    while ready:
+        priority, pass_value, index = heapq.heappop(ready)
+        items, _, weight, _ = lanes[index]
+        order.append(items[cursors[index]][1])
+        cursors[index] += 1
+        if cursors[index] < len(items):
+            heapq.heappush(ready, (priority, pass_value + 1.0 / weight, index))
+    return order, next_due
+
+
+class LaneQueue(DisplayQueue):
+    """Runners waiting for the display, scheduled across per-location lanes.
+
+    Each read goes to the first lane whose location patterns match (e.g.
+    finish, split*, start), or to the default lane. Higher-priority lanes are
+    served first; lanes of equal priority share the display by weight
+    (stride scheduling, so weight 3 gets three runners for each one of a
+    weight 1 lane). A runner that has waited promote_after seconds jumps
+    ahead of every lane, oldest first, so a busy finish line cannot starve
+    the start mat for ever. Each lane can be capped; past its cap, or past
+    max_size overall, the oldest runner of that lane (or of the lowest
+    priority lane) is dropped.
+
+    Writers keep two heaps of lane heads, one by (priority, pass) and one by
+    how long the head has waited, so pop() finds the next runner in
+    O(log lanes); entries a lane has moved past are dropped when they reach
+    the top. Displays take off the runners they showed with remove(), by
+    bib, so a read that lands in a higher lane while another runner is on
+    screen is never removed in its place.
+
+    Readers get the whole schedule as the snapshot. The first reader after
+    a change works it out from the lanes' immutable copies, outside the
+    lock, and it is cached until the next change or until the next waiting
+    runner becomes due for promotion, whichever comes first.
+    """
+
+    def __init__(self, max_size, lanes, default_lane='other', promote_after=30.0):
+        super().__init__(max_size)
+        self.promote_after = promote_after
+        self._lanes = [Lane(**lane, index=index) for index, lane in enumerate(lanes)]
+        if default_lane not in {lane.name for lane in self._lanes}:
+            self._lanes.append(Lane(default_lane, index=len(self._lanes)))
+        self._default = next(lane for lane in self._lanes if lane.name == default_lane)
+        self._by_location = {}  # location -> Lane, filled in as locations are seen
+        self._bibs = {}         # bib -> Lane
+        self._ready = []        # (-priority, pass_value, lane index) per non-empty lane
+        self._waiting = []      # (head enqueued_at, lane index) per non-empty lane
+        self._virtual_time = 0.0
+        self._size = 0
+        self._state = (0, ())      # (version, lane copies) for readers
+        self._planned = (0, 0.0, ())  # (version, valid until, schedule) worked out by the last reader
+
+    def lane_for(self, location):
+        location = (location or '').lower()
+        lane = self._by_location.get(location)
+        if lane is None:
+            lane = next((lane for lane in self._lanes if lane.matches(location)), self._default)
+            self._by_location[location] = lane
+        return lane
+
+    def _publish(self, *changed):
+        """Caller holds the lock; changed are the lanes whose runners changed"""
+        for lane in changed:
+            lane.view = tuple(lane.items)
+        self.version += 1
+        self._state = (self.version,
+                       tuple((lane.view, lane.priority, lane.weight, lane.pass_value) for lane in self._lanes))
+        self.changed.set()
+
+    # Lane-head heaps (caller holds the lock) --------------------------------
+
+    def _track_head(self, lane):
+        """Enter a lane's current head in both heaps"""
+        if len(self._waiting) > 4 * len(self._lanes):
+            # Mostly stale entries: rebuild from the lanes, amortised O(1) per change
+            live = [lane for lane in self._lanes if lane.items]
+            self._ready = [(-lane.priority, lane.pass_value, lane.index) for lane in live]
+            self._waiting = [(lane.items[0][0], lane.index) for lane in live]
+            heapq.heapify(self._ready)
+            heapq.heapify(self._waiting)
+        elif lane.items:
+            heapq.heappush(self._ready, (-lane.priority, lane.pass_value, lane.index))
+            heapq.heappush(self._waiting, (lane.items[0][0], lane.index))
+
+    def _top(self, heap, key):
+        """The lane at the top of a heap, dropping entries that no longer match key(lane)"""
+        while heap:
+            entry = heap[0]
+            lane = self._lanes[entry[-1]]
+            if lane.items and entry[-2] == key(lane):
+                return lane
+            heapq.heappop(heap)
+        return None
+
+    def _next_lane(self, now):
+        """The lane pop() serves from next"""
+        oldest = self._top(self._waiting, _head_time)
+        if oldest is not None and oldest.items[0][0] <= now - self.promote_after:
+            return oldest
+        return self._top(self._ready, _pass_value)
+
+    def _served(self, lane, runner, enqueued_at, now):
+        """Account for a runner that left its lane because it was shown"""
+        del self._bibs[runner['bib']]
+        if now - enqueued_at >= self.promote_after:
+            lane.promoted += 1
+        else:
+            self._virtual_time = max(lane.pass_value, self._virtual_time)
+            lane.pass_value = self._virtual_time + 1.0 / lane.weight
+        lane.served += 1
+        self._size -= 1
+        self.popped += 1
+
+    # Writers ------------------------------------------------------------------
+
+    def push(self, runner):
+        """Add a runner to its location's lane unless its bib is already waiting.
+        Returns (added, evicted runner or None)."""
+        with self._lock:
+            if runner['bib'] in self._bibs:
+                self.duplicates += 1
+                return False, None
+            lane = self.lane_for(runner.get('location'))
+            was_empty = not lane.items
+            if was_empty:
+                lane.pass_value = max(lane.pass_value, self._virtual_time)  # No credit for time spent idle
+            lane.items.append((time.monotonic(), runner))
+            lane.pushed += 1
+            self._bibs[runner['bib']] = lane
+            self._size += 1
+            self.pushed += 1
+            if was_empty:
+                self._track_head(lane)
+            evicted, changed = None, [lane]
+            if lane.cap is not None and len(lane.items) > lane.cap:
+                evicted = self._evict(lane)
+            elif self._size > self.max_size:
+                lowest = min((lane for lane in self._lanes if lane.items), key=lambda lane: lane.priority)
+                evicted = self._evict(lowest)
+                if lowest is not lane:
+                    changed.append(lowest)
+            self._publish(*changed)
+            return True, evicted
+
+    def _evict(self, lane):
+        _, runner = lane.items.popleft()
+        del self._bibs[runner['bib']]
+        self._size -= 1
+        lane.evicted += 1
+        self.evicted += 1
+        self._track_head(lane)
+        return runner
+
+    def pop(self):
+        """Remove and return the runner the schedule serves next, or None if empty"""
+        with self._lock:
+            now = time.monotonic()
+            lane = self._next_lane(now)
+            if lane is None:
+                return None
+            enqueued_at, runner = lane.items.popleft()
+            self._served(lane, runner, enqueued_at, now)
+            self._track_head(lane)
+            self._publish(lane)
+            return runner
+
+    def remove(self, bibs):
+        """Remove the runners with these bibs (the ones a display has just shown),
+        each counted as served by its lane; returns them"""
+        with self._lock:
+            now = time.monotonic()
+            removed, changed = [], []
+            for bib in dict.fromkeys(bibs):
+                lane = self._bibs.get(bib)
+                if lane is None:
+                    continue
+                if lane.items[0][1]['bib'] == bib:
+                    enqueued_at, runner = lane.items.popleft()
+                else:
+                    position = next(index for index, (_, queued) in enumerate(lane.items) if queued['bib'] == bib)
+                    enqueued_at, runner = lane.items[position]
+                    del lane.items[position]
+                self._served(lane, runner, enqueued_at, now)
+                removed.append(runner)
+                if lane not in changed:
+                    changed.append(lane)
+            if removed:
+                for lane in changed:
+                    self._track_head(lane)
+                self._publish(*changed)
+            return removed
+
+    def clear(self):
+        """Empty every lane; returns how many runners were dropped"""
+        with self._lock:
+            count = self._size
+            for lane in self._lanes:
+                lane.items.clear()
+                lane.pass_value = 0.0
+            self._bibs.clear()
+            self._ready.clear()
+            self._waiting.clear()
+            self._virtual_time = 0.0
+            self._size = 0
+            self._publish(*self._lanes)
+            return count
+
+    # Lock-free readers --------------------------------------------------------
+
+    def published(self):
+        version, lanes = self._state
+        cached_version, valid_until, schedule = self._planned
+        now = time.monotonic()
+        if cached_version != version or now >= valid_until:
+            order, next_due = _schedule(lanes, now - self.promote_after)
+            schedule = tuple(order)
+            valid_until = math.inf if next_due is None else next_due + self.promote_after
+            self._planned = (version, valid_until, schedule)
+        return schedule, version
+
+    def snapshot(self):
+        return self.published()[0]
+
+    def head(self):
+        snapshot = self.snapshot()
+        return snapshot[0] if snapshot else None
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def stats(self):
+        stats = super().stats()
+        stats['promote_after'] = self.promote_after
+        stats['lanes'] = {lane.name: lane.stats() for lane in self._lanes}
+        return stats
+
+
+def _head_time(lane):
+    return lane.items[0][0]
+
+
+def _pass_value(lane):
+    return lane.pass_value
+
+
+class MirroredQueue:
+    """Read-only copy of another process's DisplayQueue.
+
+    HTTP workers in multi-process mode load whole snapshots published by the
+    ingest process; versions that arrive out of order are ignored. Offers the
+    same lock-free readers as DisplayQueue.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._snapshot = ()
+        self.version = 0
+        self._published = ((), 0)
+        self.loads = 0
+
+    def load(self, runners, version, force=False):
+        """Replace the mirrored contents; force for a full resync (the ingest
+        process may have restarted and begun counting versions again)"""
+        if version <= self.version and not force:
+            return False
+        self._snapshot = tuple(runners)
+        self.version = version
+        self._published = (self._snapshot, version)
+        self.loads += 1
+        return True
+
+    def snapshot(self):
+        return self._snapshot
+
+    def published(self):
+        return self._published
+
+    def head(self):
+        snapshot = self._snapshot
+        return snapshot[0] if snapshot else None
+
+    def __len__(self):
+        return len(self._snapshot)
+
+    def __bool__(self):
+        return bool(self._snapshot)
+
+    def stats(self):
+        return {
+            'size': len(self._snapshot),
+            'max_size': self.max_size,
+            'version': self.version,
+            'loads': self.loads,
+            'mirrored': True
+        }
@@ -0,0 +1,190 @@
+# event_buffer.py - Bounded ring buffer of processed reads for the SSE streams
+import time
+from bisect import bisect_left
+from threading import Condition
+
+POLICIES = ('drop_oldest', 'coalesce', 'block')
+
+
+class Subscription:
+    """One reader's position in an EventBuffer"""
+
+    __slots__ = ('cursor', 'missed', 'delivered')
+
+    def __init__(self, cursor):
+        self.cursor = cursor   # Sequence number of the next event to read
+        self.missed = 0        # Events overwritten before this reader got to them
+        self.delivered = 0
+
+
+class EventBuffer:
+    """Fixed-capacity buffer of events, each tagged with a sequence number.
+
+    Every subscriber reads every event from its own cursor, so any number of
+    /stream connections see the same reads, and a subscriber that connects
+    late (or an EventSource reconnecting with Last-Event-ID) can replay
+    whatever is still in the ring. Memory is bounded by capacity whether or
+    not anyone is reading. When the ring is full the policy decides:
+
+    - drop_oldest: overwrite the oldest event.
+    - coalesce: first replace an undelivered event with the same key (bib)
+      by the new one, so a backlog holds only the latest read per runner;
+      overwrite the oldest if there is no such event. Nothing is coalesced
+      while there is room.
+    - block: wait up to block_timeout for the slowest subscriber to make
+      room, then overwrite the oldest. With no subscribers nothing can make
+      room, so this behaves like drop_oldest.
+
+    Events are held in sequence order in a list, so a coalesced event leaves
+    no hole: capacity counts the events actually held, and readers find
+    their cursor by bisection.
+    """
+
+    def __init__(self, capacity=1000, policy='drop_oldest', block_timeout=0.5):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}: expected one of {', '.join(POLICIES)}")
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.capacity = capacity
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._seqs = []     # Sequence numbers of the held events, ascending
+        self._entries = []  # (key, data), parallel to _seqs
+        self._first = 1     # Lowest sequence number not yet evicted
+        self._next = 1      # Sequence number the next event gets
+        self._keys = {}     # key -> sequence number of its latest event
+        self._subscribers = set()
+        self._cond = Condition()
+        self.published = 0
+        self.evicted = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.blocked = 0
+        self.block_timeouts = 0
+
+    # Writers -------------------------------------------------------------
+
+    def publish(self, data, key=None):
+        """Append an event; returns its sequence number"""
+        with self._cond:
+            if len(self._seqs) >= self.capacity:
+                if self.policy == 'coalesce' and key is not None:
+                    self._coalesce(key)
+                elif self.policy == 'block' and self._subscribers:
+                    self._wait_for_room()
+                if len(self._seqs) >= self.capacity:
+                    self._evict_oldest()
+            seq = self._next
+            self._seqs.append(seq)
+            self._entries.append((key, data))
+            if key is not None:
+                self._keys[key] = seq
+            self._next += 1
+            self.published += 1
+            self._cond.notify_all()
+            return seq
+
+    def _coalesce(self, key):
+        """Drop the earlier event for key if no subscriber has read it yet"""
+        seq = self._keys.get(key)
+        if seq is None:
+            return
+        delivered_to = max((sub.cursor for sub in self._subscribers), default=0)
+        if seq >= delivered_to:
+            index = bisect_left(self._seqs, seq)
+            del self._seqs[index]
+            del self._entries[index]
+            del self._keys[key]
+            self.coalesced += 1
+
+    def _wait_for_room(self):
+        deadline = time.monotonic() + self.block_timeout
+        self.blocked += 1
+        while self._subscribers and min(sub.cursor for sub in self._subscribers) <= self._seqs[0]:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.block_timeouts += 1
+                return
+            self._cond.wait(remaining)
+
+    def _evict_oldest(self):
+        seq = self._seqs.pop(0)
+        key, _ = self._entries.pop(0)
+        self.evicted += 1
+        if any(sub.cursor <= seq for sub in self._subscribers):
+            self.dropped += 1  # Someone had not read it yet
+        if key is not None and self._keys.get(key) == seq:
+            del self._keys[key]
+        self._first = seq + 1
+
+    def clear(self):
+        with self._cond:
+            self._seqs.clear()
+            self._entries.clear()
+            self._keys.clear()
+            self._first = self._next
+
+    # Readers -------------------------------------------------------------
+
+    def subscribe(self, after=None, replay=0):
+        """Start reading after sequence number `after` (e.g. an SSE Last-Event-ID),
+        or with the last `replay` events still in the ring, or live from now"""
+        with self._cond:
+            if after is not None:
+                cursor = after + 1
+            elif replay > 0 and self._seqs:
+                cursor = self._seqs[-min(replay, len(self._seqs))]
+            else:
+                cursor = self._next
+            sub = Subscription(min(max(cursor, self._first), self._next))
+            if after is not None and after + 1 < self._first:
+                sub.missed = self._first - (after + 1)
+            self._subscribers.add(sub)
+            return sub
+
+    def unsubscribe(self, sub):
+        with self._cond:
+            self._subscribers.discard(sub)
+            self._cond.notify_all()  # A blocked writer may now have room
+
+    def read(self, sub, timeout=1.0, limit=100):
+        """Wait up to timeout for events after the subscriber's cursor.
+        Returns a list of (seq, data), empty on timeout."""
+        with self._cond:
+            if sub.cursor >= self._next:
+                self._cond.wait_for(lambda: sub.cursor < self._next, timeout)
+            if sub.cursor < self._first:
+                sub.missed += self._first - sub.cursor  # Overwritten while this reader lagged
+                sub.cursor = self._first
+            start = bisect_left(self._seqs, sub.cursor)
+            end = min(len(self._seqs), start + limit)
+            events = [(self._seqs[index], self._entries[index][1]) for index in range(start, end)]
+            sub.cursor = events[-1][0] + 1 if end < len(self._seqs) else self._next
+            if events:
+                sub.delivered += len(events)
+                if self.policy == 'block':
+                    self._cond.notify_all()  # Let a blocked writer re-check for room
+            return events
+
+    def __len__(self):
+        return len(self._seqs)
+
+    def stats(self):
+        with self._cond:
+            subscribers = [{'cursor': sub.cursor, 'lag': self._next - sub.cursor,
+                            'missed': sub.missed, 'delivered': sub.delivered}
+                           for sub in self._subscribers]
+            return {
+                'capacity': self.capacity,
+                'policy': self.policy,
+                'size': len(self._seqs),
+                'first_seq': self._first,
+                'last_seq': self._next - 1,
+                'published': self.published,
+                'evicted': self.evicted,
+                'dropped': self.dropped,
+                'coalesced': self.coalesced,
+                'blocked': self.blocked,
+                'block_timeouts': self.block_timeouts,
+                'subscribers': subscribers
+            }
@@ -502,6 +502,53 @@ function buildCompleteTemplate(editor, {
 
 /* ───────────── CRUD wrappers ───────────── */
 
+/* Last version of each template known to be on the server, as
+   { revision, data }, so a save can send only what changed */
+const savedRevisions = new Map();
+
+const rememberRevision = (name, revision, data) => {
+  if (revision) savedRevisions.set(name, { revision, data: JSON.parse(JSON.stringify(data)) });
+  else savedRevisions.delete(name);
+};
+
+/* Keys the server sets itself; a patch never changes them */
+const SERVER_KEYS = new Set(['name', 'version']);
+const SPLICE_MIN_LENGTH = 512;
+
+const isPlainObject = (value) =>
+  value !== null && typeof value === 'object' && !Array.isArray(value);
+
+/* One {"$splice"} edit replacing the changed middle of a long string.
+   Offsets are code points on the server, so strings with astral
+   characters (surrogate pairs) are sent whole. */
+const diffString = (base, next) => {
+  if (next.length < SPLICE_MIN_LENGTH || /[\uD800-\uDFFF]/.test(base + next)) return next;
+  let start = 0;
+  while (start < base.length && start < next.length && base[start] === next[start]) start++;
+  let end = 0;
+  while (end < base.length - start && end < next.length - start
+         && base[base.length - 1 - end] === next[next.length - 1 - end]) end++;
+  const insert = next.slice(start, next.length - end);
+  if (insert.length > next.length / 2) return next;
+  return { $splice: [[start, base.length - start - end, insert]] };
+};
+
+/* RFC 7396 merge patch turning base into next (null deletes a key) */
+const diffTemplate = (base, next) => {
+  if (typeof base === 'string' && typeof next === 'string') return diffString(base, next);
+  if (!isPlainObject(base) || !isPlainObject(next)) return next;
+  const patch = {};
+  Object.keys(base).forEach((key) => {
+    if (next[key] === undefined) patch[key] = null;
+  });
+  Object.entries(next).forEach(([key, value]) => {
+    if (value === undefined) return;
+    if (!(key in base)) patch[key] = value;
+    else if (JSON.stringify(base[key]) !== JSON.stringify(value)) patch[key] = diffTemplate(base[key], value);
+  });
+  return patch;
+};
+
 /** GET /api/templates → [string] */
 async function fetchTemplates() {
   const res  = await fetch('/api/templates');
@@ -513,10 +560,43 @@ async function fetchTemplates() {
 async function fetchTemplate(name) {
   const res = await fetch(`/api/templates/${encodeURIComponent(name)}`);
   if (!res.ok) throw new Error(`Template "${name}" not found`);
+  const template = await res.json();
+  rememberRevision(name, res.headers.get('X-Template-Revision'), template);
+  return template;
+}
+
+/** PATCH /api/templates/:name with only what changed since the last known
+    revision; null if there is no base or the server has moved on (409) */
+async function patchTemplate(name, payload) {
+  const saved = savedRevisions.get(name);
+  if (!saved) return null;
+  const changes = diffTemplate(saved.data, payload);
+  SERVER_KEYS.forEach((key) => delete changes[key]);
+  if (Object.keys(changes).length === 0) {
+    log('💾 Template unchanged since revision', saved.revision);
+    return { success: true, revision: saved.revision };
+  }
+
+  const res = await fetch(`/api/templates/${encodeURIComponent(name)}`, {
+    method : 'PATCH',
+    headers: { 'Content-Type': 'application/json' },
+    body   : JSON.stringify({ base: saved.revision, changes }),
+  });
+  if (res.status === 409 || res.status === 404) {
+    log('💾 Server template changed or missing; sending it in full');
+    savedRevisions.delete(name);
+    return null;
+  }
+  if (!res.ok) {
+    const errorText = await res.text();
+    console.error('💾 Server error:', res.status, errorText);
+    throw new Error(`Failed to save template "${name}"`);
+  }
   return res.json();
 }
 
-/** POST /api/templates (create or overwrite) */
+/** Save a template: a merge patch against the last known revision when
+    there is one, else POST /api/templates (create or overwrite) */
 async function saveTemplate({
   editor,
   name,
@@ -584,6 +664,13 @@ async function saveTemplate({
       throw new Error('No active state content to save');
     }
     
+    const patched = await patchTemplate(name, serializablePayload);
+    if (patched) {
+      rememberRevision(name, patched.revision, serializablePayload);
+      log('💾 Template patched successfully:', patched);
+      return patched;
+    }
+
     log('💾 Sending template to server...');
     const res = await fetch('/api/templates', {
       method : 'POST',
@@ -598,6 +685,7 @@ async function saveTemplate({
     }
     
     const result = await res.json();
+    rememberRevision(name, result.revision, serializablePayload);
     log('💾 Template saved successfully:', result);
     return result;
   } catch (error) {
@@ -612,6 +700,7 @@ async function deleteTemplate(name) {
     method: 'DELETE',
   });
   if (!res.ok) throw new Error(`Failed to delete template "${name}"`);
+  savedRevisions.delete(name);
 }
 
 /* ───────────── Display-mode helper ───────────── */
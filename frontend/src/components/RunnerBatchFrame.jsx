@@ -0,0 +1,45 @@
+import React from 'react';
+import 'animate.css';
+
+// Several runners on one screen, used while the server's pacing is in batch
+// mode because runners are arriving faster than one-at-a-time can show them
+export default function RunnerBatchFrame({ runners }) {
+  const columns = runners.length > 4 ? 3 : 2;
+
+  return (
+    <div style={{
+      width: '100vw',
+      height: '100vh',
+      backgroundColor: '#000',
+      color: '#fff',
+      display: 'grid',
+      gridTemplateColumns: `repeat(${columns}, 1fr)`,
+      gap: '2vh',
+      padding: '4vh',
+      boxSizing: 'border-box',
+      alignContent: 'center'
+    }}>
+      {runners.map((runner) => (
+        <div
+          key={runner.bib}
+          className="animate__animated animate__fadeIn"
+          style={{
+            border: '2px solid rgba(255, 255, 255, 0.2)',
+            borderRadius: '12px',
+            padding: '3vh 2vw',
+            textAlign: 'center',
+            overflow: 'hidden'
+          }}
+        >
+          <div style={{ fontSize: '5vh', fontWeight: 'bold', whiteSpace: 'nowrap', textOverflow: 'ellipsis', overflow: 'hidden' }}>
+            {runner.name || `${runner.first_name || ''} ${runner.last_name || ''}`.trim() || `Bib ${runner.bib}`}
+          </div>
+          <div style={{ fontSize: '3vh', opacity: 0.8, marginTop: '1vh' }}>
+            #{runner.bib}
+            {runner.city ? ` · ${runner.city}${runner.state ? `, ${runner.state}` : ''}` : ''}
+          </div>
+        </div>
+      ))}
+    </div>
+  );
+}
@@ -3,7 +3,7 @@ import TemplateViewer from './TemplateViewer';
 import './RunnerDisplay.css';
 import 'animate.css';
 
-export default function RunnerDisplay({ runner, template }) {
+export default function RunnerDisplay({ runner, template, upcoming = [] }) {
   const [isFullscreen, setIsFullscreen] = useState(false);
   const [displayRunner, setDisplayRunner] = useState(null);
   const [isReady, setIsReady] = useState(false);
@@ -14,6 +14,7 @@ export default function RunnerDisplay({ runner, template }) {
   const resizeTimeoutRef = useRef(null);
   const isResizingRef = useRef(false);
   const processingRef = useRef(false);
+  const prebuiltRef = useRef(null); // Next runner's frame, bound ahead of time: { bib, messageIndex, template, html }
 
   // Plain shrinkToFit utility with logging and !important
   const shrinkToFit = (el, minFontSize = 8, step = 0.5) => {
@@ -96,119 +97,137 @@ export default function RunnerDisplay({ runner, template }) {
     });
   };
 
-  // Pre-process template with runner data and prepare animations
-  const preprocessTemplate = useCallback((runnerData, templateData, currentMessageIndex) => {
-    if (!templateData) return null;
+  // Compile a template once: parse it into a hidden, laid-out copy of the canvas,
+  // apply the animation classes and note each placeholder slot, so binding a
+  // runner only has to fill the slots and size their text
+  const compileTemplate = useCallback((templateData) => {
+    console.log('[RunnerDisplay] Compiling template');
 
-    console.log('[RunnerDisplay] Pre-processing template:', {
-      hasRunnerData: !!runnerData,
-      runnerName: runnerData?.first_name || runnerData?.name,
-      messageIndex: currentMessageIndex
-    });
-    
-    // Create a temporary DOM element to process the template
-    const tempDiv = document.createElement('div');
-    tempDiv.innerHTML = templateData.html;
-    
-    // Add the template CSS to the temp div for proper sizing calculations
+    const root = document.createElement('div');
+    root.innerHTML = templateData.html;
+
+    // Add the template CSS for proper sizing calculations
     const styleElement = document.createElement('style');
     styleElement.textContent = templateData.css || '';
-    tempDiv.appendChild(styleElement);
-    
-    // Add the temp div to the document temporarily for sizing calculations
-    tempDiv.style.position = 'absolute';
-    tempDiv.style.visibility = 'hidden';
-    tempDiv.style.top = '-9999px';
-    tempDiv.style.left = '-9999px';
-    tempDiv.style.width = '100%';
-    tempDiv.style.height = '100%';
-    
-    // Set up proper canvas dimensions for sizing calculations
+    root.appendChild(styleElement);
+
+    // Keep it in the document, off screen, at the canvas size
     const canvasWidth = templateData.canvasWidth || 1920;
     const canvasHeight = templateData.canvasHeight || 1080;
-    tempDiv.style.width = `${canvasWidth}px`;
-    tempDiv.style.height = `${canvasHeight}px`;
-    
-    document.body.appendChild(tempDiv);
-    
+    root.style.position = 'absolute';
+    root.style.visibility = 'hidden';
+    root.style.top = '-9999px';
+    root.style.left = '-9999px';
+    root.style.width = `${canvasWidth}px`;
+    root.style.height = `${canvasHeight}px`;
+    document.body.appendChild(root);
+
     // Force a reflow to ensure CSS is applied
-    tempDiv.offsetHeight;
-    
-    // Find and process all placeholders
-    const placeholders = tempDiv.querySelectorAll('[data-placeholder]');
-    
-    placeholders.forEach((node) => {
-      const key = node.getAttribute('data-placeholder');
-      let value = runnerData ? runnerData[key] : undefined;
-      
-      if (key === 'custom_message') {
-        const msgs = node.getAttribute('data-messages') || '';
-        const messages = msgs.split(',').map(m => m.trim()).filter(m => m);
-        if (messages.length) {
-          // Use the passed message index instead of storing it on the DOM element
-          value = messages[currentMessageIndex % messages.length];
-        } else {
-          value = '';
-        }
-      }
-      
-      if (value !== undefined) {
-        if (node.tagName === 'IMG') {
-          node.src = value;
-        } else {
-          node.textContent = value || '';
-        }
-      } else if (runnerData) {
-        // If we have runner data but no value for this placeholder, clear it
-        if (node.tagName === 'IMG') {
-          node.src = '';
-        } else {
-          node.textContent = '';
-        }
-      }
-      // If no runner data, leave placeholders as-is for resting state
+    root.offsetHeight;
 
-      // Pre-calculate text sizing for text elements (only if we have content)
-      if (node.tagName !== 'IMG' && (value !== undefined || !runnerData)) {
-        const preCalculatedFontSize = preCalculateTextSize(node, 6, 0.5);
-        if (preCalculatedFontSize) {
-          node.style.setProperty('font-size', `${preCalculatedFontSize}px`, 'important');
-          node.style.setProperty('white-space', 'nowrap', 'important');
-          if (preCalculatedFontSize < parseFloat(node.dataset.originalFontSize || '16')) {
-            node.style.setProperty('text-overflow', 'ellipsis', 'important');
-            node.style.setProperty('overflow', 'hidden', 'important');
-          }
-        }
+    const slots = Array.from(root.querySelectorAll('[data-placeholder]'), (node) => {
+      const key = node.getAttribute('data-placeholder');
+      const isImage = node.tagName === 'IMG';
+      if (!isImage && !node.dataset.originalFontSize) {
+        node.dataset.originalFontSize = parseFloat(window.getComputedStyle(node).fontSize);
       }
 
-      // Pre-apply animation classes and styles to the HTML
+      // Animation classes and styles do not depend on the runner
       const anim = node.getAttribute('data-anim');
       if (anim && anim.trim() !== '') {
         const duration = parseInt(node.getAttribute('data-anim-dur')) || 1000;
         const delay = parseInt(node.getAttribute('data-anim-delay')) || 0;
-        
+
         // Sanitize the animation name to remove whitespace for CSS class compatibility
         const sanitizedAnim = anim.trim().replace(/\s+/g, '');
-        
-        // Add animation classes directly to the HTML
         node.classList.add('animate__animated', `animate__${sanitizedAnim}`);
-        
-        // Add animation styles directly to the element
         node.style.setProperty('--animate-duration', `${duration}ms`);
         node.style.setProperty('--animate-delay', `${delay}ms`);
       }
+
+      const messages = key === 'custom_message'
+        ? (node.getAttribute('data-messages') || '').split(',').map(m => m.trim()).filter(m => m)
+        : null;
+      return {
+        node,
+        key,
+        isImage,
+        messages,
+        placeholder: isImage ? node.getAttribute('src') : node.textContent
+      };
     });
 
-    // Get the processed HTML
-    const processedHtml = tempDiv.innerHTML;
-    
-    // Clean up the temporary element
-    document.body.removeChild(tempDiv);
+    return { template: templateData, root, slots };
+  }, []);
+
+  const compiledRef = useRef(null); // { template, root, slots } for the current template
 
-    // Return the processed HTML
-    return processedHtml;
+  const getCompiled = useCallback((templateData) => {
+    const compiled = compiledRef.current;
+    if (compiled && compiled.template === templateData) return compiled;
+    if (compiled) compiled.root.remove();
+    compiledRef.current = compileTemplate(templateData);
+    return compiledRef.current;
+  }, [compileTemplate]);
+
+  // Drop the compiled copy with the component
+  useEffect(() => () => {
+    if (compiledRef.current) compiledRef.current.root.remove();
+    compiledRef.current = null;
   }, []);
 
+  // Bind runner data into the compiled template and return the frame's html
+  const bindTemplate = useCallback((runnerData, templateData, currentMessageIndex) => {
+    if (!templateData) return null;
+
+    console.log('[RunnerDisplay] Binding runner into template:', {
+      hasRunnerData: !!runnerData,
+      runnerName: runnerData?.first_name || runnerData?.name,
+      messageIndex: currentMessageIndex
+    });
+
+    const { root, slots } = getCompiled(templateData);
+
+    slots.forEach(({ node, key, isImage, messages, placeholder }) => {
+      let value = runnerData ? runnerData[key] : undefined;
+      if (messages) {
+        // Use the passed message index instead of storing it on the DOM element
+        value = messages.length ? messages[currentMessageIndex % messages.length] : '';
+      }
+
+      if (value === undefined && !runnerData) {
+        // No runner data: leave the placeholder as designed (resting state)
+        value = placeholder;
+      }
+      if (isImage) {
+        node.src = value || '';
+        return;
+      }
+      node.textContent = value || '';
+
+      // Size text to fit (only if we have content); a slot keeps no sizing from the last runner
+      node.style.removeProperty('text-overflow');
+      node.style.removeProperty('overflow');
+      if (value !== undefined) {
+        const preCalculatedFontSize = preCalculateTextSize(node, 6, 0.5);
+        if (preCalculatedFontSize) {
+          node.style.setProperty('font-size', `${preCalculatedFontSize}px`, 'important');
+          node.style.setProperty('white-space', 'nowrap', 'important');
+          if (preCalculatedFontSize < parseFloat(node.dataset.originalFontSize || '16')) {
+            node.style.setProperty('text-overflow', 'ellipsis', 'important');
+            node.style.setProperty('overflow', 'hidden', 'important');
+          }
+        }
+      } else {
+        node.style.removeProperty('font-size');
+        node.style.removeProperty('white-space');
+      }
+    });
+
+    // The frame is the template's markup, without the sizing copy's wrapper
+    return root.innerHTML;
+  }, [getCompiled]);
+
   // Pre-calculate text size without DOM manipulation
   const preCalculateTextSize = (element, minFontSize = 8, step = 0.5) => {
     if (!element) return null;
@@ -283,13 +302,18 @@ export default function RunnerDisplay({ runner, template }) {
     processingRef.current = true;
     setIsReady(false);
     
-    // If we have runner data, pre-process the template with it
+    // If we have runner data, bind it into the compiled template
     if (runner) {
       // Increment message counter for each new runner
       const newMessageIndex = messageCounter + 1;
       setMessageCounter(newMessageIndex);
       
-      const processedHtml = preprocessTemplate(runner, template, newMessageIndex);
+      const prebuilt = prebuiltRef.current;
+      const processedHtml = prebuilt && prebuilt.bib === runner.bib && prebuilt.template === template
+        && prebuilt.messageIndex === newMessageIndex
+        ? prebuilt.html
+        : bindTemplate(runner, template, newMessageIndex);
+      prebuiltRef.current = null;
       
       if (processedHtml) {
         // Create processed template object (don't modify original)
@@ -322,7 +346,31 @@ export default function RunnerDisplay({ runner, template }) {
         processingRef.current = false;
       }, 50);
     }
-  }, [runner, template, preprocessTemplate, messageCounter]);
+  }, [runner, template, bindTemplate, messageCounter]);
+
+  // Look-ahead: while this frame is up, bind the next runner into the template
+  // when the browser is idle, so the switch does not wait on parsing and sizing
+  useEffect(() => {
+    if (!template || !isReady) return;
+    const next = upcoming.find((r) => r.bib !== runner?.bib);
+    if (!next) return;
+    const messageIndex = messageCounter + 1;
+    const prebuilt = prebuiltRef.current;
+    if (prebuilt && prebuilt.bib === next.bib && prebuilt.template === template && prebuilt.messageIndex === messageIndex) {
+      return;
+    }
+    const schedule = window.requestIdleCallback || ((callback) => setTimeout(callback, 0));
+    const cancel = window.cancelIdleCallback || clearTimeout;
+    const handle = schedule(() => {
+      prebuiltRef.current = {
+        bib: next.bib,
+        messageIndex,
+        template,
+        html: bindTemplate(next, template, messageIndex)
+      };
+    });
+    return () => cancel(handle);
+  }, [upcoming, isReady, template, runner, messageCounter, bindTemplate]);
 
   // Apply text resizing to the displayed runner (only after template is ready)
   useEffect(() => {
@@ -330,13 +378,13 @@ export default function RunnerDisplay({ runner, template }) {
 
     console.log('[RunnerDisplay] Template is ready for display:', displayRunner.first_name || displayRunner.name);
 
-    // Text resizing is now handled during pre-processing, so we just need to ensure
+    // Text resizing is now handled while binding, so we just need to ensure
     // the template is properly displayed. The animations and text sizing are already
     // applied in the processed HTML.
     
     // Optional: Add any additional post-display processing here if needed
     // For now, we just log that the template is ready
-    console.log('[RunnerDisplay] Template ready for display with pre-processed content');
+    console.log('[RunnerDisplay] Template ready for display with bound content');
   }, [isReady, displayRunner, processedTemplate]);
 
   // Calculate stage transform
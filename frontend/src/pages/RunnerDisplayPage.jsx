@@ -1,5 +1,40 @@
-import React, { useState, useEffect, useRef } from 'react';
+import React, { useState, useEffect, useRef, useMemo } from 'react';
 import RunnerDisplay from '../components/RunnerDisplay';
+import RunnerBatchFrame from '../components/RunnerBatchFrame';
+
+// ?channel=<name> shows only that display channel's runners (e.g. one race or one mat)
+const params = new URLSearchParams(window.location.search);
+const channel = params.get('channel');
+const queueApi = channel ? `/api/channels/${encodeURIComponent(channel)}` : '/api';
+// ?template=<saved template name> takes the asset manifest from the server instead of the local copy
+const templateName = params.get('template');
+const LOOKAHEAD_RUNNERS = 3;
+
+const NON_IMAGE_URL = /\.(css|js|woff2?|ttf|otf)(\?.*)?$/i;
+const CSS_URL = /url\(\s*(['"]?)(.*?)\1\s*\)/gi;
+
+// Same manifest as /api/templates/<name>/assets, built once from the template held in localStorage
+const buildAssetManifest = (template) => {
+  const urls = new Set();
+  const runnerFields = new Set();
+  const states = template.activeState ? [template.activeState, template.restingState] : [template];
+  states.filter(Boolean).forEach((state) => {
+    const doc = new DOMParser().parseFromString(state.html || '', 'text/html');
+    doc.querySelectorAll('[src], [poster], [style]').forEach((node) => {
+      if (node.tagName === 'IMG' && node.hasAttribute('data-placeholder')) {
+        runnerFields.add(node.getAttribute('data-placeholder'));
+      }
+      ['src', 'poster'].forEach((name) => node.getAttribute(name) && urls.add(node.getAttribute(name)));
+      for (const match of (node.getAttribute('style') || '').matchAll(CSS_URL)) urls.add(match[2]);
+    });
+    const css = (state.css || '') + Array.from(doc.querySelectorAll('style')).map((el) => el.textContent).join('\n');
+    for (const match of css.matchAll(CSS_URL)) urls.add(match[2]);
+  });
+  return {
+    urls: Array.from(urls).filter((url) => url && !url.startsWith('data:') && !url.includes('{{')),
+    runnerFields: Array.from(runnerFields)
+  };
+};
 
 export default function RunnerDisplayPage() {
   const [runner, setRunner] = useState(null);
@@ -7,12 +42,18 @@ export default function RunnerDisplayPage() {
   const [displayDuration, setDisplayDuration] = useState(5000); // Default 5 seconds
   const [currentDisplayState, setCurrentDisplayState] = useState('resting'); // 'active' or 'resting'
   const [lastRunnerTime, setLastRunnerTime] = useState(0);
+  const [batch, setBatch] = useState([]); // Runners shown together in batch mode (surges)
+  const [upcoming, setUpcoming] = useState([]); // Look-ahead: next runners, pre-bound by RunnerDisplay
   
   // Refs for managing timers and state
   const activeStateTimerRef = useRef(null);
   const pollingIntervalRef = useRef(null);
   const currentStateRef = useRef('resting'); // Track actual state synchronously
   const currentRunnerRef = useRef(null); // Track current runner synchronously
+  const currentBatchRef = useRef([]); // Runners on screen, removed together when the frame ends
+  const upcomingVersionRef = useRef(null);
+  const warmedAssetsRef = useRef(new Set());
+  const assetManifestRef = useRef(null);
 
   // Load display duration from API
   useEffect(() => {
@@ -84,6 +125,53 @@ export default function RunnerDisplayPage() {
     }
   }, []);
 
+  // Local asset manifest, parsed once per template rather than once per runner
+  const localAssetManifest = useMemo(() => (template ? buildAssetManifest(template) : null), [template]);
+  assetManifestRef.current = localAssetManifest;
+
+  // Start downloading an asset so it is already in the browser cache when the frame shows
+  const warmAsset = (url) => {
+    if (!url || warmedAssetsRef.current.has(url)) return;
+    warmedAssetsRef.current.add(url);
+    if (!NON_IMAGE_URL.test(url)) {
+      const img = new Image();
+      img.src = url;
+      if (img.decode) img.decode().catch(() => {});
+    } else {
+      const link = document.createElement('link');
+      link.rel = 'prefetch';
+      link.href = url;
+      document.head.appendChild(link);
+    }
+  };
+
+  // Look-ahead: the next runners in the queue and the assets they need. The
+  // response carries the queue version as its ETag, so polling an unchanged
+  // queue costs a 304.
+  const loadUpcoming = async () => {
+    try {
+      const templateParam = templateName ? `&template=${encodeURIComponent(templateName)}` : '';
+      const response = await fetch(`${queueApi}/upcoming?n=${LOOKAHEAD_RUNNERS + 1}${templateParam}`);
+      if (!response.ok) return;
+      const data = await response.json();
+      if (data.version === upcomingVersionRef.current) return;
+      upcomingVersionRef.current = data.version;
+      
+      const onScreen = new Set(currentBatchRef.current.map((r) => r.bib));
+      const next = (data.runners || []).filter((r) => !onScreen.has(r.bib));
+      setUpcoming(next);
+      
+      let urls = data.assets;
+      if (!urls && assetManifestRef.current) {
+        const manifest = assetManifestRef.current;
+        urls = manifest.urls.concat(next.flatMap((r) => manifest.runnerFields.map((key) => r[key])));
+      }
+      (urls || []).forEach(warmAsset);
+    } catch (error) {
+      console.warn('[RunnerDisplayPage] Look-ahead request failed:', error);
+    }
+  };
+
   // Function to switch to resting state
   const switchToRestingState = async () => {
     console.log('[RunnerDisplayPage] Switching to resting state');
@@ -98,11 +186,15 @@ export default function RunnerDisplayPage() {
     if (currentRunnerRef.current) {
       console.log('[RunnerDisplayPage] Marking runner as displayed:', currentRunnerRef.current.bib);
       try {
-        const response = await fetch('/api/runner-displayed', {
+        const response = await fetch(`${queueApi}/runner-displayed`, {
           method: 'POST',
           headers: {
             'Content-Type': 'application/json',
           },
+          // By bib: the queue may have reordered since this frame was fetched
+          body: JSON.stringify({
+            bibs: (currentBatchRef.current.length ? currentBatchRef.current : [currentRunnerRef.current]).map((r) => r.bib)
+          }),
         });
         if (response.ok) {
           const result = await response.json();
@@ -116,7 +208,7 @@ export default function RunnerDisplayPage() {
             // If there's a next runner in the queue, switch to them immediately
             if (result.next_runner) {
               console.log('[RunnerDisplayPage] Next runner available, switching immediately:', result.next_runner.bib);
-              switchToActiveState(result.next_runner);
+              switchToActiveState(result.next_runner, result.pacing, result.next_runners);
               return; // Don't switch to resting state
             }
           }
@@ -134,17 +226,22 @@ export default function RunnerDisplayPage() {
     console.log('[RunnerDisplayPage] No next runner available, switching to resting state');
     currentStateRef.current = 'resting';
     currentRunnerRef.current = null;
+    currentBatchRef.current = [];
     setCurrentDisplayState('resting');
     setRunner(null);
+    setBatch([]);
     setLastRunnerTime(0);
   };
 
-  // Function to switch to active state
-  const switchToActiveState = (runnerData) => {
+  // Function to switch to active state. The server's pacing sets how long the
+  // frame stays up and, during a surge, hands over several runners to show at once
+  const switchToActiveState = (runnerData, pacing = null, runners = null) => {
     const startTime = Date.now();
-    const expectedEndTime = startTime + displayDuration;
+    const frameDuration = pacing?.duration_ms || displayDuration;
+    const frameRunners = runners && runners.length > 1 ? runners : [runnerData];
+    const expectedEndTime = startTime + frameDuration;
     
-    console.log('[RunnerDisplayPage] Switching to active state with runner:', runnerData.name || runnerData.bib, 'Duration:', displayDuration / 1000 + 's');
+    console.log('[RunnerDisplayPage] Switching to active state with runner:', runnerData.name || runnerData.bib, 'Duration:', frameDuration / 1000 + 's', 'Runners in frame:', frameRunners.length);
     console.log('[RunnerDisplayPage] Timer start time:', new Date(startTime).toLocaleTimeString());
     console.log('[RunnerDisplayPage] Expected end time:', new Date(expectedEndTime).toLocaleTimeString());
     
@@ -156,8 +253,10 @@ export default function RunnerDisplayPage() {
     // Update state synchronously
     currentStateRef.current = 'active';
     currentRunnerRef.current = runnerData;
+    currentBatchRef.current = frameRunners;
     setCurrentDisplayState('active');
     setRunner(runnerData);
+    setBatch(frameRunners.length > 1 ? frameRunners : []);
     setLastRunnerTime(startTime);
     
     // Set timer to switch back to resting state after duration
@@ -166,16 +265,16 @@ export default function RunnerDisplayPage() {
       console.log('[RunnerDisplayPage] Actual end time:', new Date().toLocaleTimeString());
       console.log('[RunnerDisplayPage] Current runner at timer expiration:', currentRunnerRef.current?.bib);
       await switchToRestingState();
-    }, displayDuration);
+    }, frameDuration);
     
-    console.log('[RunnerDisplayPage] Timer set for', displayDuration / 1000, 'seconds');
+    console.log('[RunnerDisplayPage] Timer set for', frameDuration / 1000, 'seconds');
   };
 
   // Function to check for new runner data
   const loadRunnerData = async () => {
     try {
       console.log('[RunnerDisplayPage] Polling for runner data...');
-      const response = await fetch('/api/current-runner');
+      const response = await fetch(`${queueApi}/current-runner`);
       console.log('[RunnerDisplayPage] API response status:', response.status);
       
       if (response.ok) {
@@ -209,7 +308,7 @@ export default function RunnerDisplayPage() {
           // Only switch to active state if we're in resting state
           if (isInRestingState) {
             console.log('[RunnerDisplayPage] In resting state, switching to new runner:', runnerData.bib);
-            switchToActiveState(runnerData);
+            switchToActiveState(runnerData, data.pacing, data.runners);
           } else {
             console.log('[RunnerDisplayPage] In active state, keeping current runner:', currentRunnerRef.current?.bib);
           }
@@ -249,9 +348,13 @@ export default function RunnerDisplayPage() {
   useEffect(() => {
     // Initial load
     loadRunnerData();
+    loadUpcoming();
 
     // Set up polling interval to check for new runner data
-    pollingIntervalRef.current = setInterval(loadRunnerData, 1000);
+    pollingIntervalRef.current = setInterval(() => {
+      loadRunnerData();
+      loadUpcoming();
+    }, 1000);
 
     return () => {
       if (pollingIntervalRef.current) {
@@ -416,11 +519,14 @@ export default function RunnerDisplayPage() {
         </div>
       )}
       
-      {currentTemplateContent ? (
+      {currentDisplayState === 'active' && batch.length > 1 ? (
+        <RunnerBatchFrame runners={batch} />
+      ) : currentTemplateContent ? (
         <RunnerDisplay 
           runner={runner} 
           template={currentTemplateContent} 
           displayDuration={displayDuration}
+          upcoming={upcoming}
         />
       ) : (
         <div className="no-template-message" style={{
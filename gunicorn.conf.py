@@ -0,0 +1,18 @@
+# gunicorn.conf.py - HTTP workers for multi-process mode
+#
+# Start the ingest process first (it owns the TCP listener and all state):
+#     RACEDISPLAY_ROLE=ingest python app.py
+# then the workers, which mirror its display state and forward everything else:
+#     gunicorn app:app
+import multiprocessing
+
+from config import SERVER_CONFIG
+
+bind = f"{SERVER_CONFIG['HOST']}:{SERVER_CONFIG['PORT']}"
+raw_env = ['RACEDISPLAY_ROLE=worker']
+workers = multiprocessing.cpu_count()
+worker_class = 'gthread'
+threads = 32  # Each connected display holds one thread open on /stream
+# Each worker subscribes to the state bus on a thread started at import, which
+# would not survive the fork if the app were loaded in the master
+preload_app = False
@@ -0,0 +1,290 @@
+# image_index.py - Persistent dimension/thumbnail index for uploaded images
+import json
+import os
+from datetime import datetime
+from threading import Lock
+
+from PIL import Image
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp')
+THUMBNAIL_SIZE = (80, 80)
+INDEX_VERSION = 1
+
+
+def is_image_filename(filename):
+    return filename.lower().endswith(IMAGE_EXTENSIONS) and not filename.startswith('.')
+
+
+def display_name_for(filename):
+    """'navy_stripe-background.png' -> 'Navy Stripe Background'"""
+    name = os.path.splitext(filename)[0].replace('_', ' ').replace('-', ' ')
+    return ' '.join(word.capitalize() for word in name.split())
+
+
+def thumbnail_name_for(filename):
+    return f"thumb_{filename.rsplit('.', 1)[0]}.jpeg"
+
+
+def variant_key(filename, entry):
+    """Directory name variants are stored under: the content digest when known"""
+    return entry.get('digest') or os.path.splitext(filename)[0]
+
+
+def make_thumbnail(source_path, thumbnail_path, size=THUMBNAIL_SIZE):
+    """Write a small JPEG preview of an image"""
+    with Image.open(source_path) as img:
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGB')
+        img.thumbnail(size, Image.Resampling.LANCZOS)
+        img.save(thumbnail_path, 'JPEG', quality=85)
+
+
+class ImageIndex:
+    """Cached metadata for every image in the upload directory.
+
+    Dimensions, size, ctime and thumbnail name are stored in a JSON file so
+    listing the asset panel never has to open an image. The upload directory's
+    mtime is checked on each listing; only when it changes is the directory
+    rescanned, and then only files whose size or mtime differ are opened.
+
+    If a builder is set (see image_pipeline.ImagePipeline.submit) thumbnails
+    and display variants are produced in the background and reported back
+    through record_build; otherwise the thumbnail is made inline.
+
+    With a store (see upload_store.UploadStore) each entry also carries the
+    file's content digest, which becomes its immutable URL and the key its
+    variants are built and served under.
+    """
+
+    def __init__(self, upload_dir, thumbnail_dir, index_path, url_prefix='/static/uploads',
+                 builder=None, store=None):
+        self.upload_dir = upload_dir
+        self.thumbnail_dir = thumbnail_dir
+        self.index_path = index_path
+        self.url_prefix = url_prefix
+        self.builder = builder
+        self.store = store
+        self._entries = {}     # filename -> metadata dict
+        self._variants = {}    # variant key -> (original bytes, variant list)
+        self._dir_mtime = None
+        self._listing = None   # Cached API response, rebuilt when entries change
+        self._building = set() # Filenames queued with the builder
+        self._lock = Lock()
+        self.scans = 0
+        self.images_opened = 0
+        os.makedirs(thumbnail_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == INDEX_VERSION:
+            self._entries = data.get('images', {})
+            for filename, entry in self._entries.items():
+                if entry.get('variants'):
+                    self._variants[variant_key(filename, entry)] = (entry['size'], entry['variants'])
+
+    def _save(self):
+        """Write the index atomically (caller holds the lock)"""
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = f'{self.index_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'images': self._entries}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _describe(self, filename, st, rebuild_thumbnail=False):
+        """Read dimensions and make sure a thumbnail exists or is queued (caller holds the lock)"""
+        entry = {
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+            'ctime': st.st_ctime,
+            'thumbnail': thumbnail_name_for(filename)
+        }
+        file_path = os.path.join(self.upload_dir, filename)
+        try:
+            if self.store:
+                stored = self.store.resolve(filename)
+                if stored is None or stored['size'] != st.st_size:
+                    stored = self.store.adopt(filename)  # Copied in by hand, or replaced outside the app
+                entry['digest'], entry['ext'] = stored['digest'], stored['ext']
+            self.images_opened += 1
+            with Image.open(file_path) as img:
+                entry['width'], entry['height'] = img.size  # Header only, no pixel decode
+            thumbnail_path = os.path.join(self.thumbnail_dir, entry['thumbnail'])
+            if rebuild_thumbnail or not os.path.exists(thumbnail_path):
+                if self.builder:
+                    entry['pending'] = True  # Thumbnail comes from the background build
+                else:
+                    make_thumbnail(file_path, thumbnail_path)
+        except Exception as e:
+            # Remember the failure so a broken file is not reopened on every scan
+            entry['error'] = str(e)
+        return entry
+
+    def _scan(self):
+        """Reconcile the index with the upload directory (caller holds the lock).
+        Returns the files that need building."""
+        self.scans += 1
+        seen = set()
+        changed = False
+        to_build = []
+        with os.scandir(self.upload_dir) as it:
+            for dirent in it:
+                if not is_image_filename(dirent.name) or not dirent.is_file():
+                    continue
+                seen.add(dirent.name)
+                st = dirent.stat()
+                entry = self._entries.get(dirent.name)
+                if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+                    # Indexed before variants existed, or a build cut short by a restart
+                    if self._needs_build(dirent.name, entry):
+                        to_build.append(self._build_args(dirent.name, entry))
+                    continue
+                # A known file that changed in place needs a fresh thumbnail
+                entry = self._entries[dirent.name] = self._describe(dirent.name, st, rebuild_thumbnail=entry is not None)
+                if self._needs_build(dirent.name, entry):
+                    to_build.append(self._build_args(dirent.name, entry))
+                changed = True
+
+        removed = set(self._entries) - seen
+        for filename in removed:
+            del self._entries[filename]
+            changed = True
+        if removed and self.store:
+            self.store.forget_missing()
+
+        if changed:
+            self._listing = None
+            self._save()
+        return to_build
+
+    def _needs_build(self, filename, entry):
+        """Mark a file as queued if it still lacks a thumbnail or variants (caller holds the lock)"""
+        if (not self.builder or 'error' in entry or filename in self._building
+                or ('variants' in entry and not entry.get('pending'))):
+            return False
+        self._building.add(filename)
+        return True
+
+    def _build_args(self, filename, entry):
+        return filename, entry['mtime_ns'], bool(entry.get('pending')), variant_key(filename, entry)
+
+    def _queue_builds(self, to_build):
+        # Called without the lock held: a finished job calls back into record_build
+        for filename, mtime_ns, thumbnail, key in to_build:
+            try:
+                self.builder(filename, mtime_ns, thumbnail, key)
+            except Exception as e:
+                self.record_build(filename, mtime_ns, None, e)
+
+    def refresh(self, force=False):
+        """Rescan if the upload directory changed since the last scan"""
+        dir_mtime = os.stat(self.upload_dir).st_mtime_ns
+        with self._lock:
+            if not force and dir_mtime == self._dir_mtime:
+                return False
+            to_build = self._scan()
+            self._dir_mtime = dir_mtime
+        self._queue_builds(to_build)
+        return True
+
+    def add(self, filename):
+        """Index a freshly uploaded file"""
+        file_path = os.path.join(self.upload_dir, filename)
+        with self._lock:
+            entry = self._entries[filename] = self._describe(filename, os.stat(file_path), rebuild_thumbnail=True)
+            self._building.discard(filename)  # A re-upload supersedes any build in flight
+            to_build = [self._build_args(filename, entry)] if self._needs_build(filename, entry) else []
+            self._listing = None
+            self._save()
+        self._queue_builds(to_build)
+        return entry
+
+    def record_build(self, filename, mtime_ns, result, error=None):
+        """Store the outcome of a background build, ignoring results for a since-replaced file"""
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is None or (mtime_ns is not None and entry['mtime_ns'] != mtime_ns):
+                return
+            self._building.discard(filename)
+            entry.pop('pending', None)
+            if error is not None:
+                entry['error'] = str(error)
+            else:
+                entry['variants'] = result['variants']
+                self._variants[variant_key(filename, entry)] = (entry['size'], entry['variants'])
+            self._listing = None
+            self._save()
+
+    def key_for(self, filename):
+        """Variant key of an indexed file, or None"""
+        with self._lock:
+            entry = self._entries.get(filename)
+            return variant_key(filename, entry) if entry else None
+
+    def best_variant(self, key, formats, width=None, height=None):
+        """Pick the variant in the first acceptable format that covers
+        width x height (or the largest variant if no size is given).
+        Returns the variant dict, or None to serve the original."""
+        with self._lock:
+            if key not in self._variants:
+                return None
+            original_bytes, variants = self._variants[key]
+        for fmt in formats:
+            candidates = [v for v in variants if v['format'] == fmt]
+            if not candidates:
+                continue
+            if width or height:
+                covering = [v for v in candidates
+                            if v['width'] >= (width or 0) and v['height'] >= (height or 0)]
+                candidates = covering or candidates
+                choice = min(candidates, key=lambda v: (v['width'] * v['height'], v['bytes']))
+            else:
+                choice = max(candidates, key=lambda v: v['width'] * v['height'])
+            if choice['bytes'] < original_bytes:
+                return choice
+        return None
+
+    def list_images(self, force=False):
+        """Return asset panel entries, newest first"""
+        self.refresh(force)
+        with self._lock:
+            if self._listing is None:
+                images = []
+                for filename, entry in self._entries.items():
+                    if 'error' in entry:
+                        continue
+                    url = (f"{self.url_prefix}/objects/{entry['digest']}{entry['ext']}"
+                           if entry.get('digest') else f'{self.url_prefix}/{filename}')
+                    key = variant_key(filename, entry)
+                    images.append({
+                        'id': f"image-{filename}",
+                        'filename': filename,
+                        'displayName': display_name_for(filename),
+                        'url': url,
+                        # Until the background build finishes, preview the original
+                        'thumbnail': url if entry.get('pending') else f"{self.url_prefix}/thumbnails/{entry['thumbnail']}",
+                        'dimensions': {'width': entry['width'], 'height': entry['height']},
+                        'fileSize': entry['size'],
+                        'uploadDate': datetime.fromtimestamp(entry['ctime']).isoformat(),
+                        'variants': [
+                            dict(variant, url=f"{self.url_prefix}/variants/{key}/{variant['file']}")
+                            for variant in entry.get('variants', [])
+                        ]
+                    })
+                images.sort(key=lambda x: x['uploadDate'], reverse=True)
+                self._listing = images
+            return self._listing
+
+    def stats(self):
+        with self._lock:
+            return {
+                'images': len(self._entries),
+                'broken': sum(1 for entry in self._entries.values() if 'error' in entry),
+                'pending': sum(1 for entry in self._entries.values() if entry.get('pending')),
+                'scans': self.scans,
+                'images_opened': self.images_opened
+            }
@@ -0,0 +1,191 @@
+# image_pipeline.py - Background thumbnail and display-variant generation for uploads
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+
+from PIL import Image, features
+
+from image_index import THUMBNAIL_SIZE, thumbnail_name_for
+
+FORMAT_MIMETYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png'
+}
+
+
+def supported_formats(formats):
+    """Drop output formats this Pillow build cannot encode"""
+    return [fmt for fmt in formats if fmt in ('jpeg', 'png') or features.check(fmt)]
+
+
+def cover_size(width, height, canvas_width, canvas_height):
+    """Smallest size that still covers the canvas, never larger than the source"""
+    scale = min(1.0, max(canvas_width / width, canvas_height / height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _for_format(img, fmt):
+    """Convert to a mode the encoder accepts, keeping transparency where it can"""
+    has_alpha = img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+    if fmt == 'jpeg' or not has_alpha:
+        return img if img.mode == 'RGB' else img.convert('RGB')
+    return img if img.mode == 'RGBA' else img.convert('RGBA')
+
+
+def build_variants(source_path, thumbnail_path, variant_dir, sizes, formats, quality):
+    """Worker-process job: write the thumbnail (unless thumbnail_path is None)
+    and every display variant of one image.
+
+    Returns the source dimensions and a list of variant descriptions.
+    """
+    shutil.rmtree(variant_dir, ignore_errors=True)  # Drop variants of a previous upload
+    variants = []
+    with Image.open(source_path) as img:
+        img.load()
+        width, height = img.size
+
+        if thumbnail_path:
+            thumb = _for_format(img, 'jpeg').copy()
+            thumb.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+            thumb.save(thumbnail_path, 'JPEG', quality=85)
+
+        # Re-encoding would flatten animations, so those are served as uploaded
+        if getattr(img, 'is_animated', False):
+            return {'width': width, 'height': height, 'variants': variants}
+
+        os.makedirs(variant_dir, exist_ok=True)
+        done = set()
+        for canvas_width, canvas_height in sizes:
+            target = cover_size(width, height, canvas_width, canvas_height)
+            if target in done:
+                continue
+            done.add(target)
+            resized = img if target == (width, height) else img.resize(target, Image.Resampling.LANCZOS)
+            for fmt in formats:
+                name = f'{target[0]}x{target[1]}.{fmt}'
+                path = os.path.join(variant_dir, name)
+                _for_format(resized, fmt).save(path, fmt.upper(), quality=quality)
+                variants.append({
+                    'file': name,
+                    'format': fmt,
+                    'width': target[0],
+                    'height': target[1],
+                    'bytes': os.path.getsize(path)
+                })
+    return {'width': width, 'height': height, 'variants': variants}
+
+
+def _ready():
+    return os.getpid()
+
+
+def start_worker_pool(workers=2, start_method='fork'):
+    """Create the process pool and launch its workers now.
+
+    Call this before the process starts any thread. A fork copies only the
+    calling thread, so a lock another thread holds at that moment (the log
+    queue, Pillow, the app's own) stays locked forever in the worker. The
+    'fork' method launches every worker on the first submit; the wait makes
+    sure they exist before this returns.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(start_method if start_method in methods else None)
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    for future in [executor.submit(_ready) for _ in range(workers)]:
+        future.result()
+    return executor
+
+
+class ImagePipeline:
+    """Runs build_variants for new uploads on a process pool.
+
+    Pass an executor from start_worker_pool(), created at startup before any
+    thread runs. Workers forked from the app do not re-import it; jobs only
+    touch Pillow and the filesystem. Without one, the pool is created on
+    first use.
+    """
+
+    def __init__(self, upload_dir, thumbnail_dir, variant_dir, workers=2,
+                 formats=('webp', 'avif'), quality=80, sizes=None, on_complete=None,
+                 start_method='fork', executor=None):
+        self.upload_dir = upload_dir
+        self.thumbnail_dir = thumbnail_dir
+        self.variant_dir = variant_dir
+        self.workers = workers
+        self.formats = supported_formats(formats)
+        self.quality = quality
+        self.sizes = sizes or (lambda: [(1920, 1080)])
+        self.on_complete = on_complete
+        self.start_method = start_method
+        self._executor = executor
+        self._built = {}  # key -> last result, so identical content is not rebuilt
+        self._lock = Lock()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.variant_bytes = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = start_worker_pool(self.workers, self.start_method)
+            return self._executor
+
+    def submit(self, filename, mtime_ns=None, thumbnail=True, key=None):
+        """Queue variant (and optionally thumbnail) generation for an uploaded file.
+        Variants are written under variant_dir/key (the file stem by default)."""
+        key = key or os.path.splitext(filename)[0]
+        with self._lock:
+            cached = None if thumbnail else self._built.get(key)
+            if cached is None:
+                self.pending += 1
+        if cached is not None:
+            if self.on_complete:
+                self.on_complete(filename, mtime_ns, cached, None)
+            return None
+        future = self._get_executor().submit(
+            build_variants,
+            os.path.join(self.upload_dir, filename),
+            os.path.join(self.thumbnail_dir, thumbnail_name_for(filename)) if thumbnail else None,
+            os.path.join(self.variant_dir, key),
+            sorted(set(tuple(size) for size in self.sizes())),
+            self.formats,
+            self.quality
+        )
+        future.add_done_callback(lambda f: self._finished(filename, mtime_ns, key, f))
+        return future
+
+    def _finished(self, filename, mtime_ns, key, future):
+        error = future.exception()
+        result = None if error else future.result()
+        with self._lock:
+            self.pending -= 1
+            if error:
+                self.failed += 1
+            else:
+                self.completed += 1
+                self._built[key] = result
+                self.variant_bytes += sum(v['bytes'] for v in result['variants'])
+        if self.on_complete:
+            self.on_complete(filename, mtime_ns, result, error)
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'formats': list(self.formats),
+                'pending': self.pending,
+                'completed': self.completed,
+                'failed': self.failed,
+                'variant_bytes': self.variant_bytes
+            }
@@ -0,0 +1,112 @@
+# ingest_pipeline.py - Hand-off between decoder socket readers and read processing
+import queue
+import threading
+import time
+
+from log_pipeline import get_logger
+
+ingest_log = get_logger('ingest')
+
+_STOP = object()
+
+
+class IngestPipeline:
+    """Bounded hand-off from socket reader threads to processing workers.
+
+    Socket readers only frame and split lines and submit the reads here,
+    which never blocks: each read goes onto one worker's bounded queue, or is
+    counted as dropped if that queue is full (its line is already in the read
+    journal, so it can be replayed). The workers run
+    process_fn(read, source, submitted_at) to look up, dedupe and queue the
+    read, so a slow step there can no longer stall a socket read and make a
+    decoder buffer or disconnect.
+
+    Lines are sharded by source (one decoder connection), so each
+    connection's reads are processed in the order they arrived.
+    """
+
+    def __init__(self, process_fn, workers=2, queue_size=10000):
+        self.process_fn = process_fn
+        self.queue_size = queue_size
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(max(1, workers))]
+        self._threads = []
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.processed = [0] * len(self._queues)
+        self.errors = 0
+
+    @property
+    def workers(self):
+        return len(self._queues)
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for index, work in enumerate(self._queues):
+                thread = threading.Thread(target=self._run, args=(index, work),
+                                          name=f'ingest-worker-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5.0):
+        """Let the workers finish what is queued, then stop them"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for work in self._queues:
+            work.put(_STOP)
+        for thread in threads:
+            thread.join(timeout)
+
+    def submit(self, read, source):
+        """Queue a read for processing; returns False if it was dropped"""
+        work = self._queues[hash(source) % len(self._queues)]
+        try:
+            work.put_nowait((read, source, time.perf_counter()))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            ingest_log.warning("Ingest hand-off full (%d reads), dropped read from %s: %s",
+                               self.queue_size, source, read)
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def _run(self, index, work):
+        while True:
+            item = work.get()
+            if item is _STOP:
+                break
+            try:
+                self.process_fn(*item)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                ingest_log.exception("Failed to process read from %s: %s", item[1], item[0])
+            self.processed[index] += 1
+
+    def depth(self, index=None):
+        """Lines waiting in one worker's queue, or in all of them"""
+        if index is not None:
+            return self._queues[index].qsize()
+        return sum(work.qsize() for work in self._queues)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'handoff': {
+                    'depth': self.depth(),
+                    'capacity': self.queue_size * len(self._queues),
+                    'submitted': self.submitted,
+                    'dropped': self.dropped
+                },
+                'process': {
+                    'workers': len(self._queues),
+                    'running': len(self._threads),
+                    'processed': sum(self.processed),
+                    'errors': self.errors,
+                    'depth_per_worker': [work.qsize() for work in self._queues]
+                }
+            }
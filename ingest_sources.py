@@ -0,0 +1,338 @@
+# ingest_sources.py - UDP and log-file read sources alongside the TCP decoder listener
+import ctypes
+import ctypes.util
+import glob
+import json
+import os
+import select
+import socket
+import struct
+import threading
+import time
+
+from log_pipeline import get_logger
+from template_repository import write_atomic
+
+ingest_log = get_logger('ingest')
+
+
+def split_lines(data):
+    """Non-empty, stripped text lines from a chunk of decoder output"""
+    return [line.strip() for line in data.decode('utf-8', errors='ignore').splitlines() if line.strip()]
+
+
+class UdpReceiver:
+    """Receives reads broadcast by decoders as UDP datagrams.
+
+    When the socket becomes readable the receiver drains up to batch_size
+    datagrams without blocking (Python has no recvmmsg, so this is the same
+    idea one recv at a time) and hands each sender's lines over in one
+    on_lines(source, lines) call. A datagram may carry several lines.
+    """
+
+    def __init__(self, host, port, on_lines, batch_size=64, receive_buffer_bytes=4 * 1024 * 1024):
+        self.host = host
+        self.port = port
+        self.on_lines = on_lines
+        self.batch_size = batch_size
+        self.receive_buffer_bytes = receive_buffer_bytes
+        self._sock = None
+        self._thread = None
+        self._running = False
+        self.datagrams = 0
+        self.lines = 0
+        self.bytes = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.senders = set()
+
+    def start(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)  # No SO_REUSEADDR: on UDP it lets a second bind share the port
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer_bytes)
+        except OSError:
+            pass  # Capped by the OS; the default still works
+        sock.bind((self.host, self.port))
+        sock.setblocking(False)
+        self._sock = sock
+        self.port = sock.getsockname()[1]  # Resolves port 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='udp-ingest', daemon=True)
+        self._thread.start()
+        ingest_log.info("UDP ingest listening on %s:%s", self.host, self.port)
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(2)
+        if self._sock:
+            self._sock.close()
+
+    def is_alive(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self):
+        while self._running:
+            readable, _, _ = select.select([self._sock], [], [], 0.5)
+            if not readable:
+                continue
+            by_sender = {}
+            received = 0
+            while received < self.batch_size:
+                try:
+                    data, address = self._sock.recvfrom(65535)
+                except (BlockingIOError, InterruptedError):
+                    break
+                except OSError as e:
+                    ingest_log.warning("UDP receive error: %s", e)
+                    break
+                received += 1
+                self.bytes += len(data)
+                by_sender.setdefault(address, []).extend(split_lines(data))
+            self.datagrams += received
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, received)
+            for address, lines in by_sender.items():
+                self.senders.add(address)
+                if not lines:
+                    continue
+                self.lines += len(lines)
+                try:
+                    self.on_lines(f'udp:{address[0]}:{address[1]}', lines)
+                except Exception:
+                    ingest_log.exception("Failed to ingest UDP reads from %s", address[0])
+
+    def stats(self):
+        return {
+            'type': 'udp',
+            'address': f'{self.host}:{self.port}',
+            'running': self.is_alive(),
+            'datagrams': self.datagrams,
+            'lines': self.lines,
+            'bytes': self.bytes,
+            'batches': self.batches,
+            'largest_batch': self.largest_batch,
+            'senders': len(self.senders)
+        }
+
+
+class _Inotify:
+    """Minimal Linux inotify watch on one directory, via libc. Raises OSError where unavailable."""
+
+    MASK = 0x00000002 | 0x00000008 | 0x00000080 | 0x00000100  # MODIFY, CLOSE_WRITE, MOVED_TO, CREATE
+
+    def __init__(self, directory):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError('libc not found')
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify not supported')
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+
+    def wait(self, timeout):
+        """Block until the directory changes or timeout passes; drains pending events"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if readable:
+            try:
+                while os.read(self.fd, 64 * (struct.calcsize('iIII') + 256)):
+                    pass
+            except BlockingIOError:
+                pass
+        return bool(readable)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _TailedFile:
+    __slots__ = ('path', 'key', 'handle', 'offset', 'lines')
+
+    def __init__(self, path, key, handle, offset):
+        self.path = path
+        self.key = key
+        self.handle = handle
+        self.offset = offset
+        self.lines = 0
+
+
+class LogTailer:
+    """Follows decoder log files matching a glob and feeds new lines to on_lines(source, lines).
+
+    Files are tracked by device and inode, not name, so a log that is rotated
+    (renamed) is read to its end through the open handle before it is let go,
+    and the new file under the old name starts from offset 0. A file that
+    shrinks was truncated and is re-read from the start. Only whole lines are
+    consumed; a partial last line waits for its newline. Offsets are saved to
+    state_path, so a restart resumes where it left off; files that already
+    exist with no saved offset start at their end (start_at='end') or their
+    beginning (start_at='start'). Changes are picked up through inotify where
+    available, otherwise by polling every poll_interval seconds.
+    """
+
+    def __init__(self, pattern, on_lines, state_path=None, start_at='end', poll_interval=0.5,
+                 read_bytes=256 * 1024):
+        self.pattern = pattern
+        self.on_lines = on_lines
+        self.state_path = state_path
+        self.start_at = start_at
+        self.poll_interval = poll_interval
+        self.read_bytes = read_bytes
+        self._files = {}  # (dev, inode) -> _TailedFile
+        self._saved = self._load_state()
+        self._thread = None
+        self._running = False
+        self._first_scan = True
+        self.watch_mode = None
+        self.lines = 0
+        self.bytes = 0
+        self.rotations = 0
+        self.truncations = 0
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            ingest_log.warning("Ignoring unreadable tail offsets in %s", self.state_path)
+            return {}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        state = {f'{key[0]}:{key[1]}': {'path': tailed.path, 'offset': tailed.offset}
+                 for key, tailed in self._files.items()}
+        if state != self._saved:
+            os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+            write_atomic(self.state_path, json.dumps(state, indent=2))
+            self._saved = state
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='log-tail', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(5)
+        for tailed in self._files.values():
+            tailed.handle.close()
+        self._files.clear()
+
+    def is_alive(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def _run(self):
+        directory = os.path.dirname(self.pattern) or '.'
+        os.makedirs(directory, exist_ok=True)
+        watcher = None
+        try:
+            watcher = _Inotify(directory)
+            self.watch_mode = 'inotify'
+        except (OSError, AttributeError) as e:
+            ingest_log.info("Tailing %s by polling (%s)", self.pattern, e)
+            self.watch_mode = 'poll'
+        try:
+            while self._running:
+                try:
+                    self.scan()
+                except Exception:
+                    ingest_log.exception("Error tailing %s", self.pattern)
+                if watcher:
+                    watcher.wait(self.poll_interval)  # Still rescans on timeout: appends to a moved file fire no event
+                else:
+                    time.sleep(self.poll_interval)
+        finally:
+            if watcher:
+                watcher.close()
+
+    def scan(self):
+        """Read whatever has been appended since the last scan"""
+        current = []
+        for path in sorted(glob.glob(self.pattern)):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue  # Rotated away between glob and stat
+            current.append((path, (st.st_dev, st.st_ino), st.st_size))
+
+        # Rotated or deleted files first, so their last lines come before the new file's
+        seen = {key for _, key, _ in current}
+        for key in [key for key in self._files if key not in seen]:
+            tailed = self._files.pop(key)
+            self._read(tailed)
+            tailed.handle.close()
+            self.rotations += 1
+            ingest_log.info("Finished rotated log %s at offset %d", tailed.path, tailed.offset)
+
+        for path, key, size in current:
+            tailed = self._files.get(key)
+            if tailed is None:
+                tailed = self._open(path, key, size)
+                if tailed is None:
+                    continue
+            tailed.path = path
+            if size < tailed.offset:
+                ingest_log.info("%s was truncated, reading from the start", path)
+                self.truncations += 1
+                tailed.offset = 0
+            if size > tailed.offset:
+                self._read(tailed)
+
+        self._first_scan = False
+        self._save_state()
+
+    def _open(self, path, key, size):
+        try:
+            handle = open(path, 'rb')
+        except OSError as e:
+            ingest_log.warning("Cannot open %s: %s", path, e)
+            return None
+        saved = self._saved.get(f'{key[0]}:{key[1]}')
+        if saved is not None:
+            offset = min(saved['offset'], size)
+        elif self._first_scan and self.start_at == 'end':
+            offset = size  # Existing history; only follow what is appended from now on
+        else:
+            offset = 0
+        tailed = self._files[key] = _TailedFile(path, key, handle, offset)
+        ingest_log.info("Tailing %s from offset %d", path, offset)
+        return tailed
+
+    def _read(self, tailed):
+        while True:
+            tailed.handle.seek(tailed.offset)
+            chunk = tailed.handle.read(self.read_bytes)
+            end = chunk.rfind(b'\n') + 1
+            if not end:
+                return  # Nothing, or only a partial line so far
+            tailed.offset += end
+            self.bytes += end
+            lines = split_lines(chunk[:end])
+            if lines:
+                tailed.lines += len(lines)
+                self.lines += len(lines)
+                self.on_lines(f'file:{os.path.basename(tailed.path)}', lines)
+            if len(chunk) < self.read_bytes:
+                return
+
+    def stats(self):
+        return {
+            'type': 'file_tail',
+            'pattern': self.pattern,
+            'running': self.is_alive(),
+            'watch_mode': self.watch_mode,
+            'lines': self.lines,
+            'bytes': self.bytes,
+            'rotations': self.rotations,
+            'truncations': self.truncations,
+            'files': [{'path': t.path, 'offset': t.offset, 'lines': t.lines} for t in self._files.values()]
+        }
@@ -0,0 +1,295 @@
+# listener_supervisor.py - Owns the ingest listeners: start, stop, rebind and crash restarts
+import socketserver
+import threading
+import time
+
+from log_pipeline import get_logger
+
+ingest_log = get_logger('ingest')
+
+
+class DecoderTCPServer(socketserver.ThreadingTCPServer):
+    """Decoder listener. Connection threads are daemons and are not joined on
+    close, so closing the listening socket leaves connected decoders alone.
+
+    No SO_REUSEPORT: a second app instance must fail to bind the decoder
+    port rather than silently take half the decoder connections."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+    block_on_close = False
+
+
+class TcpListener:
+    """The decoder TCP listener, served by serve_forever() on its own thread"""
+
+    def __init__(self, host, port, handler_class, registry=None):
+        self.host = host
+        self.port = port
+        self.handler_class = handler_class
+        self.registry = registry
+        self._server = None
+        self._thread = None
+        self.started_at = None
+
+    @property
+    def address(self):
+        return f'{self.host}:{self.port}'
+
+    def start(self):
+        self._server = DecoderTCPServer((self.host, self.port), self.handler_class)
+        self.port = self._server.server_address[1]  # Resolves port 0
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.5},
+                                        name=f'tcp-listener-{self.port}', daemon=True)
+        self._thread.start()
+        self.started_at = time.time()
+        if self.registry is not None:
+            self.registry.listening = True
+            self.registry.listen_address = self.address
+        ingest_log.info("TCP listener accepting decoders on %s", self.address)
+
+    def stop(self):
+        """Stop accepting; decoders that are already connected stay connected"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(2)
+        if self.registry is not None and self.registry.listen_address == self.address:
+            self.registry.listening = False
+        ingest_log.info("TCP listener on %s closed", self.address)
+
+    def is_alive(self):
+        return bool(self._thread and self._thread.is_alive())
+
+    def stats(self):
+        return {
+            'type': 'tcp',
+            'address': self.address,
+            'running': self.is_alive(),
+            'started_at': self.started_at,
+            'connected': len(self.registry) if self.registry is not None else None
+        }
+
+
+class _Supervised:
+    __slots__ = ('name', 'factory', 'config', 'overlap', 'instance', 'wanted', 'state', 'starts',
+                 'restarts', 'failures', 'last_error', 'backoff', 'next_attempt', 'running_since')
+
+    def __init__(self, name, factory, config, overlap):
+        self.name = name
+        self.factory = factory
+        self.config = dict(config)
+        self.overlap = overlap
+        self.instance = None
+        self.wanted = False
+        self.state = 'stopped'
+        self.starts = 0
+        self.restarts = 0
+        self.failures = 0
+        self.last_error = None
+        self.backoff = 0
+        self.next_attempt = None
+        self.running_since = None
+
+
+class ListenerSupervisor:
+    """Keeps each registered listener in the state it was asked to be in.
+
+    A listener is registered with a factory(config) that builds an instance
+    with start(), stop(), is_alive() and stats(). The supervisor starts and
+    stops listeners independently, so stopping or rebinding one never touches
+    the others or the decoder connections they already accepted.
+
+    A listener that is wanted running but whose thread has died, or that
+    failed to bind, is restarted by a watchdog thread with exponential backoff
+    (backoff_initial doubling up to backoff_max). The backoff resets once the
+    listener has stayed up for stable_seconds.
+
+    rebind() builds a new instance from the updated config and starts it
+    before stopping the old one, so a host or port change never leaves a gap
+    with nothing accepting. A rebind that keeps the same host and port cannot
+    bind alongside the old socket, so it stops the old one first, as do
+    listeners registered with overlap=False (the log tailer, which must not
+    read the same files twice).
+    """
+
+    def __init__(self, check_interval=1.0, backoff_initial=1.0, backoff_max=60.0, stable_seconds=30.0):
+        self.check_interval = check_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stable_seconds = stable_seconds
+        self._listeners = {}
+        self._lock = threading.RLock()
+        self._watchdog = None
+
+    def register(self, name, factory, config, overlap=True):
+        with self._lock:
+            if name in self._listeners:
+                raise ValueError(f'Listener {name!r} is already registered')
+            self._listeners[name] = _Supervised(name, factory, config, overlap)
+
+    def _get(self, name):
+        try:
+            return self._listeners[name]
+        except KeyError:
+            raise KeyError(f'Unknown listener {name!r}') from None
+
+    def names(self):
+        return list(self._listeners)
+
+    def instance(self, name):
+        return self._get(name).instance
+
+    def config(self, name):
+        return dict(self._get(name).config)
+
+    # Control -------------------------------------------------------------
+
+    def start(self, name):
+        """Start a listener; returns False if it could not bind (a retry is scheduled)"""
+        with self._lock:
+            entry = self._get(name)
+            entry.wanted = True
+            if entry.instance is not None and entry.instance.is_alive():
+                return True
+            self._ensure_watchdog()
+            return self._launch(entry)
+
+    def stop(self, name):
+        with self._lock:
+            entry = self._get(name)
+            entry.wanted = False
+            entry.next_attempt = None
+            self._shutdown(entry)
+            entry.state = 'stopped'
+            entry.running_since = None
+
+    def rebind(self, name, **changes):
+        """Apply config changes (host, port, pattern...) by swapping in a new instance.
+        Raises OSError, leaving the old instance serving, if the new one cannot start."""
+        with self._lock:
+            entry = self._get(name)
+            config = dict(entry.config, **changes)
+            if not entry.wanted or entry.instance is None or not entry.instance.is_alive():
+                entry.config = config
+                return self.start(name)
+            same_address = all(config.get(field) == getattr(entry.instance, field, None) for field in ('host', 'port'))
+            if entry.overlap and not same_address:
+                replacement = entry.factory(config)
+                replacement.start()  # Raises before anything changes if it cannot bind
+                previous, entry.instance = entry.instance, replacement
+                self._stop_instance(entry.name, previous)
+            else:
+                previous = entry.instance
+                self._shutdown(entry)
+                replacement = entry.factory(config)
+                try:
+                    replacement.start()
+                except Exception:
+                    entry.instance = entry.factory(entry.config)
+                    entry.instance.start()
+                    raise
+                entry.instance = replacement
+            entry.config = config
+            entry.starts += 1
+            entry.state = 'running'
+            entry.running_since = time.monotonic()
+            ingest_log.info("Listener %s rebound with %s", name, changes)
+            return True
+
+    def start_all(self, names=None):
+        results = [self.start(name) for name in (names or self.names())]
+        return all(results)
+
+    def stop_all(self):
+        for name in self.names():
+            self.stop(name)
+
+    # Internals -----------------------------------------------------------
+
+    def _launch(self, entry):
+        try:
+            instance = entry.factory(entry.config)
+            instance.start()
+        except Exception as e:
+            entry.failures += 1
+            entry.last_error = str(e)
+            entry.backoff = min(self.backoff_max, entry.backoff * 2 if entry.backoff else self.backoff_initial)
+            entry.next_attempt = time.monotonic() + entry.backoff
+            entry.state = 'backoff'
+            ingest_log.warning("Listener %s failed to start (%s), retrying in %.0fs", entry.name, e, entry.backoff)
+            return False
+        entry.instance = instance
+        entry.starts += 1
+        entry.state = 'running'
+        entry.next_attempt = None
+        entry.running_since = time.monotonic()
+        return True
+
+    def _shutdown(self, entry):
+        if entry.instance is not None:
+            self._stop_instance(entry.name, entry.instance)
+            entry.instance = None
+
+    def _stop_instance(self, name, instance):
+        try:
+            instance.stop()
+        except Exception:
+            ingest_log.exception("Error stopping listener %s", name)
+
+    def _ensure_watchdog(self):
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._watchdog = threading.Thread(target=self._watch, name='listener-supervisor', daemon=True)
+            self._watchdog.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.check_interval)
+            with self._lock:
+                for entry in self._listeners.values():
+                    try:
+                        self._check(entry)
+                    except Exception:
+                        ingest_log.exception("Listener supervisor check failed for %s", entry.name)
+
+    def _check(self, entry):
+        if not entry.wanted:
+            return
+        now = time.monotonic()
+        if entry.instance is not None and entry.instance.is_alive():
+            if entry.backoff and now - entry.running_since >= self.stable_seconds:
+                entry.backoff = 0
+            return
+        if entry.state == 'running':
+            # Its thread died without being asked to stop
+            ingest_log.warning("Listener %s stopped unexpectedly, restarting", entry.name)
+            self._shutdown(entry)
+            entry.failures += 1
+            entry.last_error = 'listener thread exited'
+            entry.backoff = min(self.backoff_max, entry.backoff * 2 if entry.backoff else self.backoff_initial)
+            entry.next_attempt = now + entry.backoff
+            entry.state = 'backoff'
+        if entry.next_attempt is not None and now >= entry.next_attempt:
+            entry.restarts += 1
+            self._launch(entry)
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                entry.name: {
+                    'state': entry.state,
+                    'wanted': entry.wanted,
+                    'config': dict(entry.config),
+                    'starts': entry.starts,
+                    'restarts': entry.restarts,
+                    'failures': entry.failures,
+                    'last_error': entry.last_error,
+                    'retry_in': round(max(0.0, entry.next_attempt - now), 1) if entry.next_attempt else None,
+                    'uptime_seconds': round(now - entry.running_since, 1) if entry.running_since else None,
+                    'listener': entry.instance.stats() if entry.instance is not None else None
+                }
+                for entry in self._listeners.values()
+            }
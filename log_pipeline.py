@@ -0,0 +1,216 @@
+# log_pipeline.py - Queue-backed structured logging with per-subsystem levels and sampling
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from threading import Lock
+
+ROOT_LOGGER = 'racedisplay'
+
+# Attributes every LogRecord carries; anything else arrived through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def get_logger(subsystem):
+    """Return the logger for a subsystem, e.g. get_logger('ingest')"""
+    return logging.getLogger(f'{ROOT_LOGGER}.{subsystem}')
+
+
+def config_level(level):
+    """Convert 'DEBUG'/'info'/10 to a logging level, raising ValueError if unknown"""
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    if not isinstance(value, int):
+        raise ValueError(f'Unknown log level: {level}')
+    return value
+
+
+def _extra_fields(record):
+    return {key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra= fields become top-level keys"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage()
+        }
+        for key, value in _extra_fields(record).items():
+            entry.setdefault(key, value)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, separators=(',', ':'))
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with extra= fields appended as key=value pairs"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _extra_fields(record)
+        if not fields:
+            return line
+        head, sep, tail = line.partition('\n')  # Keep tracebacks below the fields
+        return head + ' ' + ' '.join(f'{key}={value}' for key, value in fields.items()) + sep + tail
+
+
+class SamplingFilter(logging.Filter):
+    """Let through 1 in N below-INFO records per message for sampled subsystems.
+
+    Counting is per (logger, message template) so every kind of per-read
+    message still shows up, just thinned out. INFO and above always pass.
+    """
+
+    def __init__(self, sample_every=None):
+        super().__init__()
+        self.sample_every = {}
+        self._counts = {}
+        self._lock = Lock()
+        self.suppressed = 0
+        self.configure(sample_every or {})
+
+    def configure(self, sample_every):
+        with self._lock:
+            for subsystem, every in sample_every.items():
+                self.sample_every[f'{ROOT_LOGGER}.{subsystem}'] = max(1, int(every))
+            self._counts.clear()
+
+    def filter(self, record):
+        if record.levelno >= logging.INFO:
+            return True
+        every = self.sample_every.get(record.name, 1)
+        if every <= 1:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            seen = self._counts.get(key, 0)
+            self._counts[key] = seen + 1
+            if seen % every == 0:
+                return True
+            self.suppressed += 1
+            return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller; records are dropped if the writer falls behind"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exception_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        """Freeze the record as it is now: the message is merged with its args,
+        extra= values are copied and a traceback is rendered to text, so the
+        writer thread neither sees later changes nor keeps live objects alive.
+        Formatting into a line is still left to the writer."""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        for key, value in _extra_fields(record).items():
+            if not isinstance(value, (str, int, float, bool, type(None))):
+                try:
+                    setattr(record, key, copy.deepcopy(value))
+                except Exception:
+                    setattr(record, key, repr(value))
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """Routes all logging through a bounded queue to a single writer thread.
+
+    Callers only pay for building the LogRecord and a non-blocking put; the
+    formatting and the stream write happen on the listener thread.
+    """
+
+    def __init__(self, config=None):
+        config = config or {}
+        self.config = config
+        self.levels = dict(config.get('subsystems', {}))
+        self.verbose = bool(config.get('verbose', False))
+        self._queue = queue.Queue(maxsize=config.get('queue_size', 10000))
+        self.handler = NonBlockingQueueHandler(self._queue)
+        self.sampler = SamplingFilter(config.get('sample_every', {}))
+        self.handler.addFilter(self.sampler)
+
+        stream = sys.stderr if config.get('stream') == 'stderr' else sys.stdout
+        self.stream_handler = logging.StreamHandler(stream)
+        if config.get('format', 'text') == 'json':
+            self.stream_handler.setFormatter(JsonFormatter())
+        else:
+            self.stream_handler.setFormatter(TextFormatter())
+
+        self._listener = logging.handlers.QueueListener(self._queue, self.stream_handler)
+        self._started = False
+
+    def start(self):
+        """Install the queue handler on the root logger and start the writer"""
+        if self._started:
+            return
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(config_level(self.config.get('level', 'INFO')))
+        self._apply_levels()
+        self._listener.start()
+        self._started = True
+
+    def stop(self):
+        """Drain queued records and stop the writer thread"""
+        if self._started:
+            self._listener.stop()
+            self._started = False
+
+    def _apply_levels(self):
+        for subsystem, level in self.levels.items():
+            effective = logging.DEBUG if self.verbose else config_level(level)
+            get_logger(subsystem).setLevel(effective)
+
+    def configure(self, levels=None, sample_every=None, verbose=None):
+        """Change subsystem levels, sampling rates or verbose mode at runtime"""
+        if levels:
+            for level in levels.values():
+                config_level(level)  # Validate before applying anything
+            self.levels.update(levels)
+        if verbose is not None:
+            self.verbose = bool(verbose)
+        if sample_every:
+            self.sampler.configure(sample_every)
+        self._apply_levels()
+
+    def stats(self):
+        return {
+            'format': self.config.get('format', 'text'),
+            'verbose': self.verbose,
+            'levels': dict(self.levels),
+            'sample_every': {
+                name[len(ROOT_LOGGER) + 1:]: every for name, every in self.sampler.sample_every.items()
+            },
+            'queue_depth': self._queue.qsize(),
+            'queue_size': self._queue.maxsize,
+            'dropped': self.handler.dropped,
+            'sampled_out': self.sampler.suppressed
+        }
@@ -0,0 +1,252 @@
+# metrics.py - Lightweight in-process counters and latency histograms
+import functools
+import time
+from threading import Lock
+
+# HDR-style log-linear buckets: values below 2 * SUB_BUCKETS are exact, above
+# that each power of two is split into SUB_BUCKETS linear steps (~3% error).
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+EXACT_LIMIT = SUB_BUCKETS * 2
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def _bucket_index(value):
+    if value < EXACT_LIMIT:
+        return value
+    shift = value.bit_length() - (SUB_BUCKET_BITS + 1)
+    return EXACT_LIMIT + (shift - 1) * SUB_BUCKETS + ((value >> shift) - SUB_BUCKETS)
+
+
+def _bucket_upper(index):
+    """Highest value that lands in a bucket"""
+    if index < EXACT_LIMIT:
+        return index
+    shift = (index - EXACT_LIMIT) // SUB_BUCKETS + 1
+    sub = (index - EXACT_LIMIT) % SUB_BUCKETS + SUB_BUCKETS
+    return ((sub + 1) << shift) - 1
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels)
+    if extra:
+        items.extend(extra)
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in items) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 9))
+    return str(value)
+
+
+class Counter:
+    """Monotonic counter"""
+
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Latency histogram recorded in microseconds, reported in seconds"""
+
+    __slots__ = ('_counts', '_lock', 'count', 'total_us', 'max_us')
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = Lock()
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def observe_ns(self, elapsed_ns):
+        micros = elapsed_ns // 1000 if elapsed_ns > 0 else 0
+        index = _bucket_index(micros)
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self.count += 1
+            self.total_us += micros
+            if micros > self.max_us:
+                self.max_us = micros
+
+    def observe(self, seconds):
+        self.observe_ns(int(seconds * 1e9))
+
+    def snapshot(self):
+        """Return (count, sum_seconds, max_seconds, {quantile: seconds})"""
+        with self._lock:
+            counts = sorted(self._counts.items())
+            count, total_us, max_us = self.count, self.total_us, self.max_us
+        quantiles = {}
+        if count:
+            targets = [(q, q * count) for q in QUANTILES]
+            seen = 0
+            position = 0
+            for index, bucket_count in counts:
+                seen += bucket_count
+                while position < len(targets) and seen >= targets[position][1]:
+                    quantiles[targets[position][0]] = min(_bucket_upper(index), max_us) / 1e6
+                    position += 1
+            for q, _ in targets[position:]:
+                quantiles[q] = max_us / 1e6
+        return count, total_us / 1e6, max_us / 1e6, quantiles
+
+
+class _Timer:
+    """Context manager that records elapsed monotonic time into a histogram"""
+
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe_ns(time.perf_counter_ns() - self._start)
+        return False
+
+
+class MetricsRegistry:
+    """Named counters, histograms and callback gauges with Prometheus text output"""
+
+    def __init__(self, namespace='racedisplay'):
+        self.namespace = namespace
+        self._lock = Lock()
+        self._help = {}
+        self._types = {}
+        self._series = {}  # (name, labels) -> Counter | Histogram | callable
+
+    def _full_name(self, name):
+        return f'{self.namespace}_{name}' if self.namespace else name
+
+    def _get(self, kind, factory, name, help_text, labels):
+        key = (self._full_name(name), tuple(sorted(labels.items())))
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = factory()
+                    self._types.setdefault(key[0], kind)
+                    if help_text:
+                        self._help.setdefault(key[0], help_text)
+        return series
+
+    def counter(self, name, help_text='', **labels):
+        return self._get('counter', Counter, name, help_text, labels)
+
+    def histogram(self, name, help_text='', **labels):
+        return self._get('summary', Histogram, name, help_text, labels)
+
+    def gauge(self, name, fn, help_text='', **labels):
+        """Register a callable evaluated at scrape time"""
+        key = (self._full_name(name), tuple(sorted(labels.items())))
+        with self._lock:
+            self._series[key] = fn
+            self._types.setdefault(key[0], 'gauge')
+            if help_text:
+                self._help.setdefault(key[0], help_text)
+
+    def inc(self, name, amount=1, **labels):
+        self.counter(name, **labels).inc(amount)
+
+    def observe(self, name, seconds, **labels):
+        self.histogram(name, **labels).observe(seconds)
+
+    def timer(self, name, **labels):
+        """Time a block: with metrics.timer('queue_insert_seconds'): ..."""
+        return _Timer(self.histogram(name, **labels))
+
+    def timed(self, name, help_text='', **labels):
+        """Decorator that records each call's duration"""
+        histogram = self.histogram(name, help_text, **labels)
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    histogram.observe_ns(time.perf_counter_ns() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Return metrics as a JSON-friendly dict"""
+        result = {}
+        with self._lock:
+            series = list(self._series.items())
+        for (name, labels), value in series:
+            label_key = ','.join(f'{k}={v}' for k, v in labels)
+            entry_name = f'{name}{{{label_key}}}' if label_key else name
+            if isinstance(value, Histogram):
+                count, total, maximum, quantiles = value.snapshot()
+                result[entry_name] = {
+                    'count': count, 'sum': total, 'max': maximum,
+                    'quantiles': {str(q): v for q, v in quantiles.items()}
+                }
+            elif isinstance(value, Counter):
+                result[entry_name] = value.value
+            else:
+                try:
+                    result[entry_name] = value()
+                except Exception:
+                    result[entry_name] = None
+        return result
+
+    def render(self):
+        """Render all series in Prometheus text exposition format"""
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: item[0])
+            types = dict(self._types)
+            help_texts = dict(self._help)
+
+        families = {}
+        for (name, labels), value in series:
+            families.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, members in families.items():
+            if name in help_texts:
+                lines.append(f'# HELP {name} {help_texts[name]}')
+            lines.append(f'# TYPE {name} {types.get(name, "untyped")}')
+            max_lines = []
+
+            for labels, value in members:
+                if isinstance(value, Histogram):
+                    count, total, maximum, quantiles = value.snapshot()
+                    for q in QUANTILES:
+                        if q in quantiles:
+                            lines.append(f'{name}{_format_labels(labels, [("quantile", q)])} {_format_value(quantiles[q])}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {count}')
+                    max_lines.append(f'{name}_max{_format_labels(labels)} {_format_value(maximum)}')
+                elif isinstance(value, Counter):
+                    lines.append(f'{name}{_format_labels(labels)} {value.value}')
+                else:
+                    try:
+                        gauge_value = value()
+                    except Exception:
+                        continue
+                    if gauge_value is None:
+                        continue
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(gauge_value)}')
+
+            if max_lines:
+                lines.append(f'# TYPE {name}_max gauge')
+                lines.extend(max_lines)
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,86 @@
+# participant_store.py - Copy-on-write bib -> participant maps for lock-free lookups
+import time
+from contextlib import contextmanager
+from threading import Lock
+from types import MappingProxyType
+
+
+class ParticipantStore:
+    """A bib -> participant map that readers never lock.
+
+    Readers get the current snapshot, a read-only mapping that is never
+    modified after it is published, so a lookup is one attribute read and a
+    dict get no matter what a refresh thread is doing. Writers build a new
+    dict (a copy for incremental updates, or an empty one for a full reload)
+    under the writer lock and publish it in a single reference swap.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._snapshot = MappingProxyType({})
+        self._write_lock = Lock()
+        self.version = 0
+        self.published_at = None
+        self.publishes = 0
+
+    # Readers -------------------------------------------------------------
+
+    def snapshot(self):
+        """The current read-only map; hold on to it for a consistent view"""
+        return self._snapshot
+
+    def get(self, bib, default=None):
+        return self._snapshot.get(bib, default)
+
+    def __contains__(self, bib):
+        return bib in self._snapshot
+
+    def __len__(self):
+        return len(self._snapshot)
+
+    # Writers -------------------------------------------------------------
+
+    def _publish(self, data):
+        """Swap in a new snapshot (caller holds the writer lock and gives up data)"""
+        self._snapshot = MappingProxyType(data)
+        self.version += 1
+        self.published_at = time.time()
+        self.publishes += 1
+
+    def replace(self, data):
+        """Publish data as the whole map. The store takes ownership of the dict."""
+        with self._write_lock:
+            self._publish(data)
+
+    def update(self, changes):
+        """Publish the current map with changes applied"""
+        if not changes:
+            return
+        with self._write_lock:
+            data = dict(self._snapshot)
+            data.update(changes)
+            self._publish(data)
+
+    def clear(self):
+        self.replace({})
+
+    @contextmanager
+    def batch(self, fresh=False):
+        """Build the next snapshot in a private dict and publish it on exit.
+
+        Starts from a copy of the current map, or from an empty one if fresh.
+        Other writers wait; readers keep seeing the previous snapshot until the
+        block finishes. Nothing is published if the block raises.
+        """
+        with self._write_lock:
+            data = {} if fresh else dict(self._snapshot)
+            yield data
+            self._publish(data)
+
+    def stats(self):
+        return {
+            'participants': len(self._snapshot),
+            'version': self.version,
+            'publishes': self.publishes,
+            'published_at': self.published_at
+        }
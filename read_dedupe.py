@@ -0,0 +1,84 @@
+# read_dedupe.py - Duplicate/bounce read suppression for timing data
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class ReadDedupeFilter:
+    """Suppress repeat reads of the same (bib, location, lap) inside a time window.
+
+    Entries are kept in an OrderedDict in arrival order, so expired keys are
+    always at the front and can be dropped in amortized O(1) per read. Memory
+    is bounded by the number of bibs seen within the last window.
+    """
+
+    def __init__(self, window_seconds=30.0, enabled=True, clock=time.monotonic):
+        self.window_seconds = float(window_seconds)
+        self.enabled = enabled
+        self._clock = clock
+        self._first_seen = OrderedDict()  # (bib, location, lap) -> monotonic time
+        self._lock = Lock()
+        self.hits = 0       # reads suppressed as duplicates
+        self.misses = 0     # reads accepted
+        self.expired = 0    # keys dropped after their window passed
+
+    def _expire(self, now):
+        """Drop keys whose window has passed (caller holds the lock)"""
+        cutoff = now - self.window_seconds
+        first_seen = self._first_seen
+        while first_seen:
+            key, seen_at = next(iter(first_seen.items()))
+            if seen_at > cutoff:
+                break
+            first_seen.popitem(last=False)
+            self.expired += 1
+
+    def is_duplicate(self, bib, location, lap):
+        """Return True if this read should be suppressed, recording it otherwise"""
+        if not self.enabled:
+            return False
+
+        key = (bib, location, lap)
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            if key in self._first_seen:
+                self.hits += 1
+                return True
+            # Window is fixed from the first accepted read so a runner standing
+            # on the mat cannot keep extending their own suppression.
+            self._first_seen[key] = now
+            self.misses += 1
+            return False
+
+    def configure(self, window_seconds=None, enabled=None):
+        """Update the window length and/or enabled flag"""
+        with self._lock:
+            if window_seconds is not None:
+                self.window_seconds = float(window_seconds)
+            if enabled is not None:
+                self.enabled = bool(enabled)
+            self._expire(self._clock())
+
+    def reset(self):
+        """Forget all tracked reads and zero the counters"""
+        with self._lock:
+            self._first_seen.clear()
+            self.hits = 0
+            self.misses = 0
+            self.expired = 0
+
+    def stats(self):
+        """Return counters and current size for status endpoints"""
+        with self._lock:
+            self._expire(self._clock())
+            total = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'window_seconds': self.window_seconds,
+                'active_keys': len(self._first_seen),
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
@@ -0,0 +1,163 @@
+# read_journal.py - Append-only journal of raw timing lines with mmap replay
+import mmap
+import os
+import time
+from threading import Lock, Thread, Event
+
+SEGMENT_PREFIX = 'reads-'
+SEGMENT_SUFFIX = '.log'
+
+
+def _segment_name(number):
+    return f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+
+def list_segments(directory):
+    """Return journal segment paths in write order"""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+    )
+    return [os.path.join(directory, name) for name in names]
+
+
+class ReadJournal:
+    """Append-only, segment-rotated journal of raw decoder lines.
+
+    Each record is one line: wall-clock timestamp, source and the raw line,
+    tab separated. Writes go through a buffered file and are fsynced in
+    batches (every fsync_batch records or fsync_interval seconds, whichever
+    comes first) so the ingest path never waits on the disk per read.
+    """
+
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024,
+                 fsync_interval=1.0, fsync_batch=256):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self._lock = Lock()
+        self._file = None
+        self._segment_number = 0
+        self._segment_size = 0
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self.records_written = 0
+        self.bytes_written = 0
+        self.syncs = 0
+        self._stop = Event()
+        self._flusher = None
+        os.makedirs(directory, exist_ok=True)
+
+    def start_flusher(self):
+        """Sync batched records on an interval so a quiet feed is not left unsynced"""
+        if self._flusher is None:
+            self._flusher = Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            self.flush()
+
+    def _open_next_segment(self):
+        """Close the current segment and start a new one (caller holds the lock)"""
+        if self._file:
+            self._sync()
+            self._file.close()
+        existing = list_segments(self.directory)
+        if existing and not self._segment_number:
+            last = os.path.basename(existing[-1])
+            self._segment_number = int(last[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+        self._segment_number += 1
+        path = os.path.join(self.directory, _segment_name(self._segment_number))
+        self._file = open(path, 'ab', buffering=64 * 1024)
+        self._segment_size = self._file.tell()
+
+    def _sync(self):
+        """Flush buffered records to disk (caller holds the lock)"""
+        if self._file and self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.syncs += 1
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, line, source=''):
+        """Journal one raw line"""
+        record = f"{time.time():.6f}\t{source}\t{line}\n".encode('utf-8', errors='replace')
+        with self._lock:
+            if self._file is None or self._segment_size + len(record) > self.segment_bytes:
+                self._open_next_segment()
+            self._file.write(record)
+            self._segment_size += len(record)
+            self._pending += 1
+            self.records_written += 1
+            self.bytes_written += len(record)
+            if (self._pending >= self.fsync_batch
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+
+    def flush(self):
+        """Force any batched records to disk"""
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            if self._file:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'directory': self.directory,
+                'current_segment': _segment_name(self._segment_number) if self._file else None,
+                'records_written': self.records_written,
+                'bytes_written': self.bytes_written,
+                'pending_records': self._pending,
+                'syncs': self.syncs,
+                'segments': [os.path.basename(path) for path in list_segments(self.directory)]
+            }
+
+
+class JournalReader:
+    """Memory-mapped reader over journal segments"""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def records(self, since=None, until=None, source=None):
+        """Yield (timestamp, source, line) tuples in journal order"""
+        for path in list_segments(self.directory):
+            if os.path.getsize(path) == 0:
+                continue
+            with open(path, 'rb') as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start = 0
+                end = len(mm)
+                while start < end:
+                    newline = mm.find(b'\n', start)
+                    if newline == -1:
+                        break  # Partial trailing record from a crash mid-write
+                    record = mm[start:newline]
+                    start = newline + 1
+
+                    fields = record.split(b'\t', 2)
+                    if len(fields) != 3:
+                        continue
+                    try:
+                        timestamp = float(fields[0])
+                    except ValueError:
+                        continue
+                    if since is not None and timestamp < since:
+                        continue
+                    if until is not None and timestamp > until:
+                        continue
+                    record_source = fields[1].decode('utf-8', errors='replace')
+                    if source is not None and record_source != source:
+                        continue
+                    yield timestamp, record_source, fields[2].decode('utf-8', errors='replace')
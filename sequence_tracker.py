@@ -0,0 +1,185 @@
+# sequence_tracker.py - Sequence-gap detection for decoder read streams
+import time
+from threading import Lock
+
+
+class _LocationSequence:
+    """Sequence state for one decoder location"""
+
+    __slots__ = ('highest', 'gaps', 'received', 'replayed', 'duplicates', 'resets', 'resync')
+
+    def __init__(self):
+        self.highest = None
+        # Outstanding gaps as [first, last, requested_at, attempts], oldest first
+        self.gaps = []
+        self.received = 0
+        self.replayed = 0
+        self.duplicates = 0
+        self.resets = 0
+        self.resync = False  # Set by a new session, until the decoder sends a read we have not seen
+
+
+class SequenceTracker:
+    """Track per-decoder, per-location read sequence numbers.
+
+    Reads are keyed by decoder (peer host) and location so that state survives
+    a dropped TCP session: the first read after reconnecting reveals any reads
+    lost in between. Missing ranges are remembered so replayed records can be
+    accepted exactly once and everything else at or below the high-water mark
+    is reported as a duplicate.
+
+    A decoder that reboots starts counting again. A read more than
+    reset_threshold below the high-water mark is taken as that counter
+    reset: the stream starts over from it instead of dropping live reads as
+    duplicates. After a reconnect (see new_session) a decoder may also
+    re-send the last reads it buffered; until its first new read, anything
+    within resync_window of the high-water mark is one of those duplicates,
+    while a read numbered within resync_window of 1 is a fresh counter.
+    """
+
+    def __init__(self, retry_seconds=10.0, max_attempts=3, reset_threshold=100, resync_window=10,
+                 clock=time.monotonic):
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+        self.reset_threshold = reset_threshold
+        self.resync_window = resync_window
+        self._clock = clock
+        self._streams = {}  # (decoder, location) -> _LocationSequence
+        self._lock = Lock()
+        self.gaps_detected = 0
+        self.reads_missing = 0
+        self.reads_recovered = 0
+        self.gaps_abandoned = 0
+        self.counter_resets = 0
+
+    def new_session(self, decoder):
+        """A decoder (re)connected; its next read per location may come from a reset counter"""
+        with self._lock:
+            for (stream_decoder, _), stream in self._streams.items():
+                if stream_decoder == decoder:
+                    stream.resync = True
+
+    def observe(self, decoder, location, sequence):
+        """Record a read and decide what to do with it.
+
+        Returns (accept, replay_ranges) where accept is False for duplicates
+        and replay_ranges is a list of (first, last) sequence ranges that
+        should be requested from the decoder.
+        """
+        try:
+            seq = int(sequence)
+        except (TypeError, ValueError):
+            return True, []
+
+        now = self._clock()
+        with self._lock:
+            stream = self._streams.get((decoder, location))
+            if stream is None:
+                stream = self._streams[(decoder, location)] = _LocationSequence()
+
+            if stream.highest is None:
+                stream.highest = seq
+                stream.received += 1
+                return True, []
+
+            if seq > stream.highest:
+                stream.resync = False
+                replay = self._stale_gaps(stream, now)
+                if seq > stream.highest + 1:
+                    first, last = stream.highest + 1, seq - 1
+                    stream.gaps.append([first, last, now, 1])
+                    self.gaps_detected += 1
+                    self.reads_missing += last - first + 1
+                    replay.append((first, last))
+                stream.highest = seq
+                stream.received += 1
+                return True, replay
+
+            if self._fill_gap(stream, seq):
+                stream.received += 1
+                stream.replayed += 1
+                self.reads_recovered += 1
+                return True, []
+
+            behind = stream.highest - seq
+            fresh_counter = stream.resync and seq <= self.resync_window < behind
+            if fresh_counter or behind > self.reset_threshold:
+                # The decoder restarted its counter; follow the new one
+                stream.resync = False
+                stream.highest = seq
+                stream.gaps = []
+                stream.received += 1
+                stream.resets += 1
+                self.counter_resets += 1
+                return True, []
+
+            stream.duplicates += 1
+            return False, []
+
+    def _fill_gap(self, stream, seq):
+        """Remove seq from the outstanding gaps, returning True if it was missing"""
+        for index, gap in enumerate(stream.gaps):
+            first, last = gap[0], gap[1]
+            if first <= seq <= last:
+                if first == last:
+                    del stream.gaps[index]
+                elif seq == first:
+                    gap[0] = seq + 1
+                elif seq == last:
+                    gap[1] = seq - 1
+                else:
+                    stream.gaps.insert(index + 1, [seq + 1, last, gap[2], gap[3]])
+                    gap[1] = seq - 1
+                return True
+        return False
+
+    def _stale_gaps(self, stream, now):
+        """Return gaps due for another replay request, dropping hopeless ones"""
+        retry = []
+        kept = []
+        for gap in stream.gaps:
+            if now - gap[2] < self.retry_seconds:
+                kept.append(gap)
+            elif gap[3] >= self.max_attempts:
+                self.gaps_abandoned += 1
+            else:
+                gap[2] = now
+                gap[3] += 1
+                retry.append((gap[0], gap[1]))
+                kept.append(gap)
+        stream.gaps = kept
+        return retry
+
+    def reset(self):
+        """Forget all streams, e.g. after decoders restart their counters"""
+        with self._lock:
+            self._streams.clear()
+            self.gaps_detected = 0
+            self.reads_missing = 0
+            self.reads_recovered = 0
+            self.gaps_abandoned = 0
+            self.counter_resets = 0
+
+    def stats(self):
+        """Return counters and per-stream state for status endpoints"""
+        with self._lock:
+            return {
+                'gaps_detected': self.gaps_detected,
+                'reads_missing': self.reads_missing,
+                'reads_recovered': self.reads_recovered,
+                'gaps_abandoned': self.gaps_abandoned,
+                'counter_resets': self.counter_resets,
+                'streams': [
+                    {
+                        'decoder': decoder,
+                        'location': location,
+                        'highest_sequence': stream.highest,
+                        'received': stream.received,
+                        'replayed': stream.replayed,
+                        'duplicates': stream.duplicates,
+                        'resets': stream.resets,
+                        'outstanding_gaps': [[gap[0], gap[1]] for gap in stream.gaps]
+                    }
+                    for (decoder, location), stream in self._streams.items()
+                ]
+            }
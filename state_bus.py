@@ -0,0 +1,226 @@
+# state_bus.py - Local Unix-socket pub/sub from the ingest process to HTTP workers
+import json
+import os
+import queue
+import socket
+import threading
+import time
+
+from log_pipeline import get_logger
+
+bus_log = get_logger('state_bus')
+
+
+def encode(kind, **payload):
+    """One bus message as a newline-terminated JSON line"""
+    payload['type'] = kind
+    return (json.dumps(payload, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class StateBusServer:
+    """Publishes display state to any number of local subscribers.
+
+    Runs in the ingest process. Every subscriber gets the full state from
+    snapshot_fn() when it connects, then each published message, and a
+    heartbeat_fn() message once per heartbeat interval so slowly changing
+    values (mode, race name) converge without their own message. Messages are
+    encoded once and handed to a bounded queue per subscriber with its own
+    writer thread, so publishing never blocks on a slow worker; a subscriber
+    that falls max_backlog messages behind is disconnected and resyncs from a
+    fresh snapshot when it reconnects.
+    """
+
+    def __init__(self, path, snapshot_fn, heartbeat_fn=None, heartbeat_seconds=1.0, max_backlog=1000):
+        self.path = path
+        self.snapshot_fn = snapshot_fn
+        self.heartbeat_fn = heartbeat_fn
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_backlog = max_backlog
+        self._subscribers = {}  # socket -> outgoing message queue
+        self._followers = []    # (kind, changed event, payload_fn)
+        self._lock = threading.Lock()
+        self._sock = None
+        self._running = False
+        self.published = 0
+        self.connects = 0
+        self.dropped = 0
+
+    def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # Left behind by a previous ingest process
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.path)
+        self._sock.listen(64)
+        self._running = True
+        threading.Thread(target=self._accept_loop, name='state-bus-accept', daemon=True).start()
+        if self.heartbeat_fn:
+            threading.Thread(target=self._heartbeat_loop, name='state-bus-heartbeat', daemon=True).start()
+        for kind, changed, payload_fn in self._followers:
+            threading.Thread(target=self._follow_loop, args=(kind, changed, payload_fn),
+                             name=f'state-bus-{kind}', daemon=True).start()
+        bus_log.info("State bus listening on %s", self.path)
+
+    def stop(self):
+        self._running = False
+        if self._sock:
+            self._sock.close()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for conn in subscribers:
+            self._drop(conn)
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def follow(self, kind, changed, payload_fn):
+        """Publish payload_fn() as a `kind` message whenever the `changed` event
+        is set (call before start). It runs on its own thread, so whoever sets
+        the event never pays for encoding; a burst of changes goes out as one
+        message carrying the latest state."""
+        self._followers.append((kind, changed, payload_fn))
+
+    def publish(self, kind, **payload):
+        message = encode(kind, **payload)
+        with self._lock:
+            self.published += 1
+            subscribers = list(self._subscribers.items())
+        for conn, outgoing in subscribers:
+            try:
+                outgoing.put_nowait(message)
+            except queue.Full:
+                bus_log.warning("State bus subscriber fell %d messages behind, disconnecting", self.max_backlog)
+                self._drop(conn)
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                break  # Socket closed by stop()
+            outgoing = queue.Queue(maxsize=self.max_backlog)
+            with self._lock:
+                # Registered and seeded under the lock so no publish can slip in between
+                outgoing.put_nowait(encode('snapshot', **self.snapshot_fn()))
+                self._subscribers[conn] = outgoing
+                self.connects += 1
+            threading.Thread(target=self._writer, args=(conn, outgoing), name='state-bus-writer', daemon=True).start()
+
+    def _writer(self, conn, outgoing):
+        while True:
+            message = outgoing.get()
+            if message is None:
+                break
+            try:
+                conn.sendall(message)
+            except OSError:
+                break
+        self._drop(conn)
+
+    def _drop(self, conn):
+        with self._lock:
+            outgoing = self._subscribers.pop(conn, None)
+            if outgoing is None:
+                return
+            self.dropped += 1
+        try:
+            conn.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        conn.close()
+        try:
+            outgoing.put_nowait(None)  # Wake the writer so it exits
+        except queue.Full:
+            pass
+
+    def _follow_loop(self, kind, changed, payload_fn):
+        while self._running:
+            if not changed.wait(0.5):
+                continue
+            changed.clear()
+            try:
+                self.publish(kind, **payload_fn())
+            except Exception:
+                bus_log.exception("State bus %s update failed", kind)
+
+    def _heartbeat_loop(self):
+        while self._running:
+            time.sleep(self.heartbeat_seconds)
+            try:
+                self.publish('state', **self.heartbeat_fn())
+            except Exception:
+                bus_log.exception("State bus heartbeat failed")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'path': self.path,
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'connects': self.connects,
+                'dropped': self.dropped
+            }
+
+
+class StateBusClient:
+    """Subscribes to a StateBusServer and hands each message to on_message.
+
+    Runs in each HTTP worker on a daemon thread, reconnecting with backoff
+    whenever the ingest process is down or restarts. The first message after
+    every (re)connect is a full snapshot, so nothing needs replaying.
+    """
+
+    def __init__(self, path, on_message, max_backoff_seconds=5.0):
+        self.path = path
+        self.on_message = on_message
+        self.max_backoff_seconds = max_backoff_seconds
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.connected = False
+        self.messages = 0
+        self.connects = 0
+        self.last_message_at = None
+
+    def start(self):
+        """Start the subscriber thread (idempotent, safe to call per request)"""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='state-bus-client', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        backoff = 0.1
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(self.path)
+                    self.connected = True
+                    self.connects += 1
+                    backoff = 0.1
+                    bus_log.info("Subscribed to state bus at %s", self.path)
+                    for line in sock.makefile('rb'):
+                        self.messages += 1
+                        self.last_message_at = time.time()
+                        try:
+                            self.on_message(json.loads(line))
+                        except Exception:
+                            bus_log.exception("Failed to apply state bus message")
+            except OSError as e:
+                bus_log.debug("State bus unavailable at %s: %s", self.path, e)
+            if self.connected:
+                bus_log.warning("Lost state bus connection, reconnecting")
+            self.connected = False
+            time.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff_seconds)
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'connected': self.connected,
+            'connects': self.connects,
+            'messages': self.messages,
+            'last_message_at': self.last_message_at
+        }
@@ -0,0 +1,278 @@
+# style_scraper.py - Brand color/font extraction from a web page and its stylesheets
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from threading import Lock
+from urllib.parse import urljoin
+
+import requests
+import tinycss2
+from bs4 import BeautifulSoup
+
+USER_AGENT = 'Mozilla/5.0 (compatible; RaceDisplay/1.0)'
+
+NAMED_COLORS = {
+    'black': '#000000', 'white': '#ffffff', 'red': '#ff0000',
+    'green': '#008000', 'lime': '#00ff00', 'blue': '#0000ff', 'yellow': '#ffff00',
+    'purple': '#800080', 'gray': '#808080', 'grey': '#808080', 'orange': '#ffa500',
+    'navy': '#000080', 'teal': '#008080', 'maroon': '#800000', 'silver': '#c0c0c0',
+    'olive': '#808000', 'aqua': '#00ffff', 'fuchsia': '#ff00ff'
+}
+COLOR_FUNCTIONS = ('rgb', 'rgba', 'hsl', 'hsla')
+BACKGROUND_PROPERTIES = ('background', 'background-color')
+PAGE_SELECTORS = ('body', 'html', ':root')
+
+
+def _compact(nodes):
+    return ' '.join(tinycss2.serialize(nodes).split())
+
+
+def _collect_colors(nodes, counter):
+    """Count every color value in a declaration, including inside gradients and var() fallbacks"""
+    for node in nodes:
+        if node.type == 'hash' and len(node.value) in (3, 4, 6, 8):
+            value = node.value.lower()
+            if len(value) in (3, 4):
+                value = ''.join(c * 2 for c in value)
+            counter[f'#{value}'] += 1
+        elif node.type == 'function':
+            if node.lower_name in COLOR_FUNCTIONS:
+                counter[f'{node.lower_name}({_compact(node.arguments)})'] += 1
+            else:
+                _collect_colors(node.arguments, counter)
+        elif node.type == 'ident' and node.lower_value in NAMED_COLORS:
+            counter[NAMED_COLORS[node.lower_value]] += 1
+
+
+class ExtractedStyles:
+    """Usage counts of colors, font stacks and page backgrounds from one or more sheets"""
+
+    __slots__ = ('colors', 'fonts', 'backgrounds', 'imports')
+
+    def __init__(self):
+        self.colors = Counter()
+        self.fonts = Counter()
+        self.backgrounds = Counter()
+        self.imports = []
+
+    def update(self, other):
+        self.colors.update(other.colors)
+        self.fonts.update(other.fonts)
+        self.backgrounds.update(other.backgrounds)
+
+    def add_declarations(self, declarations, page_level=False):
+        for decl in declarations:
+            if decl.type != 'declaration':
+                continue
+            if decl.lower_name == 'font-family':
+                stack = _compact(decl.value)
+                if stack and not stack.startswith(('inherit', 'var(')):
+                    self.fonts[stack] += 1
+                continue
+            colors = Counter()
+            _collect_colors(decl.value, colors)
+            self.colors.update(colors)
+            if page_level and decl.lower_name in BACKGROUND_PROPERTIES:
+                self.backgrounds.update(colors)
+
+    def add_rules(self, rules):
+        for rule in rules:
+            if rule.type == 'qualified-rule':
+                selectors = {part.strip().lower() for part in _compact(rule.prelude).split(',')}
+                declarations = tinycss2.parse_declaration_list(rule.content, skip_comments=True, skip_whitespace=True)
+                self.add_declarations(declarations, page_level=bool(selectors & set(PAGE_SELECTORS)))
+            elif rule.type == 'at-rule':
+                if rule.lower_at_keyword == 'import':
+                    for node in rule.prelude:
+                        if node.type in ('url', 'string'):
+                            self.imports.append(node.value)
+                            break
+                        if node.type == 'function' and node.lower_name == 'url' and node.arguments:
+                            self.imports.append(node.arguments[0].value)
+                            break
+                elif rule.content is not None:
+                    if rule.lower_at_keyword == 'font-face':
+                        continue  # Declares a font; the family only counts where it is used
+                    if rule.lower_at_keyword in ('media', 'supports', 'layer', 'document', 'container'):
+                        self.add_rules(tinycss2.parse_rule_list(rule.content, skip_comments=True, skip_whitespace=True))
+
+    def as_dict(self, limit):
+        return {
+            'colors': [value for value, _ in self.colors.most_common(limit)],
+            'fonts': [value for value, _ in self.fonts.most_common(limit)],
+            'backgrounds': [value for value, _ in self.backgrounds.most_common(limit)]
+        }
+
+
+def extract_styles(css_text):
+    """Colors, font stacks and @import URLs from a stylesheet, in one parse"""
+    styles = ExtractedStyles()
+    styles.add_rules(tinycss2.parse_stylesheet(css_text, skip_comments=True, skip_whitespace=True))
+    return styles
+
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class StyleScraper:
+    """Fetches a page and its stylesheets and summarizes the colors and fonts in use.
+
+    Stylesheets (and one level of @import) are fetched in parallel on a small
+    thread pool, and the whole request is bounded by deadline_seconds: sheets
+    still outstanding then are left out rather than waited for. Results are
+    cached per page URL, and extracted sheets per stylesheet URL, so pages on
+    the same site share their common CSS.
+    """
+
+    def __init__(self, deadline_seconds=8.0, page_timeout_seconds=5.0, workers=6,
+                 max_stylesheets=20, cache_ttl_seconds=600, cache_entries=64, limit=20):
+        self.deadline_seconds = deadline_seconds
+        self.page_timeout_seconds = page_timeout_seconds
+        self.workers = workers
+        self.max_stylesheets = max_stylesheets
+        self.limit = limit
+        self.pages = TTLCache(cache_ttl_seconds, cache_entries)
+        self.sheets = TTLCache(cache_ttl_seconds, cache_entries * 4)
+        self._executor = None
+        self._lock = Lock()
+        self.fetched = 0
+        self.failed = 0
+        self.timed_out = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='style-fetch')
+            return self._executor
+
+    def _fetch_sheet(self, css_url, timeout):
+        styles = self.sheets.get(css_url)
+        if styles is None:
+            response = requests.get(css_url, headers={'User-Agent': USER_AGENT}, timeout=timeout)
+            response.raise_for_status()
+            styles = extract_styles(response.text)
+            self.sheets.put(css_url, styles)
+        return styles
+
+    def fetch(self, url):
+        """Summary of a page's styles; raises requests.RequestException if the page itself fails"""
+        cached = self.pages.get(url)
+        if cached is not None:
+            return dict(cached, cached=True)
+
+        deadline = time.monotonic() + self.deadline_seconds
+        response = requests.get(url, headers={'User-Agent': USER_AGENT},
+                                timeout=min(self.page_timeout_seconds, self.deadline_seconds))
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, 'html.parser')
+
+        styles = ExtractedStyles()
+        for style in soup.find_all('style'):
+            inline = extract_styles(style.string or '')
+            styles.update(inline)
+            styles.imports.extend(urljoin(url, href) for href in inline.imports)
+        body = soup.find('body')
+        if body and body.get('style'):
+            styles.add_declarations(tinycss2.parse_declaration_list(body['style']), page_level=True)
+
+        sheet_urls = [urljoin(url, link['href']) for link in soup.find_all('link', rel='stylesheet')
+                      if link.get('href')]
+        report = self._fetch_sheets(sheet_urls + styles.imports, styles, deadline)
+
+        result = styles.as_dict(self.limit)
+        result['title'] = soup.title.string if soup.title and soup.title.string else ''
+        result['url'] = url
+        result['stylesheets'] = report
+        if not report['timed_out']:
+            self.pages.put(url, result)  # An incomplete result is worth retrying
+        return dict(result, cached=False)
+
+    def _fetch_sheets(self, sheet_urls, styles, deadline):
+        """Fetch sheets concurrently until done or the deadline, merging into styles"""
+        report = {'fetched': 0, 'failed': 0, 'timed_out': 0}
+        executor = self._get_executor()
+        seen = set()
+        pending = {}
+
+        def submit(css_url, depth):
+            remaining = deadline - time.monotonic()
+            if css_url in seen or len(seen) >= self.max_stylesheets or remaining <= 0:
+                return
+            seen.add(css_url)
+            pending[executor.submit(self._fetch_sheet, css_url, remaining)] = (css_url, depth)
+
+        for css_url in sheet_urls:
+            submit(css_url, 0)
+        while pending:
+            remaining = deadline - time.monotonic()
+            done, _ = wait(pending, timeout=max(0, remaining), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                css_url, depth = pending.pop(future)
+                try:
+                    sheet = future.result()
+                except Exception:  # Unreachable, erroring or unparseable sheets are skipped
+                    report['failed'] += 1
+                    continue
+                report['fetched'] += 1
+                styles.update(sheet)
+                if depth == 0:
+                    for href in sheet.imports:
+                        submit(urljoin(css_url, href), 1)
+        for future in pending:
+            future.cancel()  # Not started yet; ones already running finish on their own timeout
+        report['timed_out'] = len(pending)
+
+        with self._lock:
+            self.fetched += report['fetched']
+            self.failed += report['failed']
+            self.timed_out += report['timed_out']
+        return report
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cached_pages': len(self.pages),
+                'cached_stylesheets': len(self.sheets),
+                'page_cache_hits': self.pages.hits,
+                'stylesheet_cache_hits': self.sheets.hits,
+                'stylesheets_fetched': self.fetched,
+                'stylesheets_failed': self.failed,
+                'stylesheets_timed_out': self.timed_out
+            }
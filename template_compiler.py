@@ -0,0 +1,339 @@
+# template_compiler.py - Compile saved templates into minified CSS and slot render plans
+import html
+import re
+from html.parser import HTMLParser
+
+import tinycss2
+from tinycss2.serializer import serialize_identifier
+
+PLAN_VERSION = 2
+
+STYLE_BLOCK = re.compile(r'<style\b[^>]*>(.*?)</style\s*>', re.IGNORECASE | re.DOTALL)
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                 'link', 'meta', 'source', 'track', 'wbr'}
+VENDOR_PREFIXES = ('-webkit-', '-moz-', '-ms-', '-o-')
+CSS_URL = re.compile(r'url\(\s*([\'"]?)(.*?)\1\s*\)', re.IGNORECASE | re.DOTALL)
+URL_ATTRIBUTES = ('src', 'poster', 'data-src')
+
+# Placeholder that rotates through the element's data-messages, as on the display
+MESSAGE_KEY = 'custom_message'
+
+
+# --- CSS -------------------------------------------------------------------
+
+def _compact(nodes):
+    """Serialize component values with insignificant whitespace removed"""
+    parts = []
+    space = False
+    for node in nodes:
+        if node.type in ('whitespace', 'comment'):
+            space = bool(parts)
+            continue
+        tight = (node.type == 'literal' and node.value in (',', ';')) or node.type == '{} block'
+        if space and not tight and parts[-1] not in (',', ';') and not parts[-1].endswith('}'):
+            parts.append(' ')
+        space = False
+        if node.type == '() block':
+            parts.append(f'({_compact(node.content)})')
+        elif node.type == '[] block':
+            parts.append(f'[{_compact(node.content)}]')
+        elif node.type == '{} block':
+            parts.append(f'{{{_compact(node.content)}}}')
+        elif node.type == 'function':
+            parts.append(f'{serialize_identifier(node.name)}({_compact(node.arguments)})')
+        else:
+            parts.append(node.serialize())
+    return ''.join(parts)
+
+
+def _is_prefixed(text):
+    return any(prefix in text for prefix in VENDOR_PREFIXES)
+
+
+def _declarations(rule, stats):
+    """Parse a rule's declarations as [name, key, value, important], dropping
+    repeats of an identical declaration within the rule (the last one is kept)"""
+    parsed = []
+    for node in tinycss2.parse_declaration_list(rule.content, skip_comments=True, skip_whitespace=True):
+        if node.type != 'declaration':
+            continue  # Parse errors are dropped by browsers too
+        key = node.name if node.name.startswith('--') else node.lower_name
+        parsed.append([node.name, key, _compact(node.value).strip(), node.important])
+    kept, seen = [], set()
+    for decl in reversed(parsed):
+        identity = (decl[1], decl[2], decl[3])
+        if identity in seen:
+            stats['declarations_removed'] += 1
+            continue
+        seen.add(identity)
+        kept.append(decl)
+    kept.reverse()
+    return kept
+
+
+def _compile_rules(nodes, stats):
+    """Minify one block of rules, removing declarations a later rule with the
+    same selector overrides. Rule order is never changed."""
+    items = []
+    for node in nodes:
+        if node.type == 'qualified-rule':
+            items.append(['rule', _compact(node.prelude).strip(), _declarations(node, stats)])
+        elif node.type == 'at-rule':
+            prelude = _compact(node.prelude).strip()
+            head = f'@{serialize_identifier(node.at_keyword)}{" " if prelude else ""}{prelude}'
+            if node.content is None:
+                items.append(['text', f'{head};'])
+            elif node.lower_at_keyword in ('media', 'supports', 'document', 'layer', 'container'):
+                inner = tinycss2.parse_rule_list(node.content, skip_comments=True, skip_whitespace=True)
+                body = _compile_rules(inner, stats)
+                if body:
+                    items.append(['text', f'{head}{{{body}}}'])
+            else:
+                items.append(['text', f'{head}{{{_compact(node.content).strip()}}}'])
+
+    # Walk backwards so each declaration knows whether a later one overrides it.
+    # Vendor-prefixed values are left alone: they are usually deliberate fallbacks.
+    later = {}  # (selector, property) -> a later declaration was !important
+    for item in reversed(items):
+        if item[0] != 'rule':
+            continue
+        selector, kept = item[1], []
+        for decl in reversed(item[2]):
+            slot = (selector, decl[1])
+            if slot in later and (later[slot] or not decl[3]) and not _is_prefixed(decl[2]):
+                stats['declarations_removed'] += 1
+                continue
+            later[slot] = later.get(slot, False) or decl[3]
+            kept.append(decl)
+        kept.reverse()
+        item[2] = kept
+
+    out = []
+    for item in items:
+        if item[0] == 'text':
+            out.append(item[1])
+        elif item[2]:
+            body = ';'.join(f"{name}:{value}{'!important' if important else ''}"
+                            for name, _, value, important in item[2])
+            out.append(f'{item[1]}{{{body}}}')
+        else:
+            stats['rules_removed'] += 1
+    return ''.join(out)
+
+
+def minify_css(css_text):
+    """Deduplicate and minify a stylesheet. Returns (css, stats)."""
+    stats = {'rules_removed': 0, 'declarations_removed': 0}
+    nodes = tinycss2.parse_stylesheet(css_text, skip_comments=True, skip_whitespace=True)
+    return _compile_rules(nodes, stats), stats
+
+
+# --- HTML ------------------------------------------------------------------
+
+class _SlotScanner(HTMLParser):
+    """Finds data-placeholder elements and the character ranges their values replace"""
+
+    def __init__(self, markup):
+        super().__init__(convert_charrefs=True)
+        self._line_starts = [0] + [m.end() for m in re.finditer('\n', markup)]
+        self.cuts = []      # (start, end, slot, replacement_prefix, replacement_suffix)
+        self._open = None   # [tag, depth, content_start, slot] for the placeholder being read
+
+    def _offset(self):
+        line, col = self.getpos()
+        return self._line_starts[line - 1] + col
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, self_closing=False)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, self_closing=True)
+
+    def _start(self, tag, attrs, self_closing):
+        if self._open is not None:
+            # Filling the outer placeholder replaces everything inside it
+            if tag == self._open[0] and not self_closing:
+                self._open[1] += 1
+            return
+        attributes = dict(attrs)
+        key = attributes.get('data-placeholder')
+        if not key:
+            return
+        start = self._offset()
+        end = start + len(self.get_starttag_text())
+        if tag == 'img':
+            # The value goes into src; the rest of the tag is rebuilt around it
+            rest = ''.join(
+                f' {name}' if value is None else f' {name}="{html.escape(value)}"'
+                for name, value in attrs if name != 'src'
+            )
+            slot = {'key': key, 'kind': 'src', 'default': attributes.get('src') or ''}
+            self.cuts.append((start, end, slot, f'<img{rest} src="', '"' + (' />' if self_closing else '>')))
+        elif tag not in VOID_ELEMENTS and not self_closing:
+            if key == MESSAGE_KEY:
+                messages = [m.strip() for m in (attributes.get('data-messages') or '').split(',')]
+                slot = {'key': key, 'kind': 'message', 'options': [m for m in messages if m]}
+            else:
+                slot = {'key': key, 'kind': 'text'}
+            self._open = [tag, 1, end, slot]
+
+    def handle_endtag(self, tag):
+        if self._open is None or tag != self._open[0]:
+            return
+        self._open[1] -= 1
+        if self._open[1] == 0:
+            _, _, content_start, slot = self._open
+            self.cuts.append((content_start, self._offset(), slot, '', ''))
+            self._open = None
+
+
+class _AssetScanner(HTMLParser):
+    """Collects the image, media and font URLs a piece of markup will load"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.urls = []
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if not value:
+                continue
+            if name in URL_ATTRIBUTES:
+                self.urls.append(value)
+            elif name == 'srcset':
+                self.urls.extend(candidate.split()[0] for candidate in value.split(',') if candidate.strip())
+            elif name == 'href' and tag == 'link':
+                self.urls.append(value)
+            elif name == 'style':
+                self.urls.extend(match.group(2) for match in CSS_URL.finditer(value))
+
+    handle_startendtag = handle_starttag
+
+
+def _prefetchable(url):
+    url = url.strip()
+    return bool(url) and not url.startswith(('data:', '#', 'javascript:')) and '{{' not in url
+
+
+def collect_assets(markup, css, slots):
+    """Asset manifest for one state: the URLs it always loads, plus the runner
+    fields bound into image src attributes (e.g. a photo URL per runner)"""
+    scanner = _AssetScanner()
+    scanner.feed(markup)
+    scanner.close()
+    urls = scanner.urls + [match.group(2) for match in CSS_URL.finditer(css)]
+    return {
+        'urls': sorted({url.strip() for url in urls if _prefetchable(url)}),
+        'runner_fields': sorted({slot['key'] for slot in slots if slot['kind'] == 'src'})
+    }
+
+
+def compile_markup(markup):
+    """Split markup into static segments around its placeholder slots.
+    Returns (segments, slots) with len(segments) == len(slots) + 1."""
+    scanner = _SlotScanner(markup)
+    scanner.feed(markup)
+    scanner.close()
+    segments, slots = [], []
+    position, suffix = 0, ''
+    for start, end, slot, prefix, next_suffix in sorted(scanner.cuts, key=lambda cut: cut[0]):
+        if slot['kind'] != 'src':
+            slot.setdefault('default', markup[start:end])
+        segments.append(suffix + markup[position:start] + prefix)
+        slots.append(slot)
+        position, suffix = end, next_suffix
+    segments.append(suffix + markup[position:])
+    return segments, slots
+
+
+# --- Plans -----------------------------------------------------------------
+
+def compile_state(state):
+    """Render plan for one template state ({html, css?, canvasWidth, canvasHeight}).
+
+    Inline <style> blocks are pulled out of the markup and merged ahead of the
+    state's own css, matching the order the display applies them in.
+    """
+    markup = state.get('html') or ''
+    sources = STYLE_BLOCK.findall(markup)
+    if state.get('css'):
+        sources.append(state['css'])
+    source_css = '\n'.join(sources)
+    css, stats = minify_css(source_css)
+    body = STYLE_BLOCK.sub('', markup).strip()
+    segments, slots = compile_markup(body)
+    assets = collect_assets(body, source_css, slots)
+    stats.update({
+        'source_bytes': len(markup.encode('utf-8')) + len((state.get('css') or '').encode('utf-8')),
+        'css_bytes': len(source_css.encode('utf-8')),
+        'compiled_css_bytes': len(css.encode('utf-8')),
+        'slots': len(slots),
+        'assets': len(assets['urls'])
+    })
+    return {
+        'css': css,
+        'segments': segments,
+        'slots': slots,
+        'assets': assets,
+        'canvasWidth': state.get('canvasWidth'),
+        'canvasHeight': state.get('canvasHeight'),
+        'stats': stats
+    }
+
+
+def compile_template(data):
+    """Render plans for every state of a saved template.
+    Two-state templates compile to 'active' and 'resting'; legacy ones to 'default'."""
+    states = {}
+    if data.get('activeState') or data.get('restingState'):
+        for name in ('active', 'resting'):
+            if data.get(f'{name}State'):
+                states[name] = compile_state(data[f'{name}State'])
+    else:
+        states['default'] = compile_state(data)
+    return {
+        'version': PLAN_VERSION,
+        'canvasWidth': data.get('canvasWidth'),
+        'canvasHeight': data.get('canvasHeight'),
+        'states': states,
+        'assets': {
+            'urls': sorted({url for plan in states.values() for url in plan['assets']['urls']}),
+            'runner_fields': sorted({key for plan in states.values() for key in plan['assets']['runner_fields']})
+        }
+    }
+
+
+def _slot_value(slot, runner, message_index):
+    if slot['kind'] == 'message':
+        options = slot['options']
+        return html.escape(options[message_index % len(options)]) if options else ''
+    if runner is None:
+        # Nothing to bind (resting state): leave the placeholder as designed
+        return html.escape(slot['default']) if slot['kind'] == 'src' else slot['default']
+    value = runner.get(slot['key'])
+    value = '' if value is None else str(value)
+    return html.escape(value) if slot['kind'] == 'src' else html.escape(value, quote=False)
+
+
+def runner_assets(assets, runners):
+    """The manifest's URLs plus the image URLs bound in for each of these runners"""
+    urls = list(assets['urls'])
+    seen = set(urls)
+    for runner in runners:
+        for key in assets['runner_fields']:
+            url = str(runner.get(key) or '')
+            if url not in seen and _prefetchable(url):
+                seen.add(url)
+                urls.append(url)
+    return urls
+
+
+def bind(plan_state, runner=None, message_index=0):
+    """Fill a state's slots from a runner dict and return the finished HTML.
+    Fields the runner lacks render empty, as they do on the display."""
+    segments = plan_state['segments']
+    parts = [segments[0]]
+    for slot, segment in zip(plan_state['slots'], segments[1:]):
+        parts.append(_slot_value(slot, runner, message_index))
+        parts.append(segment)
+    return ''.join(parts)
@@ -0,0 +1,415 @@
+# template_repository.py - Cached, indexed access to saved display templates
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from threading import Lock
+
+from template_compiler import compile_template
+
+
+def safe_template_name(name):
+    """Filesystem-safe template name, matching how templates have always been saved"""
+    return ''.join(c for c in name if c.isalnum() or c in ('_', '-')).rstrip()
+
+
+def revision_id(data):
+    """Content hash of a template, independent of key order and file formatting"""
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(canonical).hexdigest()[:16]
+
+
+def write_atomic(path, text):
+    """Write a file so readers see either the old or the new contents, never a partial write"""
+    tmp_path = os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as fp:
+            fp.write(text)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class PatchError(ValueError):
+    """A template patch that cannot be applied"""
+
+
+class TemplateError(ValueError):
+    """A template that cannot be compiled into a render plan, so is not saved"""
+
+
+def _compile(data):
+    """compile_template, with malformed template data reported as TemplateError"""
+    try:
+        return compile_template(data)
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        raise TemplateError(f'Template cannot be compiled: {e}') from e
+
+
+class RevisionConflict(Exception):
+    """A patch was made against a revision that is no longer current"""
+
+    def __init__(self, current):
+        super().__init__(f'Template has changed; current revision is {current}')
+        self.current = current
+
+
+def _splice(text, edits):
+    """Apply [offset, delete_count, insert] edits, given against the original text"""
+    if not isinstance(text, str):
+        raise PatchError('$splice applies only to string fields')
+    for edit in edits if isinstance(edits, list) else [None]:
+        if (not isinstance(edit, list) or len(edit) != 3 or not isinstance(edit[0], int)
+                or not isinstance(edit[1], int) or not isinstance(edit[2], str)):
+            raise PatchError('$splice edits must be [offset, delete_count, text]')
+    pieces, position = [], 0
+    for offset, delete, insert in sorted(edits, key=lambda edit: edit[0]):
+        if offset < position or delete < 0 or offset + delete > len(text):
+            raise PatchError('$splice edits overlap or fall outside the field')
+        pieces.append(text[position:offset])
+        pieces.append(insert)
+        position = offset + delete
+    pieces.append(text[position:])
+    return ''.join(pieces)
+
+
+def merge_patch(target, patch):
+    """RFC 7396 JSON merge patch: objects merge, null deletes, anything else replaces.
+
+    A string field may instead be given as {"$splice": [[offset, delete_count, text], ...]}
+    so a small edit to a large html field does not resend the whole string.
+    """
+    if not isinstance(patch, dict):
+        return patch
+    if set(patch) == {'$splice'}:
+        return _splice(target, patch['$splice'])
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+class CachedTemplate:
+    """One parsed template plus its serialized response body and ETag"""
+
+    __slots__ = ('name', 'path', 'format', 'mtime_ns', 'size', 'data', 'body', 'etag',
+                 'revision', '_plan', '_plan_body')
+
+    def __init__(self, name, path, fmt, st, data):
+        self.name = name
+        self.path = path
+        self.format = fmt
+        self.mtime_ns = st.st_mtime_ns
+        self.size = st.st_size
+        self.data = data
+        self.body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha1(self.body).hexdigest()
+        self.revision = revision_id(data) if fmt == 'json' else None
+        self._plan = None
+        self._plan_body = None
+
+    def matches(self, st):
+        return st.st_mtime_ns == self.mtime_ns and st.st_size == self.size
+
+    def plan(self):
+        """Compiled render plan (see template_compiler), built once per file version"""
+        if self._plan is None:
+            self._plan = compile_template(self.data)
+        return self._plan
+
+    def plan_body(self):
+        """The render plan serialized for /api/templates/<name>/compiled"""
+        if self._plan_body is None:
+            self._plan_body = json.dumps(self.plan(), separators=(',', ':')).encode('utf-8')
+        return self._plan_body
+
+    def metadata(self):
+        data = self.data
+        return {
+            'name': self.name,
+            'displayName': data.get('name', self.name),
+            'format': self.format,
+            'version': data.get('version', '1.0') if self.format == 'json' else 'legacy',
+            'canvasWidth': data.get('canvasWidth'),
+            'canvasHeight': data.get('canvasHeight'),
+            'updated': datetime.fromtimestamp(self.mtime_ns / 1e9).isoformat(),
+            'size': self.size,
+            'etag': self.etag,
+            'revision': self.revision
+        }
+
+
+class TemplateRepository:
+    """saved_templates/ with parsed templates held in memory.
+
+    A template is read and parsed once and then served from memory until its
+    file's mtime or size changes (one stat per request). The name/metadata
+    index is rebuilt only when the directory's mtime changes. JSON templates
+    win over legacy .html files of the same name, as before.
+
+    JSON saves are written atomically. With a revision_dir, every distinct
+    version is also kept as <revision_dir>/<name>/<revision>.json (revision
+    being a content hash) alongside a history.json log, so a template can be
+    patched against a known revision and rolled back to any kept one.
+    """
+
+    def __init__(self, template_dir, revision_dir=None, max_revisions=50):
+        self.template_dir = template_dir
+        self.revision_dir = revision_dir
+        self.max_revisions = max_revisions
+        self._cache = {}       # safe name -> CachedTemplate
+        self._index = None     # safe name -> metadata dict
+        self._dir_mtime = None
+        self._lock = Lock()
+        self._write_lock = Lock()  # Serializes read-modify-write of template files
+        self.hits = 0
+        self.loads = 0
+        self.saves = 0
+        self.unchanged_saves = 0
+        self.patches = 0
+        self.patch_bytes = 0
+        os.makedirs(template_dir, exist_ok=True)
+        if revision_dir:
+            os.makedirs(revision_dir, exist_ok=True)
+
+    def _paths(self, name):
+        return (os.path.join(self.template_dir, f'{name}.json'),
+                os.path.join(self.template_dir, f'{name}.html'))
+
+    def _load(self, name):
+        """Return the current CachedTemplate for a safe name, reading it only if it changed"""
+        for path, fmt in zip(self._paths(name), ('json', 'html')):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            with self._lock:
+                cached = self._cache.get(name)
+                if cached and cached.path == path and cached.matches(st):
+                    self.hits += 1
+                    return cached
+            with open(path, 'r', encoding='utf-8') as fp:
+                data = json.load(fp) if fmt == 'json' else {'html': fp.read()}
+            cached = CachedTemplate(name, path, fmt, st, data)
+            with self._lock:
+                self.loads += 1
+                self._cache[name] = cached
+                if self._index is not None:
+                    self._index[name] = cached.metadata()
+            return cached
+        with self._lock:
+            self._cache.pop(name, None)
+        return None
+
+    def get(self, name):
+        """CachedTemplate for a template name, or None if it does not exist"""
+        return self._load(safe_template_name(name))
+
+    def _refresh_index(self):
+        dir_mtime = os.stat(self.template_dir).st_mtime_ns
+        with self._lock:
+            if self._index is not None and dir_mtime == self._dir_mtime:
+                return
+        names = sorted({
+            filename[:-5] for filename in os.listdir(self.template_dir)
+            if filename.endswith(('.json', '.html'))
+        })
+        index = {}
+        for name in names:
+            try:
+                cached = self._load(name)
+            except (OSError, ValueError):
+                continue  # Unreadable template; leave it out of the index
+            if cached:
+                index[name] = cached.metadata()
+        with self._lock:
+            self._index = index
+            self._dir_mtime = dir_mtime
+            for name in set(self._cache) - set(index):
+                del self._cache[name]
+
+    def names(self):
+        self._refresh_index()
+        with self._lock:
+            return list(self._index)
+
+    def index(self):
+        """Metadata (name, canvas size, version, updated time) for every template"""
+        self._refresh_index()
+        with self._lock:
+            return list(self._index.values())
+
+    def _invalidate(self, name):
+        with self._lock:
+            self._cache.pop(name, None)
+            if self._index is not None:
+                self._index.pop(name, None)
+
+    def _history_path(self, name):
+        return os.path.join(self.revision_dir, name, 'history.json')
+
+    def _read_history(self, name):
+        try:
+            with open(self._history_path(name), 'r', encoding='utf-8') as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return []
+
+    def _record_revision(self, name, data, revision, source):
+        """Keep a copy of this version and log it (caller holds the write lock)"""
+        directory = os.path.join(self.revision_dir, name)
+        os.makedirs(directory, exist_ok=True)
+        history = self._read_history(name)
+        if not history:
+            # First versioned save of a template that predates versioning:
+            # keep what was on disk so the save can be rolled back
+            current = self._load(name)
+            if current and current.revision and current.revision != revision:
+                self._record_revision(name, current.data, current.revision, 'import')
+                history = self._read_history(name)
+        revision_path = os.path.join(directory, f'{revision}.json')
+        if not os.path.exists(revision_path):
+            write_atomic(revision_path, json.dumps(data, separators=(',', ':')))
+        entry = {
+            'revision': revision,
+            'parent': history[-1]['revision'] if history else None,
+            'source': source,
+            'saved_at': time.time(),
+            'size': os.path.getsize(revision_path)
+        }
+        history.append(entry)
+        dropped, history = history[:-self.max_revisions], history[-self.max_revisions:]
+        write_atomic(self._history_path(name), json.dumps(history, indent=2))
+        kept = {item['revision'] for item in history}
+        for item in dropped:
+            if item['revision'] not in kept:
+                try:
+                    os.remove(os.path.join(directory, f"{item['revision']}.json"))
+                except FileNotFoundError:
+                    pass
+        return entry
+
+    def _write(self, safe, template_data, source):
+        """Write a JSON template (caller holds the write lock).
+        Returns (revision, removed_html); identical content is not rewritten."""
+        json_path, html_path = self._paths(safe)
+        revision = revision_id(template_data)
+        current = self._load(safe)
+        if current and current.format == 'json' and current.revision == revision:
+            self.unchanged_saves += 1
+            return revision, False
+        plan = _compile(template_data)  # Compile on save rather than on the first display request
+        if self.revision_dir:
+            self._record_revision(safe, template_data, revision, source)
+        write_atomic(json_path, json.dumps(template_data, indent=2))
+        self.saves += 1
+        self._invalidate(safe)
+        removed_html = False
+        if os.path.exists(html_path):
+            os.remove(html_path)
+            removed_html = True
+        self._load(safe)._plan = plan
+        return revision, removed_html
+
+    def save(self, name, template_data):
+        """Write a JSON template, replacing any legacy .html version.
+        Returns (revision, removed_html); raises TemplateError, leaving the
+        saved template as it was, if it does not compile."""
+        with self._write_lock:
+            return self._write(safe_template_name(name), template_data, 'save')
+
+    def patch(self, name, changes, base=None, patch_bytes=0):
+        """Apply a merge patch (see merge_patch) to a saved JSON template.
+
+        base, if given, must be the current revision; otherwise RevisionConflict
+        is raised so a stale editor cannot overwrite newer work. Returns
+        (revision, template_data), or None if the template does not exist.
+        """
+        if not isinstance(changes, dict):
+            raise PatchError('Patch must be a JSON object')
+        safe = safe_template_name(name)
+        with self._write_lock:
+            current = self._load(safe)
+            if current is None or current.format != 'json':
+                return None
+            if base is not None and base != current.revision:
+                raise RevisionConflict(current.revision)
+            patched = merge_patch(current.data, changes)
+            patched['name'] = current.data.get('name', name)  # Renaming is not a patch
+            if current.data.get('version'):
+                patched['version'] = current.data['version']
+            if 'activeState' in current.data and not (patched.get('activeState') or {}).get('html'):
+                raise PatchError('Patch would remove the active state html')
+            revision, _ = self._write(safe, patched, 'patch')
+            self.patches += 1
+            self.patch_bytes += patch_bytes
+            return revision, patched
+
+    def revisions(self, name):
+        """Saved versions of a template, newest first"""
+        if not self.revision_dir:
+            return []
+        return list(reversed(self._read_history(safe_template_name(name))))
+
+    def get_revision(self, name, revision):
+        """Template data as of a revision, or None if it is not kept"""
+        if not self.revision_dir or not revision or not all(c in '0123456789abcdef' for c in revision):
+            return None
+        path = os.path.join(self.revision_dir, safe_template_name(name), f'{revision}.json')
+        try:
+            with open(path, 'r', encoding='utf-8') as fp:
+                return json.load(fp)
+        except FileNotFoundError:
+            return None
+
+    def rollback(self, name, revision):
+        """Make a kept revision current again (also restores a deleted template).
+        The rollback is itself logged as a new history entry. Returns the revision or None."""
+        data = self.get_revision(name, revision)
+        if data is None:
+            return None
+        with self._write_lock:
+            return self._write(safe_template_name(name), data, 'rollback')[0]
+
+    def save_html(self, name, html):
+        """Write a legacy single-HTML template; raises TemplateError if it does not compile"""
+        safe = safe_template_name(name)
+        plan = _compile({'html': html})
+        with self._write_lock:
+            write_atomic(self._paths(safe)[1], html)
+            self._invalidate(safe)
+            self._load(safe)._plan = plan
+
+    def delete(self, name):
+        """Remove both formats of a template; returns False if neither existed.
+        Kept revisions stay, so a deleted template can be rolled back."""
+        safe = safe_template_name(name)
+        deleted = False
+        with self._write_lock:
+            for path in self._paths(safe):
+                if os.path.exists(path):
+                    os.remove(path)
+                    deleted = True
+            self._invalidate(safe)
+        return deleted
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cached': len(self._cache),
+                'indexed': len(self._index) if self._index is not None else None,
+                'hits': self.hits,
+                'loads': self.loads,
+                'saves': self.saves,
+                'unchanged_saves': self.unchanged_saves,
+                'patches': self.patches,
+                'patch_bytes': self.patch_bytes
+            }
@@ -0,0 +1,119 @@
+# timing_parsers.py - Decoder read formats, dispatched on each line's format prefix
+from operator import itemgetter
+
+# Every parsed read has these keys; formats without a column leave it ''
+READ_FIELDS = ('format', 'sequence', 'location', 'bib', 'time', 'gator', 'tagcode', 'lap')
+SEPARATORS = ('~', ',', '\t')
+
+
+class TimingFormat:
+    """One line format: its separator, its format id (the first column, or None
+    for exports that have no id column) and which column holds each field.
+
+    The column lookup is compiled once into an itemgetter, so parsing a line
+    is a split, a length check and one tuple fetch.
+    """
+
+    def __init__(self, name, separator, columns, format_id=None):
+        self.name = name
+        self.separator = separator
+        self.format_id = format_id
+        self.columns = tuple(columns)
+        present = [(field, index) for index, field in enumerate(self.columns) if field]
+        self.min_fields = len(self.columns)
+        self._names = tuple(field for field, _ in present)
+        getter = itemgetter(*(index for _, index in present))
+        self._get = getter if len(present) > 1 else (lambda parts: (getter(parts),))
+        self._defaults = dict.fromkeys(READ_FIELDS, '')
+        self._defaults['format'] = format_id or name
+
+    def parse(self, line):
+        """The read as a dict, or None if the line is too short for this format"""
+        parts = line.split(self.separator)
+        if len(parts) < self.min_fields:
+            return None
+        read = self._defaults.copy()
+        read.update(zip(self._names, self._get(parts)))
+        return read
+
+
+# ChronoTrack id formats share one column layout; only the separator differs
+CHRONOTRACK_COLUMNS = ('format', 'sequence', 'location', 'bib', 'time', 'gator', 'tagcode', 'lap')
+
+BUILTIN_FORMATS = {
+    'CT01_33': TimingFormat('CT01_33', '~', CHRONOTRACK_COLUMNS, format_id='CT01_33'),
+    'CT01_13': TimingFormat('CT01_13', ',', CHRONOTRACK_COLUMNS, format_id='CT01_13'),
+    # Plain decoder/export output with no format id: bib, time, location
+    'csv': TimingFormat('csv', ',', ('bib', 'time', 'location')),
+    'tsv': TimingFormat('tsv', '\t', ('bib', 'time', 'location')),
+}
+
+
+class ParserRegistry:
+    """Picks the format for a line in O(1), however many formats are registered.
+
+    The text before the first separator is looked up as a format id; if it is
+    not one, the format registered without an id for that separator (plain
+    CSV/TSV output) is used. Lines that match nothing parse to None, which is
+    how control lines (acks, pings) fall through.
+    """
+
+    def __init__(self, formats=()):
+        self._by_id = {}
+        self._by_separator = {}
+        for timing_format in formats:
+            self.register(timing_format)
+
+    def register(self, timing_format):
+        if timing_format.format_id:
+            self._by_id[timing_format.format_id] = timing_format
+        else:
+            self._by_separator[timing_format.separator] = timing_format
+
+    def format_for(self, line):
+        cut, separator = len(line), None
+        for candidate in SEPARATORS:
+            index = line.find(candidate, 0, cut)
+            if index != -1:
+                cut, separator = index, candidate
+        if separator is None:
+            return None
+        timing_format = self._by_id.get(line[:cut])
+        if timing_format is not None and timing_format.separator == separator:
+            return timing_format
+        fallback = self._by_separator.get(separator)
+        if fallback is not None and line[:cut] and line[:cut].isalnum():
+            return fallback
+        return None
+
+    def parse(self, line):
+        timing_format = self.format_for(line)
+        return timing_format.parse(line) if timing_format else None
+
+    def parse_batch(self, lines):
+        """Parse many lines, reusing the previous line's format while the prefix
+        still matches (a decoder sends one format, so this skips nearly every lookup).
+        Returns one entry per line, None where a line did not parse."""
+        reads = []
+        current, marker = None, None
+        for line in lines:
+            if current is None or not line.startswith(marker):
+                current = self.format_for(line)
+                marker = (current.format_id + current.separator) if current and current.format_id else None
+                if marker is None:
+                    reads.append(current.parse(line) if current else None)
+                    current = None  # No id to recognise the next line by
+                    continue
+            reads.append(current.parse(line))
+        return reads
+
+    def formats(self):
+        return sorted(list(self._by_id) + [f.name for f in self._by_separator.values()])
+
+
+def build_registry(names):
+    """A registry with the named built-in formats, e.g. ['CT01_33', 'CT01_13']"""
+    unknown = [name for name in names if name not in BUILTIN_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown timing formats: {', '.join(unknown)}")
+    return ParserRegistry(BUILTIN_FORMATS[name] for name in names)
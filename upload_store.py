@@ -0,0 +1,170 @@
+# upload_store.py - Content-addressed storage for uploaded images
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from threading import Lock
+
+HASH_CHUNK = 1024 * 1024
+
+
+def file_digest(path):
+    """SHA-256 of a file, read in chunks"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(HASH_CHUNK), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _link_or_copy(source, target):
+    """Hard link source to target (replacing target), copying where links are unsupported"""
+    directory = os.path.dirname(target)
+    tmp_path = os.path.join(directory, f'.{os.path.basename(target)}.{os.getpid()}.tmp')
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, target)
+
+
+class UploadStore:
+    """Uploads stored once under their SHA-256, with display names as aliases.
+
+    Objects live in object_dir as <sha256><ext> and never change, so their
+    URLs can be cached forever. Each display name in upload_dir is a hard
+    link to its current object (older templates keep working by name), and
+    the alias map records which object a name points to so lookups never
+    need to rehash a file.
+    """
+
+    def __init__(self, upload_dir, object_dir, alias_path, url_prefix='/static/uploads'):
+        self.upload_dir = upload_dir
+        self.object_dir = object_dir
+        self.alias_path = alias_path
+        self.url_prefix = url_prefix
+        self._aliases = {}  # display filename -> {'digest', 'ext', 'size', 'uploaded_at'}
+        self._lock = Lock()
+        self.uploads = 0
+        self.dedupe_hits = 0
+        self.bytes_deduplicated = 0
+        os.makedirs(object_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.alias_path, 'r') as fp:
+                self._aliases = json.load(fp)
+        except (OSError, ValueError):
+            self._aliases = {}
+
+    def _save(self):
+        """Write the alias map atomically (caller holds the lock)"""
+        os.makedirs(os.path.dirname(self.alias_path), exist_ok=True)
+        tmp_path = f'{self.alias_path}.tmp'
+        with open(tmp_path, 'w') as fp:
+            json.dump(self._aliases, fp)
+        os.replace(tmp_path, self.alias_path)
+
+    def object_name(self, digest, ext):
+        return f'{digest}{ext.lower()}'
+
+    def object_url(self, entry):
+        return f"{self.url_prefix}/objects/{self.object_name(entry['digest'], entry['ext'])}"
+
+    def put(self, file_storage, filename):
+        """Store an uploaded file under its content hash and point filename at it.
+        Returns the alias entry."""
+        ext = os.path.splitext(filename)[1]
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.object_dir, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: file_storage.stream.read(HASH_CHUNK), b''):
+                    sha.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            digest = sha.hexdigest()
+            object_path = os.path.join(self.object_dir, self.object_name(digest, ext))
+            with self._lock:
+                self.uploads += 1
+                if os.path.exists(object_path):
+                    self.dedupe_hits += 1
+                    self.bytes_deduplicated += size
+                    os.remove(tmp_path)
+                else:
+                    # Read-only, so an in-place write through a hard-linked name fails
+                    # instead of silently changing an object cached as immutable
+                    os.chmod(tmp_path, 0o444)
+                    os.replace(tmp_path, object_path)
+                return self._set_alias(filename, digest, ext, size, object_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _set_alias(self, filename, digest, ext, size, object_path):
+        """Point filename at an object (caller holds the lock)"""
+        alias_path = os.path.join(self.upload_dir, filename)
+        current = self._aliases.get(filename)
+        if not (current and current['digest'] == digest and os.path.exists(alias_path)):
+            _link_or_copy(object_path, alias_path)
+        entry = self._aliases[filename] = {
+            'digest': digest,
+            'ext': ext.lower(),
+            'size': size,
+            'uploaded_at': time.time()
+        }
+        self._save()
+        return entry
+
+    def adopt(self, filename):
+        """Bring a file that was placed in upload_dir by name into the store"""
+        path = os.path.join(self.upload_dir, filename)
+        digest = file_digest(path)
+        ext = os.path.splitext(filename)[1]
+        object_path = os.path.join(self.object_dir, self.object_name(digest, ext))
+        with self._lock:
+            if not os.path.exists(object_path):
+                _link_or_copy(path, object_path)
+            current = self._aliases.get(filename)
+            if current and current['digest'] == digest:
+                return current
+            entry = self._aliases[filename] = {
+                'digest': digest,
+                'ext': ext.lower(),
+                'size': os.path.getsize(path),
+                'uploaded_at': os.path.getmtime(path)
+            }
+            self._save()
+            return entry
+
+    def resolve(self, filename):
+        """Alias entry for a display name, or None if it is not in the store"""
+        with self._lock:
+            return self._aliases.get(filename)
+
+    def forget_missing(self):
+        """Drop aliases whose named file has been deleted"""
+        with self._lock:
+            missing = [name for name in self._aliases
+                       if not os.path.exists(os.path.join(self.upload_dir, name))]
+            for name in missing:
+                del self._aliases[name]
+            if missing:
+                self._save()
+            return missing
+
+    def stats(self):
+        with self._lock:
+            digests = {entry['digest'] for entry in self._aliases.values()}
+            return {
+                'aliases': len(self._aliases),
+                'objects_referenced': len(digests),
+                'uploads': self.uploads,
+                'dedupe_hits': self.dedupe_hits,
+                'bytes_deduplicated': self.bytes_deduplicated
+            }